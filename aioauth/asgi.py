@@ -0,0 +1,197 @@
+"""
+ASGI application serving the endpoints of an authorization server
+without a web framework.
+```python
+from aioauth import asgi
+```
+"""
+
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, List, MutableMapping, Optional
+
+from .collections import LazyHTTPHeaderDict
+from .config import Settings
+from .errors import InvalidRequestError
+from .requests import Request
+from .responses import Response
+from .server import AuthorizationServer
+from .utils import build_error_response
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+_FORM_CONTENT_TYPE = "application/x-www-form-urlencoded"
+
+
+class OAuth2App:
+    """
+    ASGI application that serves `aioauth.server.AuthorizationServer`.
+
+    Requests are created from the raw ASGI scope and body with
+    `aioauth.requests.Request.from_raw`, and the `aioauth.responses.Response` is
+    written back as JSON. The ASGI scope is available to the storage in
+    `request.extra["asgi.scope"]`, for example to authenticate the
+    resource owner from a session cookie on the authorization endpoint.
+
+    The endpoints are served at:
+
+    - `/token`: `AuthorizationServer.create_token_response`
+    - `/authorize`: `AuthorizationServer.create_authorization_response`
+    - `/introspect`: `AuthorizationServer.create_token_introspection_response`
+    - `/revoke`: `AuthorizationServer.revoke_token`
+
+    Other paths are answered with `404 Not Found`.
+
+    Example:
+        ```python
+        from aioauth.asgi import OAuth2App
+
+        app = OAuth2App(AuthorizationServer(storage=storage))
+        # uvicorn module:app, or mounted under a prefix in any ASGI
+        # framework, e.g. `starlette_app.mount("/oauth", app)`.
+        ```
+
+    Args:
+        server: The `aioauth.server.AuthorizationServer` to serve.
+        settings: `aioauth.config.Settings` set on every request.
+        max_body_size: Maximum size in bytes of a request body.
+        max_fields: Maximum number of query string or form fields.
+    """
+
+    def __init__(
+        self,
+        server: AuthorizationServer,
+        settings: Optional[Settings] = None,
+        max_body_size: int = 64 * 1024,
+        max_fields: int = 64,
+    ):
+        self.server = server
+        self.settings = settings or Settings()
+        self.max_body_size = max_body_size
+        self.max_fields = max_fields
+        self.routes: Dict[str, Callable[[Request], Awaitable[Response]]] = {
+            "/token": server.create_token_response,
+            "/authorize": server.create_authorization_response,
+            "/introspect": server.create_token_introspection_response,
+            "/revoke": server.revoke_token,
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+
+        if scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path) :]
+
+        endpoint = self.routes.get(path)
+        if endpoint is None:
+            await self._send(send, Response(status_code=HTTPStatus.NOT_FOUND))
+            return
+
+        body = await self._read_body(receive)
+        request = self.build_request(scope, body or b"")
+        try:
+            if body is None:
+                raise InvalidRequestError(
+                    request=request, description="Request body is too large."
+                )
+            if self._count_fields(scope.get("query_string", b"")) > self.max_fields or (
+                body and self._count_fields(body) > self.max_fields
+            ):
+                raise InvalidRequestError(
+                    request=request, description="Request contains too many fields."
+                )
+        except InvalidRequestError as exc:
+            response = build_error_response(exc=exc, request=request)
+        else:
+            response = await endpoint(request)
+
+        await self._send(send, response)
+
+    def build_request(self, scope: Scope, body: bytes = b"") -> Request:
+        """
+        Returns a `Request` for `scope` and its `body`, created with
+        `aioauth.requests.Request.from_raw`: parameters and headers are
+        only decoded when the endpoint reads them. Bodies that are not
+        form encoded are ignored.
+        """
+        headers = LazyHTTPHeaderDict(scope["headers"])
+
+        host = headers.get("host")
+        if host is None:
+            server = scope.get("server")
+            host = f"{server[0]}:{server[1]}" if server else "localhost"
+        url = f"{scope.get('scheme', 'http')}://{host}{scope['path']}"
+        query_string = scope.get("query_string", b"")
+        if query_string:
+            url = f"{url}?{query_string.decode('latin-1')}"
+
+        content_type = headers.get("content-type", "")
+        if content_type.split(";", 1)[0].strip().lower() != _FORM_CONTENT_TYPE:
+            body = b""
+
+        request = Request.from_raw(
+            method=scope["method"],
+            url=url,
+            query_string=query_string,
+            body=body,
+            settings=self.settings,
+            extra={"asgi.scope": scope},
+        )
+        # Already split to find the host.
+        request.headers = headers
+        return request
+
+    @staticmethod
+    def _count_fields(data: bytes) -> int:
+        return data.count(b"&") + 1
+
+    async def _read_body(self, receive: Receive) -> Optional[bytes]:
+        """Returns the request body, or `None` if it is too large."""
+        chunks: List[bytes] = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_body_size:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    async def _send(self, send: Send, response: Response) -> None:
+        body = response.render()
+        headers = [
+            (key.encode("latin-1"), str(value).encode("latin-1"))
+            for key, value in response.headers.items()
+        ]
+        headers.append((b"content-length", str(len(body)).encode()))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": int(response.status_code),
+                "headers": headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
@@ -6,7 +6,7 @@ from aioauth import collections
 """
 
 from collections import UserDict
-from typing import Any
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 
 class HTTPHeaderDict(UserDict):
@@ -62,3 +62,36 @@ class HTTPHeaderDict(UserDict):
             return self[key]
         except KeyError:
             return default
+
+
+class LazyHTTPHeaderDict(HTTPHeaderDict):
+    """
+    An `HTTPHeaderDict` built from raw header pairs, such as the
+    `headers` of an ASGI scope, that are only decoded on first access.
+
+    Header names are lower-cased and names and values are decoded as
+    latin-1. The values of repeated headers are joined with `", "`.
+
+    Args:
+        headers: An iterable of `(name, value)` byte string pairs.
+    """
+
+    def __init__(self, headers: Iterable[Tuple[bytes, bytes]] = ()):
+        """Keep the raw headers, without decoding them."""
+        self._raw = headers
+        self._data: Optional[Dict[str, str]] = None
+
+    @property  # type: ignore[override]
+    def data(self) -> Dict[str, str]:
+        if self._data is None:
+            data: Dict[str, str] = {}
+            for raw_name, raw_value in self._raw:
+                name = raw_name.decode("latin-1").lower()
+                value = raw_value.decode("latin-1")
+                data[name] = f"{data[name]}, {value}" if name in data else value
+            self._data = data
+        return self._data
+
+    @data.setter
+    def data(self, value: Dict[str, str]) -> None:
+        self._data = value
@@ -0,0 +1,72 @@
+"""
+Backports of standard library features missing from older Python versions.
+```python
+from aioauth import compat
+```
+"""
+
+from dataclasses import fields
+from typing import Iterator, Type, TypeVar
+
+T = TypeVar("T")
+
+
+def _slot_names(cls: type) -> Iterator[str]:
+    for base in cls.__mro__:
+        slots = base.__dict__.get("__slots__", ())
+        yield from (slots,) if isinstance(slots, str) else slots
+
+
+def add_slots(cls: Type[T]) -> Type[T]:
+    """
+    Class decorator that recreates a dataclass with `__slots__`, like
+    `dataclass(slots=True)` which is only available from Python 3.10.
+
+    Instances of slotted dataclasses have no `__dict__`: they use less
+    memory and arbitrary attributes cannot be set on them. Only fields
+    that are not already slots of a base class get a slot, so a
+    subclass must be decorated as well to stay free of `__dict__`.
+    Zero-argument `super()` keeps working in the methods of the class.
+
+    Example:
+        ```python
+        @add_slots
+        @dataclass
+        class Point:
+            x: int
+            y: int = 0
+        ```
+    """
+    cls_dict = dict(cls.__dict__)
+    field_names = tuple(field.name for field in fields(cls))  # type: ignore
+    inherited = set(_slot_names(cls))
+    cls_dict["__slots__"] = tuple(name for name in field_names if name not in inherited)
+
+    # Defaults are kept by __init__, the class attributes would
+    # conflict with the slots.
+    for name in field_names:
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+
+    metaclass: type = type(cls)
+    slotted = metaclass(cls.__name__, cls.__bases__, cls_dict)
+    slotted.__qualname__ = cls.__qualname__
+
+    # Methods using zero-argument super() refer to the original class
+    # through their __class__ cell.
+    for value in cls_dict.values():
+        for function in (
+            value,
+            getattr(value, "__func__", None),
+            getattr(value, "fget", None),
+            getattr(value, "fset", None),
+        ):
+            for cell in getattr(function, "__closure__", None) or ():
+                try:
+                    if cell.cell_contents is cls:
+                        cell.cell_contents = slotted
+                except ValueError:  # empty cell
+                    pass
+
+    return slotted
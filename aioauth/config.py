@@ -49,6 +49,9 @@ class Settings:
     AUTHORIZATION_CODE_EXPIRES_IN: int = 5 * 60
     """Authorization code lifetime in seconds. Defaults to 5 minutes."""
 
+    INTROSPECTION_BATCH_MAX_SIZE: int = 100
+    """Maximum number of tokens accepted by a batch introspection request."""
+
     INSECURE_TRANSPORT: bool = False
     """Allow connections over SSL only.
 
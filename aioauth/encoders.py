@@ -0,0 +1,88 @@
+"""
+JSON encoding of response bodies, using the fastest installed backend.
+```python
+from aioauth import encoders
+```
+"""
+
+import json
+from typing import Any, Callable, Dict, Union
+
+JSONBackend = Callable[[Any], bytes]
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _load_orjson() -> JSONBackend:
+    import orjson  # type: ignore
+
+    return orjson.dumps
+
+
+def _load_ujson() -> JSONBackend:
+    import ujson  # type: ignore
+
+    def dumps(obj: Any) -> bytes:
+        return ujson.dumps(obj, ensure_ascii=False).encode()
+
+    return dumps
+
+
+_backends: Dict[str, Callable[[], JSONBackend]] = {
+    "orjson": _load_orjson,
+    "ujson": _load_ujson,
+    "json": lambda: _json_dumps,
+}
+
+_dumps: JSONBackend = _json_dumps
+_backend_name = "json"
+
+
+def set_json_backend(backend: Union[str, JSONBackend]) -> None:
+    """
+    Selects the function used by `aioauth.encoders.dumps`.
+
+    By default the first importable backend among `orjson`, `ujson` and
+    the standard library `json` is used.
+
+    Args:
+        backend: `"orjson"`, `"ujson"`, `"json"`, or a callable that
+            encodes an object to JSON bytes.
+
+    Raises:
+        ImportError: The requested backend is not installed.
+        ValueError: The backend name is unknown.
+    """
+    global _dumps, _backend_name
+
+    if callable(backend):
+        _dumps = backend
+        _backend_name = getattr(backend, "__qualname__", repr(backend))
+        return
+
+    try:
+        load = _backends[backend]
+    except KeyError:
+        raise ValueError(f"Unknown JSON backend: {backend}") from None
+    _dumps = load()
+    _backend_name = backend
+
+
+def get_json_backend() -> str:
+    """Returns the name of the backend used by `aioauth.encoders.dumps`."""
+    return _backend_name
+
+
+def dumps(obj: Any) -> bytes:
+    """Encodes `obj` to compact UTF-8 JSON bytes with the selected backend."""
+    return _dumps(obj)
+
+
+for _name in _backends:
+    try:
+        set_json_backend(_name)
+    except ImportError:
+        continue
+    break
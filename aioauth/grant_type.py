@@ -5,7 +5,7 @@ from aioauth import grant_type
 ```
 """
 
-from typing import Optional
+from typing import Optional, Tuple
 
 from .requests import Request
 from .storage import BaseStorage
@@ -18,9 +18,11 @@ from .errors import (
     MismatchingStateError,
     UnauthorizedClientError,
 )
-from .models import Client
+from .models import AuthorizationCode, Client, Token
 from .responses import TokenResponse
-from .utils import enforce_list, enforce_str, generate_token
+from .revocation import RevocationSet
+from .tokens import TokenGenerator
+from .utils import enforce_list, enforce_str
 
 
 class GrantTypeBase:
@@ -31,10 +33,14 @@ class GrantTypeBase:
         storage: BaseStorage,
         client_id: str,
         client_secret: Optional[str],
+        token_generator: Optional[TokenGenerator] = None,
+        revocation_set: Optional[RevocationSet] = None,
     ):
         self.storage = storage
         self.client_id = client_id
         self.client_secret = client_secret
+        self.token_generator = token_generator or TokenGenerator()
+        self.revocation_set = revocation_set
         self.scope: Optional[str] = None
 
     async def create_token_response(
@@ -44,12 +50,20 @@ class GrantTypeBase:
         if self.scope is None:
             raise RuntimeError("validate_request() must be called first")
 
+        access_token = self.token_generator.generate_access_token(
+            request=request, client_id=client.client_id, scope=self.scope
+        )
         token = await self.storage.create_token(
             request=request,
             client_id=client.client_id,
             scope=self.scope,
-            access_token=generate_token(42),
-            refresh_token=generate_token(48),
+            access_token=access_token,
+            refresh_token=self.token_generator.generate_refresh_token(
+                request=request,
+                client_id=client.client_id,
+                scope=self.scope,
+                access_token=access_token,
+            ),
         )
 
         return TokenResponse(
@@ -98,6 +112,20 @@ class AuthorizationCodeGrantType(GrantTypeBase):
         See [RFC 6749 section 1.3.1](https://tools.ietf.org/html/rfc6749#section-1.3.1).
     """
 
+    def __init__(
+        self,
+        storage: BaseStorage,
+        client_id: str,
+        client_secret: Optional[str],
+        token_generator: Optional[TokenGenerator] = None,
+        revocation_set: Optional[RevocationSet] = None,
+    ):
+        super().__init__(
+            storage, client_id, client_secret, token_generator, revocation_set
+        )
+        self.authorization_code: Optional[AuthorizationCode] = None
+        """The code consumed by `validate_request`."""
+
     async def validate_request(self, request: Request) -> Client:
         client = await super().validate_request(request)
 
@@ -116,49 +144,45 @@ class AuthorizationCodeGrantType(GrantTypeBase):
                 request=request, description="Missing code parameter."
             )
 
-        authorization_code = await self.storage.get_authorization_code(
-            request=request, client_id=client.client_id, code=request.post.code
-        )
-
-        if not authorization_code:
+        if not self.token_generator.is_well_formed(request.post.code):
             raise InvalidGrantError(request=request)
 
-        if (
-            authorization_code.code_challenge
-            and authorization_code.code_challenge_method
-        ):
-            if not request.post.code_verifier:
-                raise InvalidRequestError(
-                    request=request, description="Code verifier required."
+        def check(authorization_code: AuthorizationCode) -> None:
+            # Raised before the code is deleted, so that someone holding
+            # an intercepted code cannot use it up without the verifier.
+            if (
+                authorization_code.code_challenge
+                and authorization_code.code_challenge_method
+            ):
+                if not request.post.code_verifier:
+                    raise InvalidRequestError(
+                        request=request, description="Code verifier required."
+                    )
+
+                is_valid_code_challenge = authorization_code.check_code_challenge(
+                    request.post.code_verifier
                 )
+                if not is_valid_code_challenge:
+                    raise MismatchingStateError(request=request)
 
-            is_valid_code_challenge = authorization_code.check_code_challenge(
-                request.post.code_verifier
-            )
-            if not is_valid_code_challenge:
-                raise MismatchingStateError(request=request)
-
-        if authorization_code.is_expired:
-            raise InvalidGrantError(request=request)
-
-        self.scope = authorization_code.scope
-        return client
-
-    async def create_token_response(
-        self, request: Request, client: Client
-    ) -> TokenResponse:
-        token_response = await super().create_token_response(request, client)
-
-        if request.post.code is None:
-            raise
+            if authorization_code.is_expired:
+                raise InvalidGrantError(request=request)
 
-        await self.storage.delete_authorization_code(
+        # The code is checked and deleted in one call, so that it cannot
+        # be redeemed twice even by concurrent requests.
+        authorization_code = await self.storage.consume_authorization_code(
             request=request,
             client_id=client.client_id,
             code=request.post.code,
+            check=check,
         )
 
-        return token_response
+        if not authorization_code:
+            raise InvalidGrantError(request=request)
+
+        self.authorization_code = authorization_code
+        self.scope = authorization_code.scope
+        return client
 
 
 class PasswordGrantType(GrantTypeBase):
@@ -203,46 +227,52 @@ class RefreshTokenGrantType(GrantTypeBase):
         self, request: Request, client: Client
     ) -> TokenResponse:
         """Validate token request and create token response."""
-        old_token = await self.storage.get_token(
+        assert request.post.refresh_token is not None
+        old_tokens = []
+
+        def issue(old_token: Token) -> Tuple[str, str, Optional[str]]:
+            old_tokens.append(old_token)
+            # new token should have at max the same scope as the old token
+            # (see https://www.oauth.com/oauth2-servers/making-authenticated-requests/refreshing-an-access-token/)
+            new_scope = old_token.scope
+            if request.post.scope:
+                # restrict requested tokens to requested scopes in the old token
+                new_scope = enforce_str(
+                    list(
+                        set(enforce_list(old_token.scope))
+                        & set(enforce_list(request.post.scope))
+                    )
+                )
+
+            access_token = self.token_generator.generate_access_token(
+                request=request, client_id=client.client_id, scope=new_scope
+            )
+            refresh_token = self.token_generator.generate_refresh_token(
+                request=request,
+                client_id=client.client_id,
+                scope=new_scope,
+                access_token=access_token,
+            )
+            return new_scope, access_token, refresh_token
+
+        # Validates, revokes and replaces the old token at once, see
+        # `aioauth.storage.TokenStorage.rotate_refresh_token`.
+        token = await self.storage.rotate_refresh_token(
             request=request,
             client_id=client.client_id,
             refresh_token=request.post.refresh_token,
-            access_token=None,
-            token_type="refresh_token",
+            issue=issue,
         )
 
-        if not old_token or old_token.revoked or old_token.refresh_token_expired:
+        if token is None:
             raise InvalidGrantError(request=request)
 
-        # Revoke old token
-        await self.storage.revoke_token(
-            request=request,
-            client_id=client.client_id,
-            refresh_token=old_token.refresh_token,
-            token_type="refresh_token",
-            access_token=None,
-        )
-
-        # new token should have at max the same scope as the old token
-        # (see https://www.oauth.com/oauth2-servers/making-authenticated-requests/refreshing-an-access-token/)
-        new_scope = old_token.scope
-        if request.post.scope:
-            # restrict requested tokens to requested scopes in the old token
-            new_scope = enforce_str(
-                list(
-                    set(enforce_list(old_token.scope))
-                    & set(enforce_list(request.post.scope))
-                )
+        if self.revocation_set is not None:
+            old_token = old_tokens[-1]
+            self.revocation_set.add(
+                old_token.access_token, old_token.issued_at + old_token.expires_in
             )
 
-        token = await self.storage.create_token(
-            request=request,
-            client_id=client.client_id,
-            scope=new_scope,
-            access_token=generate_token(42),
-            refresh_token=generate_token(48),
-        )
-
         return TokenResponse(
             expires_in=token.expires_in,
             refresh_token_expires_in=token.refresh_token_expires_in,
@@ -260,6 +290,9 @@ class RefreshTokenGrantType(GrantTypeBase):
                 request=request, description="Missing refresh token parameter."
             )
 
+        if not self.token_generator.is_well_formed(request.post.refresh_token):
+            raise InvalidGrantError(request=request)
+
         return client
 
 
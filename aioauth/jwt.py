@@ -0,0 +1,176 @@
+"""
+Minimal HMAC-signed JSON Web Tokens, implemented with the standard
+library only.
+```python
+from aioauth import jwt
+```
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Any, Dict, Mapping, Optional
+
+ALGORITHM = "HS256"
+"""The only supported signing algorithm, HMAC using SHA-256."""
+
+MIN_KEY_LENGTH = 32
+"""Minimum length in bytes of a signing key."""
+
+
+class KeyRing:
+    """
+    Set of HMAC keys identified by a key ID (`kid`).
+
+    Tokens are always signed with the current key, and verified with
+    whichever key their `kid` header names. To rotate keys, add the new
+    key as current and remove the old key once all tokens signed with it
+    have expired.
+
+    Example:
+        ```python
+        from aioauth.jwt import KeyRing
+
+        key_ring = KeyRing({"2024-01": b"..."})
+        key_ring.add("2024-02", b"...")  # new tokens are signed with 2024-02
+        key_ring.remove("2024-01")  # once 2024-01 tokens have expired
+        ```
+
+    Args:
+        keys: Mapping of key IDs to secret keys.
+        current: Key ID used for signing. Defaults to the last key of
+            `keys`.
+    """
+
+    def __init__(self, keys: Mapping[str, bytes], current: Optional[str] = None):
+        self._keys: Dict[str, bytes] = {}
+        self._current: Optional[str] = None
+
+        for kid, key in keys.items():
+            self.add(kid, key)
+
+        if current is not None:
+            if current not in self._keys:
+                raise ValueError(f"Unknown key ID {current!r}.")
+            self._current = current
+
+    @property
+    def current(self) -> str:
+        """ID of the key used for signing."""
+        if self._current is None:
+            raise ValueError("Key ring is empty.")
+        return self._current
+
+    def add(self, kid: str, key: bytes, current: bool = True) -> None:
+        """Adds `key` to the ring, and makes it the signing key if `current`."""
+        if len(key) < MIN_KEY_LENGTH:
+            raise ValueError(f"Keys must be at least {MIN_KEY_LENGTH} bytes long.")
+        self._keys[kid] = key
+        if current or self._current is None:
+            self._current = kid
+
+    def remove(self, kid: str) -> None:
+        """Removes a key that is no longer used for signing."""
+        if kid == self._current:
+            raise ValueError("The current signing key cannot be removed.")
+        self._keys.pop(kid, None)
+
+    def get(self, kid: str) -> Optional[bytes]:
+        """Returns the key with ID `kid`, if any."""
+        return self._keys.get(kid)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _dumps(data: Mapping[str, Any]) -> bytes:
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def _sign(key: bytes, signing_input: str) -> bytes:
+    return hmac.new(key, signing_input.encode("ascii"), hashlib.sha256).digest()
+
+
+def encode(claims: Mapping[str, Any], key_ring: KeyRing) -> str:
+    """
+    Encodes and signs `claims` with the current key of `key_ring`.
+
+    Args:
+        claims: JSON serializable claims.
+        key_ring: An `aioauth.jwt.KeyRing`.
+
+    Returns:
+        A compact serialized JWT.
+    """
+    kid = key_ring.current
+    key = key_ring.get(kid)
+    assert key is not None
+    header = {"alg": ALGORITHM, "typ": "at+jwt", "kid": kid}
+    signing_input = f"{_b64encode(_dumps(header))}.{_b64encode(_dumps(claims))}"
+    return f"{signing_input}.{_b64encode(_sign(key, signing_input))}"
+
+
+def decode(
+    token: str,
+    key_ring: KeyRing,
+    now: Optional[float] = None,
+    leeway: int = 0,
+) -> Optional[Dict[str, Any]]:
+    """
+    Verifies the signature and expiry of `token` and returns its claims.
+
+    Args:
+        token: A compact serialized JWT.
+        key_ring: An `aioauth.jwt.KeyRing`.
+        now: Current time. Defaults to `time.time()`.
+        leeway: Seconds of tolerated clock skew.
+
+    Returns:
+        The claims, or `None` if the token is malformed, is not signed by
+        a key of `key_ring` or has expired.
+    """
+    try:
+        encoded_header, encoded_claims, encoded_signature = token.split(".")
+        header = json.loads(_b64decode(encoded_header))
+        payload = _b64decode(encoded_claims)
+        signature = _b64decode(encoded_signature)
+    except ValueError:
+        return None
+
+    if not isinstance(header, dict) or header.get("alg") != ALGORITHM:
+        return None
+
+    key = key_ring.get(str(header.get("kid")))
+    if key is None:
+        return None
+
+    expected = _sign(key, f"{encoded_header}.{encoded_claims}")
+    if not hmac.compare_digest(signature, expected):
+        return None
+
+    try:
+        claims = json.loads(payload)
+    except ValueError:
+        return None
+
+    if not isinstance(claims, dict):
+        return None
+
+    exp = claims.get("exp")
+    if not isinstance(exp, int):
+        return None
+
+    if now is None:
+        now = time.time()
+
+    if exp + leeway < now:
+        return None
+
+    return claims
@@ -0,0 +1,530 @@
+"""
+Instrumentation of the authorization server: endpoint, phase and
+storage durations, error counts and grant and response type counters.
+```python
+from aioauth import metrics
+```
+"""
+
+from bisect import bisect_left
+from contextlib import nullcontext
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    ContextManager,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from .models import AuthorizationCode, Client, Token
+from .requests import Request
+from .storage import BaseStorage, CreateAuthorizationCodeCall, CreateTokenCall
+from .storage.proxy import ProxyStorage
+from .types import CodeChallengeMethod, TokenType
+
+T = TypeVar("T")
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+_NULL_CONTEXT: ContextManager[None] = nullcontext()
+
+
+class Instrumentation:
+    """
+    Receives the measurements of an `aioauth.server.AuthorizationServer`.
+
+    This base class ignores every measurement and is the default
+    instrumentation of the server. While `enabled` is `False`, the
+    server does not read the clock at all. Subclass it and set `enabled`
+    to `True` to forward measurements to a metrics library, or use
+    `aioauth.metrics.MetricsRegistry`.
+
+    Example:
+        ```python
+        from aioauth.metrics import MetricsRegistry
+
+        metrics = MetricsRegistry()
+        server = AuthorizationServer(storage=storage, instrumentation=metrics)
+
+        @app.get("/metrics")
+        async def prometheus():
+            return PlainTextResponse(metrics.render())
+        ```
+    """
+
+    enabled: bool = False
+
+    def observe_endpoint(self, endpoint: str, duration: float, status_code: int):
+        """Called once an endpoint of the server returned a response."""
+
+    def observe_phase(self, endpoint: str, phase: str, duration: float):
+        """Called once a phase of an endpoint, such as validation, completed."""
+
+    def observe_storage(self, method: str, duration: float, error: bool):
+        """Called once a `aioauth.storage.BaseStorage` method returned or raised."""
+
+    def count_error(self, endpoint: str, error: str):
+        """Called when an endpoint responds with an `aioauth.types.ErrorType`."""
+
+    def count_grant_type(self, grant_type: str):
+        """Called for every token request with a supported grant type."""
+
+    def count_response_type(self, response_type: str):
+        """Called for every valid authorization request."""
+
+    def phase(self, endpoint: str, phase: str) -> ContextManager[Any]:
+        """
+        Returns a context manager that measures the duration of its
+        block as `phase` of `endpoint`.
+        """
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _Phase(self, endpoint, phase)
+
+
+class _Phase:
+    def __init__(self, instrumentation: Instrumentation, endpoint: str, phase: str):
+        self.instrumentation = instrumentation
+        self.endpoint = endpoint
+        self.phase = phase
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self.instrumentation.observe_phase(
+            self.endpoint, self.phase, time.perf_counter() - self.start
+        )
+
+
+class _Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry(Instrumentation):
+    """
+    Instrumentation that keeps the measurements in memory and renders
+    them in the Prometheus text exposition format.
+
+    The following metrics are exposed:
+
+    - `aioauth_requests_total{endpoint,status}`
+    - `aioauth_request_duration_seconds{endpoint}`
+    - `aioauth_phase_duration_seconds{endpoint,phase}`
+    - `aioauth_storage_duration_seconds{method}`
+    - `aioauth_storage_errors_total{method}`
+    - `aioauth_errors_total{endpoint,error}`
+    - `aioauth_grant_types_total{grant_type}`
+    - `aioauth_response_types_total{response_type}`
+
+    Note:
+        The registry is not shared between processes: each worker
+        exposes its own measurements.
+
+    Args:
+        buckets: Upper bounds in seconds of the duration histogram buckets.
+    """
+
+    enabled = True
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counters: Dict[str, Dict[Labels, int]] = {}
+        self.histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+
+    def increment(self, name: str, labels: Labels, value: int = 1) -> None:
+        counters = self.counters.setdefault(name, {})
+        counters[labels] = counters.get(labels, 0) + value
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        histograms = self.histograms.setdefault(name, {})
+        histogram = histograms.get(labels)
+        if histogram is None:
+            histogram = histograms[labels] = _Histogram(self.buckets)
+        histogram.observe(value)
+
+    def observe_endpoint(self, endpoint: str, duration: float, status_code: int):
+        self.increment(
+            "aioauth_requests_total",
+            (("endpoint", endpoint), ("status", str(int(status_code)))),
+        )
+        self.observe(
+            "aioauth_request_duration_seconds", (("endpoint", endpoint),), duration
+        )
+
+    def observe_phase(self, endpoint: str, phase: str, duration: float):
+        self.observe(
+            "aioauth_phase_duration_seconds",
+            (("endpoint", endpoint), ("phase", phase)),
+            duration,
+        )
+
+    def observe_storage(self, method: str, duration: float, error: bool):
+        self.observe(
+            "aioauth_storage_duration_seconds", (("method", method),), duration
+        )
+        if error:
+            self.increment("aioauth_storage_errors_total", (("method", method),))
+
+    def count_error(self, endpoint: str, error: str):
+        self.increment(
+            "aioauth_errors_total", (("endpoint", endpoint), ("error", error))
+        )
+
+    def count_grant_type(self, grant_type: str):
+        self.increment("aioauth_grant_types_total", (("grant_type", grant_type),))
+
+    def count_response_type(self, response_type: str):
+        self.increment(
+            "aioauth_response_types_total", (("response_type", response_type),)
+        )
+
+    def clear(self) -> None:
+        """Drops all measurements."""
+        self.counters.clear()
+        self.histograms.clear()
+
+    def render(self) -> str:
+        """
+        Returns:
+            The measurements in the Prometheus text exposition format.
+        """
+        lines: List[str] = []
+
+        for name, counters in sorted(self.counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(counters.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for name, histograms in sorted(self.histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(histograms.items()):
+                cumulative = 0
+                bounds = [*map(repr, histogram.buckets), "+Inf"]
+                for bound, count in zip(bounds, histogram.counts):
+                    cumulative += count
+                    bucket_labels = _format_labels(labels + (("le", bound),))
+                    lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum!r}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+class InstrumentedStorage(ProxyStorage):
+    """
+    Storage wrapper that reports the duration of every storage call to
+    `aioauth.metrics.Instrumentation.observe_storage`.
+
+    `aioauth.server.AuthorizationServer` wraps its storage with this
+    class when it is given an enabled instrumentation.
+
+    Args:
+        storage: The `aioauth.storage.BaseStorage` to wrap.
+        instrumentation: The `aioauth.metrics.Instrumentation` to report to.
+    """
+
+    def __init__(self, storage: BaseStorage, instrumentation: Instrumentation):
+        super().__init__(storage)
+        self.instrumentation = instrumentation
+
+    async def _observe(self, method: str, call: Awaitable[T]) -> T:
+        start = time.perf_counter()
+        error = True
+        try:
+            result = await call
+            error = False
+            return result
+        finally:
+            self.instrumentation.observe_storage(
+                method, time.perf_counter() - start, error
+            )
+
+    async def create_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        access_token: str,
+        refresh_token: Optional[str] = None,
+    ) -> Token:
+        return await self._observe(
+            "create_token",
+            self.storage.create_token(
+                request=request,
+                client_id=client_id,
+                scope=scope,
+                access_token=access_token,
+                refresh_token=refresh_token,
+            ),
+        )
+
+    async def create_tokens(self, *, calls: List[CreateTokenCall]) -> List[Token]:
+        return await self._observe(
+            "create_tokens", self.storage.create_tokens(calls=calls)
+        )
+
+    async def get_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        token_type: Optional[TokenType] = None,
+        access_token: Optional[str] = None,
+        refresh_token: Optional[str] = None,
+    ) -> Optional[Token]:
+        return await self._observe(
+            "get_token",
+            self.storage.get_token(
+                request=request,
+                client_id=client_id,
+                token_type=token_type,
+                access_token=access_token,
+                refresh_token=refresh_token,
+            ),
+        )
+
+    async def get_tokens(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        tokens: List[str],
+        token_type: Optional[TokenType] = None,
+    ) -> List[Optional[Token]]:
+        return await self._observe(
+            "get_tokens",
+            self.storage.get_tokens(
+                request=request,
+                client_id=client_id,
+                tokens=tokens,
+                token_type=token_type,
+            ),
+        )
+
+    async def is_token_revoked(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        access_token: str,
+    ) -> bool:
+        return await self._observe(
+            "is_token_revoked",
+            self.storage.is_token_revoked(
+                request=request, client_id=client_id, access_token=access_token
+            ),
+        )
+
+    async def revoke_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        refresh_token: Optional[str] = None,
+        token_type: Optional[TokenType] = None,
+        access_token: Optional[str] = None,
+    ) -> None:
+        await self._observe(
+            "revoke_token",
+            self.storage.revoke_token(
+                request=request,
+                client_id=client_id,
+                refresh_token=refresh_token,
+                token_type=token_type,
+                access_token=access_token,
+            ),
+        )
+
+    async def rotate_refresh_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        refresh_token: str,
+        issue: Callable[[Token], Tuple[str, str, Optional[str]]],
+    ) -> Optional[Token]:
+        return await self._observe(
+            "rotate_refresh_token",
+            self.storage.rotate_refresh_token(
+                request=request,
+                client_id=client_id,
+                refresh_token=refresh_token,
+                issue=issue,
+            ),
+        )
+
+    async def create_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        response_type: str,
+        redirect_uri: str,
+        code: str,
+        code_challenge_method: Optional[CodeChallengeMethod] = None,
+        code_challenge: Optional[str] = None,
+        nonce: Optional[str] = None,
+    ) -> AuthorizationCode:
+        return await self._observe(
+            "create_authorization_code",
+            self.storage.create_authorization_code(
+                request=request,
+                client_id=client_id,
+                scope=scope,
+                response_type=response_type,
+                redirect_uri=redirect_uri,
+                code=code,
+                code_challenge_method=code_challenge_method,
+                code_challenge=code_challenge,
+                nonce=nonce,
+            ),
+        )
+
+    async def create_authorization_codes(
+        self, *, calls: List[CreateAuthorizationCodeCall]
+    ) -> List[AuthorizationCode]:
+        return await self._observe(
+            "create_authorization_codes",
+            self.storage.create_authorization_codes(calls=calls),
+        )
+
+    async def get_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+    ) -> Optional[AuthorizationCode]:
+        return await self._observe(
+            "get_authorization_code",
+            self.storage.get_authorization_code(
+                request=request, client_id=client_id, code=code
+            ),
+        )
+
+    async def delete_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+    ) -> None:
+        await self._observe(
+            "delete_authorization_code",
+            self.storage.delete_authorization_code(
+                request=request, client_id=client_id, code=code
+            ),
+        )
+
+    async def consume_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+        check: Optional[Callable[[AuthorizationCode], None]] = None,
+    ) -> Optional[AuthorizationCode]:
+        return await self._observe(
+            "consume_authorization_code",
+            self.storage.consume_authorization_code(
+                request=request, client_id=client_id, code=code, check=check
+            ),
+        )
+
+    async def get_client(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        client_secret: Optional[str] = None,
+    ) -> Optional[Client]:
+        return await self._observe(
+            "get_client",
+            self.storage.get_client(
+                request=request, client_id=client_id, client_secret=client_secret
+            ),
+        )
+
+    async def get_user(self, request: Request) -> Optional[Any]:
+        return await self._observe("get_user", self.storage.get_user(request))
+
+    async def get_id_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        redirect_uri: str,
+        response_type: Optional[str] = None,
+        nonce: Optional[str] = None,
+    ) -> str:
+        return await self._observe(
+            "get_id_token",
+            self.storage.get_id_token(
+                request=request,
+                client_id=client_id,
+                scope=scope,
+                redirect_uri=redirect_uri,
+                response_type=response_type,
+                nonce=nonce,
+            ),
+        )
+
+    async def purge_expired(
+        self,
+        *,
+        before: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> int:
+        return await self._observe(
+            "purge_expired", self.storage.purge_expired(before=before, limit=limit)
+        )
+
+    async def get_revoked_tokens(self, *, at: Optional[int] = None) -> List[Token]:
+        return await self._observe(
+            "get_revoked_tokens", self.storage.get_revoked_tokens(at=at)
+        )
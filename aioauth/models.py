@@ -5,15 +5,17 @@ from aioauth import models
 ```
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 import secrets
 import time
-from typing import List, Optional, Union
+from typing import FrozenSet, List, Optional, Union
 
+from .compat import add_slots
 from .types import CodeChallengeMethod, GrantType, ResponseType, TokenType
 from .utils import create_s256_code_challenge, enforce_list, enforce_str
 
 
+@add_slots
 @dataclass
 class Client:
     """OAuth2.0 client model object."""
@@ -102,7 +104,84 @@ class Client:
         allowed_scope = self.get_allowed_scope(scope)
         return not (set(enforce_list(scope)) - set(enforce_list(allowed_scope)))
 
+    def compile(self) -> "CompiledClient":
+        """Returns a `CompiledClient` copy of this client."""
+        return CompiledClient(
+            **{field.name: getattr(self, field.name) for field in fields(Client)}
+        )
 
+
+@dataclass(eq=False)
+class CompiledClient(Client):
+    """
+    Client whose scopes, grant types, response types and redirect URIs
+    are turned into frozensets on construction, so that every `check_*`
+    method is a single set operation. The checks behave exactly like
+    those of `Client`.
+
+    Storage backends can return and cache compiled clients instead of
+    plain ones, see `Client.compile`.
+
+    Warning:
+        Assigning one of the fields recompiles the client, but mutating
+        a list in place, e.g. `client.redirect_uris.append(uri)`, does
+        not. Assign a new list instead.
+    """
+
+    def __post_init__(self):
+        self._compile()
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in _COMPILED_FIELDS and hasattr(self, "_scopes"):
+            self._compile()
+
+    def __eq__(self, other):
+        # Compiled and plain clients with the same fields are equal.
+        if not isinstance(other, Client):
+            return NotImplemented
+        return all(
+            getattr(self, field.name) == getattr(other, field.name)
+            for field in fields(Client)
+        )
+
+    def _compile(self) -> None:
+        self._redirect_uris: FrozenSet[str] = frozenset(self.redirect_uris)
+        self._grant_types: FrozenSet[str] = frozenset(self.grant_types)
+        self._response_types: FrozenSet[str] = frozenset(self.response_types)
+        self._scopes: FrozenSet[str] = frozenset(self.scope.split())
+
+    def check_redirect_uri(self, redirect_uri) -> bool:
+        return redirect_uri in self._redirect_uris
+
+    def check_grant_type(self, grant_type: Optional[GrantType]) -> bool:
+        return grant_type in self._grant_types if grant_type else False
+
+    def check_response_type(
+        self, response_type: Optional[Union[ResponseType, str]]
+    ) -> bool:
+        return self._response_types.issuperset(enforce_list(response_type))
+
+    def get_allowed_scope(self, scope: str) -> str:
+        if not scope:
+            return ""
+        return " ".join([s for s in enforce_list(scope) if s in self._scopes])
+
+    def check_scope(self, scope: str) -> bool:
+        scopes = enforce_list(scope)
+        # A blank scope is always allowed, like in Client.check_scope.
+        return not any(scopes) or self._scopes.issuperset(scopes)
+
+    def compile(self) -> "CompiledClient":
+        return self
+
+
+_COMPILED_FIELDS = frozenset(
+    ("redirect_uris", "grant_types", "response_types", "scope")
+)
+
+
+@add_slots
 @dataclass
 class AuthorizationCode:
     code: str
@@ -202,6 +281,7 @@ class AuthorizationCode:
         return self.auth_time + self.expires_in < time.time()
 
 
+@add_slots
 @dataclass
 class Token:
     access_token: str
@@ -6,15 +6,12 @@ from aioauth.oidc.core import grant_type
 ```
 """
 
-from typing import TYPE_CHECKING
-
 from ...grant_type import (
     AuthorizationCodeGrantType as OAuth2AuthorizationCodeGrantType,
 )
 from ...models import Client
 from ...oidc.core.responses import TokenResponse
 from ...requests import Request
-from ...utils import generate_token
 
 
 class AuthorizationCodeGrantType(OAuth2AuthorizationCodeGrantType):
@@ -47,27 +44,25 @@ class AuthorizationCodeGrantType(OAuth2AuthorizationCodeGrantType):
         if self.scope is None:
             raise RuntimeError("validate_request() must be called first")
 
+        access_token = self.token_generator.generate_access_token(
+            request=request, client_id=client.client_id, scope=self.scope
+        )
         token = await self.storage.create_token(
             request=request,
             client_id=client.client_id,
             scope=self.scope,
-            access_token=generate_token(42),
-            refresh_token=generate_token(48),
-        )
-
-        if TYPE_CHECKING:
-            # validate_request will have already ensured the request includes a code.
-            assert request.post.code is not None
-
-        authorization_code = await self.storage.get_authorization_code(
-            request=request,
-            client_id=client.client_id,
-            code=request.post.code,
+            access_token=access_token,
+            refresh_token=self.token_generator.generate_refresh_token(
+                request=request,
+                client_id=client.client_id,
+                scope=self.scope,
+                access_token=access_token,
+            ),
         )
 
-        if TYPE_CHECKING:
-            # validate_request will have already ensured the code was valid.
-            assert authorization_code is not None
+        authorization_code = self.authorization_code
+        if authorization_code is None:
+            raise RuntimeError("validate_request() must be called first")
 
         id_token = await self.storage.get_id_token(
             client_id=client.client_id,
@@ -78,12 +73,6 @@ class AuthorizationCodeGrantType(OAuth2AuthorizationCodeGrantType):
             scope=self.scope,
         )
 
-        await self.storage.delete_authorization_code(
-            request=request,
-            client_id=client.client_id,
-            code=request.post.code,
-        )
-
         return TokenResponse(
             access_token=token.access_token,
             expires_in=token.expires_in,
@@ -10,12 +10,14 @@ from dataclasses import dataclass, field
 
 from typing import Optional
 
+from ...compat import add_slots
 from ...requests import (
     Request as BaseRequest,
     Query as BaseQuery,
 )
 
 
+@add_slots
 @dataclass
 class Query(BaseQuery):
     """Query extended with OpenID `prompt`"""
@@ -28,6 +30,7 @@ class Query(BaseQuery):
     prompt: Optional[str] = None
 
 
+@add_slots
 @dataclass
 class Request(BaseRequest):
     """Object that contains a client's complete request."""
@@ -7,13 +7,20 @@ from aioauth.oidc.core import responses
 """
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Dict, Optional
 
+from aioauth.compat import add_slots
 from aioauth.responses import TokenResponse as OAuthTokenResponse
 
 
+@add_slots
 @dataclass
 class TokenResponse(OAuthTokenResponse):
     """Token response extended with OpenID `id_token`"""
 
     id_token: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        content = super().to_dict()
+        content["id_token"] = self.id_token
+        return content
@@ -5,10 +5,12 @@ from aioauth import requests
 ```
 """
 
-from dataclasses import dataclass, field
-from typing import Optional
+from dataclasses import Field, dataclass, field, fields
+from typing import Any, Collection, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import unquote_plus
 
-from .collections import HTTPHeaderDict
+from .collections import HTTPHeaderDict, LazyHTTPHeaderDict
+from .compat import add_slots
 from .config import Settings
 from .types import (
     CodeChallengeMethod,
@@ -19,6 +21,7 @@ from .types import (
 )
 
 
+@add_slots
 @dataclass
 class Query:
     """
@@ -37,6 +40,7 @@ class Query:
     response_mode: Optional[ResponseMode] = None
 
 
+@add_slots
 @dataclass
 class Post:
     """
@@ -56,8 +60,10 @@ class Post:
     token: Optional[str] = None
     token_type_hint: Optional[TokenType] = None
     code_verifier: Optional[str] = None
+    tokens: Optional[List[str]] = None
 
 
+@add_slots
 @dataclass
 class Request:
     """Object that contains a client's complete request."""
@@ -69,3 +75,165 @@ class Request:
     url: str = ""
     settings: Settings = field(default_factory=Settings)
     extra: dict = field(default_factory=dict)
+
+    def repeated_parameter(self, allowed: Collection[str] = ()) -> Optional[str]:
+        """
+        Returns the name of a query or body parameter sent more than
+        once, which [RFC 6749 section 3.1](https://tools.ietf.org/html/rfc6749#section-3.1)
+        forbids, or `None`. Only requests created by `from_raw` can
+        carry repeated parameters.
+
+        Args:
+            allowed: Parameters that may be repeated.
+        """
+        for params in (self.query, self.post):
+            if isinstance(params, _LazyFields):
+                name = params.repeated_parameter(allowed)
+                if name is not None:
+                    return name
+        return None
+
+    @classmethod
+    def from_raw(
+        cls,
+        method: RequestMethod,
+        url: str = "",
+        query_string: Union[bytes, str] = b"",
+        body: Union[bytes, str] = b"",
+        headers: Iterable[Tuple[bytes, bytes]] = (),
+        settings: Optional[Settings] = None,
+        extra: Optional[dict] = None,
+    ) -> "Request":
+        """
+        Creates a request from the raw query string, urlencoded body
+        and header pairs of an HTTP request, as found in an ASGI scope.
+
+        Nothing is decoded until it is read: `query`, `post` and
+        `headers` keep the usual `Query`, `Post` and `HTTPHeaderDict`
+        API but split their raw input on first access, and only decode
+        the fields that are read. Requests rejected after reading a few
+        fields never pay for the others.
+
+        When a parameter is repeated, its first value is read and
+        `aioauth.server.AuthorizationServer` rejects the request, see
+        `repeated_parameter`. The values of `token` are also all
+        collected in `post.tokens`, and only batch introspection
+        accepts it repeated.
+
+        Note:
+            `body` is always decoded as `application/x-www-form-urlencoded`,
+            check the content type before passing it. Requests created
+            without `settings` share one `aioauth.config.Settings`
+            instance.
+
+        Example:
+            ```python
+            request = Request.from_raw(
+                method=scope["method"],
+                url=url,
+                query_string=scope["query_string"],
+                body=body,
+                headers=scope["headers"],
+            )
+            ```
+        """
+        return cls(
+            method=method,
+            query=LazyQuery(query_string),
+            post=LazyPost(body),
+            headers=LazyHTTPHeaderDict(headers),
+            url=url,
+            settings=settings or _default_settings,
+            extra={} if extra is None else extra,
+        )
+
+
+_default_settings = Settings()
+
+
+class _LazyField:
+    """Descriptor that decodes a field of a `_LazyFields` on first access."""
+
+    def __init__(self, field: Field):
+        self.name = field.name
+        self.default = field.default
+
+    def __get__(self, instance: Optional["_LazyFields"], owner: type) -> Any:
+        if instance is None:
+            return self.default
+        try:
+            return instance._values[self.name]
+        except KeyError:
+            value = instance._values[self.name] = instance._decode(
+                self.name, self.default
+            )
+            return value
+
+    def __set__(self, instance: "_LazyFields", value: Any) -> None:
+        instance._values[self.name] = value
+
+
+class _LazyFields:
+    """
+    Base of `LazyQuery` and `LazyPost`: replaces every dataclass field
+    of the subclass by a `_LazyField` decoded from a raw urlencoded
+    string.
+    """
+
+    _list_fields: Dict[str, str] = {}
+    """Fields collecting every value of a repeated parameter, by parameter."""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for dataclass_field in fields(cls):  # type: ignore[arg-type]
+            setattr(cls, dataclass_field.name, _LazyField(dataclass_field))
+
+    def __init__(self, raw: Union[bytes, str] = b""):
+        self._raw = raw
+        self._params: Optional[Dict[str, List[str]]] = None
+        self._values: Dict[str, Any] = {}
+
+    def _split(self) -> Dict[str, List[str]]:
+        raw = self._raw
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8", "replace")
+        params: Dict[str, List[str]] = {}
+        for pair in raw.split("&"):
+            if pair:
+                name, _, value = pair.partition("=")
+                params.setdefault(unquote_plus(name), []).append(value)
+        return params
+
+    def repeated_parameter(self, allowed: Collection[str] = ()) -> Optional[str]:
+        """
+        Returns the name of a parameter given more than once, other
+        than those `allowed`, if any.
+        """
+        if self._params is None:
+            self._params = self._split()
+        for name, values in self._params.items():
+            if len(values) > 1 and name not in allowed:
+                return name
+        return None
+
+    def _decode(self, name: str, default: Any) -> Any:
+        if self._params is None:
+            self._params = self._split()
+
+        parameter = self._list_fields.get(name)
+        if parameter is not None:
+            values = self._params.get(parameter)
+            return [unquote_plus(value) for value in values] if values else default
+
+        values = self._params.get(name)
+        return unquote_plus(values[0]) if values else default
+
+
+class LazyQuery(_LazyFields, Query):
+    """`Query` decoded from a raw query string on first access."""
+
+
+class LazyPost(_LazyFields, Post):
+    """`Post` decoded from a raw urlencoded body on first access."""
+
+    _list_fields = {"tokens": "token"}
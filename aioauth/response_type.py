@@ -5,12 +5,12 @@ from aioauth import responses
 ```
 """
 
-from typing import Tuple, get_args
+from typing import Optional, Tuple, get_args
 
 from .requests import Request
 from .storage import BaseStorage
 
-from .utils import generate_token
+from .tokens import TokenGenerator
 from .errors import (
     InvalidClientError,
     InvalidRedirectURIError,
@@ -27,14 +27,31 @@ from .responses import (
 )
 from .types import CodeChallengeMethod
 
+_CLIENT_KEY = "aioauth.response_type.client"
+
 
 class ResponseTypeBase:
     """Base response type that all other exceptions inherit from."""
 
-    def __init__(self, storage: BaseStorage):
+    def __init__(
+        self,
+        storage: BaseStorage,
+        token_generator: Optional[TokenGenerator] = None,
+    ):
         self.storage = storage
+        self.token_generator = token_generator or TokenGenerator()
 
     async def validate_request(self, request: Request) -> Client:
+        """
+        Validates the authorization request and returns its client.
+
+        The client is fetched from the storage once per request: the
+        other response types of the same request reuse it from
+        `request.extra`.
+
+        Args:
+            request: An `aioauth.requests.Request`.
+        """
         state = request.query.state
 
         code_challenge_methods: Tuple[CodeChallengeMethod, ...] = get_args(
@@ -46,9 +63,13 @@ class ResponseTypeBase:
                 request=request, description="Missing client_id parameter.", state=state
             )
 
-        client = await self.storage.get_client(
-            request=request, client_id=request.query.client_id
-        )
+        client: Optional[Client] = request.extra.get(_CLIENT_KEY)
+        if client is None or client.client_id != request.query.client_id:
+            client = await self.storage.get_client(
+                request=request, client_id=request.query.client_id
+            )
+            if client is not None:
+                request.extra[_CLIENT_KEY] = client
 
         if not client:
             raise InvalidClientError(
@@ -95,13 +116,21 @@ class ResponseTypeToken(ResponseTypeBase):
     async def create_authorization_response(
         self, request: Request, client: Client
     ) -> TokenResponse:
+        access_token = self.token_generator.generate_access_token(
+            request=request, client_id=client.client_id, scope=request.query.scope
+        )
         token = await self.storage.create_token(
             request=request,
             client_id=client.client_id,
             scope=request.query.scope,
-            access_token=generate_token(42),
+            access_token=access_token,
             refresh_token=(
-                generate_token(48)
+                self.token_generator.generate_refresh_token(
+                    request=request,
+                    client_id=client.client_id,
+                    scope=request.query.scope,
+                    access_token=access_token,
+                )
                 if request.settings.ISSUE_REFRESH_TOKEN_IMPLICIT_GRANT
                 else None
             ),
@@ -135,7 +164,9 @@ class ResponseTypeAuthorizationCode(ResponseTypeBase):
         )
         authorization_code = await self.storage.create_authorization_code(
             client_id=client.client_id,
-            code=generate_token(42),
+            code=self.token_generator.generate_authorization_code(
+                request=request, client_id=client.client_id, scope=request.query.scope
+            ),
             code_challenge=request.query.code_challenge,
             code_challenge_method=request.query.code_challenge_method,
             nonce=request.query.nonce,
@@ -7,24 +7,54 @@ from aioauth import responses
 
 from dataclasses import dataclass, field
 from http import HTTPStatus
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from .collections import HTTPHeaderDict
+from .compat import add_slots
 from .constances import default_headers
+from .encoders import dumps
 from .types import ErrorType, TokenType
 
 
+class JSONResponse:
+    """
+    Base of the response objects that are sent as JSON.
+
+    `to_dict` is written by hand for every response instead of relying
+    on `dataclasses.asdict`, which deep-copies every value.
+    """
+
+    __slots__ = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the response as a JSON compatible dictionary."""
+        raise NotImplementedError
+
+    def to_json(self) -> bytes:
+        """Returns the response encoded with `aioauth.encoders.dumps`."""
+        return dumps(self.to_dict())
+
+
+@add_slots
 @dataclass
-class ErrorResponse:
+class ErrorResponse(JSONResponse):
     """Response for errors."""
 
     error: ErrorType
     description: str
     error_uri: str = ""
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "error": self.error,
+            "description": self.description,
+            "error_uri": self.error_uri,
+        }
+
 
+@add_slots
 @dataclass
-class AuthorizationCodeResponse:
+class AuthorizationCodeResponse(JSONResponse):
     """Response for `authorization_code`.
 
     Used by `aioauth.response_type.ResponseTypeAuthorizationCode`.
@@ -33,17 +63,25 @@ class AuthorizationCodeResponse:
     code: str
     scope: str
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {"code": self.code, "scope": self.scope}
+
 
+@add_slots
 @dataclass
-class NoneResponse:
+class NoneResponse(JSONResponse):
     """Response for `aioauth.response_type.ResponseTypeNone`.
 
     See: [OAuth v2 multiple response types](https://openid.net/specs/oauth-v2-multiple-response-types-1_0.html#none),
     """
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {}
 
+
+@add_slots
 @dataclass
-class TokenResponse:
+class TokenResponse(JSONResponse):
     """Response for valid token.
 
     Used by `aioauth.response_type.ResponseTypeToken`.
@@ -56,9 +94,20 @@ class TokenResponse:
     refresh_token: Optional[str] = None
     token_type: str = "Bearer"
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "expires_in": self.expires_in,
+            "access_token": self.access_token,
+            "scope": self.scope,
+            "refresh_token_expires_in": self.refresh_token_expires_in,
+            "refresh_token": self.refresh_token,
+            "token_type": self.token_type,
+        }
+
 
+@add_slots
 @dataclass
-class IdTokenResponse:
+class IdTokenResponse(JSONResponse):
     """Response for OpenID id_token.
 
     Used by `aioauth.response_type.ResponseResponseTypeIdTokenTypeToken`.
@@ -66,9 +115,13 @@ class IdTokenResponse:
 
     id_token: str
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id_token": self.id_token}
+
 
+@add_slots
 @dataclass
-class TokenActiveIntrospectionResponse:
+class TokenActiveIntrospectionResponse(JSONResponse):
     """Response for a valid access token.
 
     Used by `aioauth.server.AuthorizationServer.create_token_introspection_response`.
@@ -80,9 +133,19 @@ class TokenActiveIntrospectionResponse:
     expires_in: int
     active: bool = True
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "scope": self.scope,
+            "client_id": self.client_id,
+            "token_type": self.token_type,
+            "expires_in": self.expires_in,
+            "active": self.active,
+        }
 
+
+@add_slots
 @dataclass
-class TokenInactiveIntrospectionResponse:
+class TokenInactiveIntrospectionResponse(JSONResponse):
     """For an invalid, revoked or expired token.
 
     Used by `aioauth.server.AuthorizationServer.create_token_introspection_response`.
@@ -90,7 +153,30 @@ class TokenInactiveIntrospectionResponse:
 
     active: bool = False
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {"active": self.active}
+
 
+@add_slots
+@dataclass
+class TokenBatchIntrospectionResponse(JSONResponse):
+    """Response for several tokens at once.
+
+    Contains an introspection result per requested token, in the order
+    the tokens were sent.
+
+    Used by `aioauth.server.AuthorizationServer.create_batch_token_introspection_response`.
+    """
+
+    tokens: List[
+        Union[TokenActiveIntrospectionResponse, TokenInactiveIntrospectionResponse]
+    ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"tokens": [token.to_dict() for token in self.tokens]}
+
+
+@add_slots
 @dataclass
 class Response:
     """General response class.
@@ -103,3 +189,18 @@ class Response:
     headers: HTTPHeaderDict = field(
         default_factory=lambda: default_headers
     )  # pragma: no cover
+    body: Optional[bytes] = None
+    """
+    Pre-encoded body. When set, it is sent instead of the JSON encoded
+    `content`.
+    """
+
+    def render(self) -> bytes:
+        """
+        Returns the body to send: `body` if it is set, otherwise the
+        `content` encoded with `aioauth.encoders.dumps`, or an empty
+        body if there is no content.
+        """
+        if self.body is not None:
+            return self.body
+        return dumps(self.content) if self.content else b""
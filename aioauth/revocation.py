@@ -0,0 +1,384 @@
+"""
+Filters of revoked access tokens, kept in process or shared by the
+processes of a host.
+```python
+from aioauth import revocation
+```
+"""
+
+from contextlib import contextmanager
+import hashlib
+import math
+import mmap
+import os
+import struct
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+
+class BloomFilter:
+    """
+    Fixed-size set of byte strings that may report false positives but
+    no false negatives.
+
+    Args:
+        capacity: Number of items the filter is sized for.
+        error_rate: Rate of false positives once `capacity` items are
+            added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate in (0, 1).")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: bytes) -> Iterable[int]:
+        # Double hashing: two independent 64 bit halves of one digest.
+        digest = hashlib.blake2b(item, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item: bytes) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: bytes) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class RevocationSet:
+    """
+    Tracks the access tokens revoked by this process until they expire.
+
+    Self-contained access tokens, see
+    `aioauth.tokens.SignedTokenGenerator`, are validated without the
+    storage, which leaves `aioauth.storage.TokenStorage.is_token_revoked`
+    as the only lookup of an introspection. When a revocation set is
+    passed to `aioauth.server.AuthorizationServer`, tokens revoked by
+    `revoke_token` and the access tokens replaced by the
+    `refresh_token` grant are added to it, and introspection only asks
+    the storage about tokens the set may contain. Every other token is
+    answered from memory.
+
+    A new set knows nothing about the tokens revoked before the process
+    started. Until it is complete, see `is_complete`, introspection
+    asks the storage about every token. The set is complete once
+    `load` has seeded it with the revoked tokens of the storage, which
+    `aioauth.server.AuthorizationServer.load_revocation_set` does at
+    startup, or once `max_token_lifetime` seconds have passed, after
+    which every token revoked earlier has expired.
+
+    Lookups only check a `BloomFilter`. The tokens themselves are kept
+    as 16 byte digests along with their expiry, to rebuild the filter
+    without them once they expired: expired tokens are dropped at most
+    every `prune_interval` seconds, so memory is bounded by the number
+    of tokens revoked within their lifetime. The filter doubles in size
+    when more than `capacity` tokens are tracked.
+
+    Example:
+        ```python
+        from aioauth.revocation import RevocationSet
+
+        server = AuthorizationServer(
+            storage,
+            token_generator=SignedTokenGenerator(key_ring),
+            revocation_set=RevocationSet(capacity=100_000),
+        )
+        await server.load_revocation_set()
+        ```
+
+    Warning:
+        After `load`, the set only learns about revocations made by
+        this process. Use `aioauth.revocation.SharedRevocationSet` when
+        the server runs in several worker processes. Revocations made
+        on another host after the set was loaded are never seen: such
+        tokens stay active on this host until they expire or the set
+        is loaded again after a restart. With several hosts, only use
+        a revocation set if that delay is acceptable. The set is also
+        fed access tokens
+        returned by the storage, so `aioauth.server.AuthorizationServer`
+        refuses it along with an `aioauth.storage.hashing.HashingStorage`,
+        which returns digests.
+
+    Args:
+        capacity: Number of revoked tokens the filter is sized for.
+        error_rate: Rate of false positives, that is of introspections
+            still asking the storage, at `capacity` tokens.
+        prune_interval: Minimum seconds between two prunes.
+        clock: Time source, in seconds since the epoch.
+        max_token_lifetime: Maximum lifetime of access tokens in
+            seconds, usually `aioauth.config.Settings.TOKEN_EXPIRES_IN`.
+            Without it, the set is only complete once loaded.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 10_000,
+        error_rate: float = 0.001,
+        prune_interval: float = 60.0,
+        clock: Callable[[], float] = time.time,
+        max_token_lifetime: Optional[float] = None,
+    ):
+        self.error_rate = error_rate
+        self.prune_interval = prune_interval
+        self.clock = clock
+        self.filter = BloomFilter(capacity, error_rate)
+        self._expires_at: Dict[bytes, float] = {}
+        self._next_prune = clock() + prune_interval
+        self._complete_at = (
+            math.inf if max_token_lifetime is None else clock() + max_token_lifetime
+        )
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        """Returns the key `token` is tracked by."""
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def __len__(self) -> int:
+        return len(self._expires_at)
+
+    def add(self, token: str, expires_at: float) -> None:
+        """Adds `token`, revoked until `expires_at`."""
+        now = self.clock()
+        if expires_at <= now:
+            return
+        if now >= self._next_prune:
+            self.prune()
+
+        key = self.digest(token)
+        self._expires_at[key] = max(expires_at, self._expires_at.get(key, 0))
+        self.filter.add(key)
+        if len(self._expires_at) > self.filter.capacity:
+            self._rebuild(self.filter.capacity * 2)
+
+    def load(self, tokens: Iterable[Tuple[str, float]]) -> None:
+        """
+        Adds the revoked `(token, expires_at)` pairs of the storage and
+        marks the set complete.
+        """
+        for token, expires_at in tokens:
+            self.add(token, expires_at)
+        self._complete_at = -math.inf
+
+    def is_complete(self) -> bool:
+        """
+        Returns whether every token revoked and not yet expired is
+        known, that is whether `might_contain` can be trusted.
+        """
+        return self.clock() >= self._complete_at
+
+    def might_contain(self, token: str) -> bool:
+        """
+        Returns whether `token` may have been revoked. `False` means
+        it has not been revoked by this process, `True` is wrong at
+        the `error_rate`.
+        """
+        return self.digest(token) in self.filter
+
+    def prune(self) -> int:
+        """Drops expired tokens and returns how many were dropped."""
+        now = self.clock()
+        self._next_prune = now + self.prune_interval
+        expired = [key for key, at in self._expires_at.items() if at <= now]
+        for key in expired:
+            del self._expires_at[key]
+        if expired:
+            self._rebuild(self.filter.capacity)
+        return len(expired)
+
+    def _rebuild(self, capacity: int) -> None:
+        self.filter = BloomFilter(capacity, self.error_rate)
+        for key in self._expires_at:
+            self.filter.add(key)
+
+
+@contextmanager
+def _locked(fd: int) -> Iterator[None]:
+    # Not available on Windows, hence imported on use.
+    import fcntl
+
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class SharedRevocationSet(RevocationSet):
+    """
+    `aioauth.revocation.RevocationSet` shared by the processes of a
+    host through a local file.
+
+    Revocations are appended to the file at `path` as fixed-size
+    records of a token digest and its expiry, under an exclusive
+    `flock`. Each process maps the file in memory and, before every
+    lookup, indexes the records appended since its last lookup in its
+    own filter, so a revocation is seen by all workers on their next
+    introspection, without any network service.
+
+    Once the file holds more than twice as many records as there are
+    unexpired revocations, the next prune rewrites it with the live
+    records only and atomically replaces it. The other processes notice
+    the new file and index it from the start.
+
+    Example:
+        ```python
+        from aioauth.revocation import SharedRevocationSet
+
+        # In every worker process:
+        server = AuthorizationServer(
+            storage,
+            token_generator=SignedTokenGenerator(key_ring),
+            revocation_set=SharedRevocationSet("/run/aioauth/revoked"),
+        )
+        ```
+
+    Note:
+        File locking relies on `fcntl`, which is not available on
+        Windows. The file must be on a local filesystem.
+
+    Args:
+        path: Path of the file, created if it does not exist.
+        capacity: Number of revoked tokens the filter is sized for.
+        error_rate: Rate of false positives at `capacity` tokens.
+        prune_interval: Minimum seconds between two prunes.
+        clock: Time source, in seconds since the epoch.
+        max_token_lifetime: Maximum lifetime of access tokens in
+            seconds. Without it, the set is only complete once loaded.
+    """
+
+    record = struct.Struct("<16sd")
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int = 10_000,
+        error_rate: float = 0.001,
+        prune_interval: float = 60.0,
+        clock: Callable[[], float] = time.time,
+        max_token_lifetime: Optional[float] = None,
+    ):
+        super().__init__(
+            capacity, error_rate, prune_interval, clock, max_token_lifetime
+        )
+        self.path = path
+        self._fd = -1
+        self._map: Optional[mmap.mmap] = None
+        self._offset = 0
+        self._open()
+
+    def _open(self) -> None:
+        self.close()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o600)
+        self._offset = 0
+        self._expires_at.clear()
+        self._rebuild(self.filter.capacity)
+
+    def close(self) -> None:
+        """Closes the file. The set must not be used afterwards."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _is_replaced(self) -> bool:
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._fd).st_ino
+        except FileNotFoundError:
+            return True
+
+    def sync(self) -> None:
+        """Indexes the records appended to the file by any process."""
+        if self._is_replaced():
+            self._open()
+
+        size = os.fstat(self._fd).st_size
+        size -= size % self.record.size
+        if size <= self._offset:
+            return
+        if self._map is None or len(self._map) < size:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._fd, size, access=mmap.ACCESS_READ)
+
+        now = self.clock()
+        for key, expires_at in self.record.iter_unpack(self._map[self._offset : size]):
+            if expires_at > now:
+                self._expires_at[key] = max(expires_at, self._expires_at.get(key, 0))
+                self.filter.add(key)
+        self._offset = size
+        if len(self._expires_at) > self.filter.capacity:
+            self._rebuild(self.filter.capacity * 2)
+
+    def add(self, token: str, expires_at: float) -> None:
+        self._append([(token, expires_at)])
+
+    def load(self, tokens: Iterable[Tuple[str, float]]) -> None:
+        # Every process loads the same tokens, the duplicate records are
+        # dropped by the next compaction.
+        self._append(tokens)
+        self._complete_at = -math.inf
+
+    def _append(self, tokens: Iterable[Tuple[str, float]]) -> None:
+        now = self.clock()
+        data = b"".join(
+            self.record.pack(self.digest(token), expires_at)
+            for token, expires_at in tokens
+            if expires_at > now
+        )
+        if not data:
+            return
+        while True:
+            with _locked(self._fd):
+                # The file may have been compacted while waiting for the lock.
+                if not self._is_replaced():
+                    os.write(self._fd, data)
+                    break
+            self._open()
+        self.sync()
+        if self.clock() >= self._next_prune:
+            self.prune()
+
+    def might_contain(self, token: str) -> bool:
+        self.sync()
+        return super().might_contain(token)
+
+    def prune(self) -> int:
+        self.sync()
+        pruned = super().prune()
+        if self._offset // self.record.size > 2 * len(self._expires_at) + 64:
+            self._compact()
+        return pruned
+
+    def _compact(self) -> None:
+        with _locked(self._fd):
+            if self._is_replaced():
+                return
+            self.sync()
+            now = self.clock()
+            data = b"".join(
+                self.record.pack(key, expires_at)
+                for key, expires_at in self._expires_at.items()
+                if expires_at > now
+            )
+            temporary = f"{self.path}.{os.getpid()}"
+            fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+            os.replace(temporary, self.path)
+        self._open()
+        self.sync()
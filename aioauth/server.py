@@ -15,13 +15,30 @@ from aioauth import server
 ```
 """
 
-from dataclasses import asdict, dataclass
+import asyncio
+from dataclasses import dataclass
 from http import HTTPStatus
-from typing import Dict, List, Optional, Tuple, Type, Union, get_args, Set
+from typing import (
+    Any,
+    Collection,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    get_args,
+    Set,
+)
 
-from .models import Client
+from .metrics import Instrumentation, InstrumentedStorage
+from .models import Client, Token
 from .requests import Request
+from .revocation import RevocationSet
 from .storage import BaseStorage
+from .storage.hashing import HashingStorage
+from .storage.proxy import unwrap
+from .tokens import TokenGenerator
 
 
 from .collections import HTTPHeaderDict
@@ -55,6 +72,7 @@ from .response_type import (
 from .responses import (
     Response,
     TokenActiveIntrospectionResponse,
+    TokenBatchIntrospectionResponse,
     TokenInactiveIntrospectionResponse,
 )
 from .types import (
@@ -132,8 +150,23 @@ class AuthorizationServer:
         storage: BaseStorage,
         response_types: Optional[Dict] = None,
         grant_types: Optional[Dict] = None,
+        token_generator: Optional[TokenGenerator] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        revocation_set: Optional[RevocationSet] = None,
     ):
+        self.instrumentation = instrumentation or Instrumentation()
+        if self.instrumentation.enabled:
+            storage = InstrumentedStorage(storage, self.instrumentation)
+
+        if revocation_set is not None and any(
+            isinstance(wrapped, HashingStorage) for wrapped in unwrap(storage)
+        ):
+            # The storage would feed the set digests it cannot match.
+            raise ValueError("revocation_set cannot be used with a HashingStorage.")
+
         self.storage = storage
+        self.token_generator = token_generator or TokenGenerator()
+        self.revocation_set = revocation_set
 
         if response_types is not None:
             self.response_types = response_types
@@ -141,6 +174,24 @@ class AuthorizationServer:
         if grant_types is not None:
             self.grant_types = grant_types
 
+    async def load_revocation_set(self) -> None:
+        """
+        Seeds the revocation set with the revoked access tokens of the
+        storage, see `aioauth.revocation.RevocationSet.load`.
+
+        Note:
+            Call it once at startup, before serving requests. Until
+            then, introspection asks the storage whether each token was
+            revoked. The storage must implement
+            `aioauth.storage.BaseStorage.get_revoked_tokens`.
+        """
+        if self.revocation_set is None:
+            raise ValueError("The server has no revocation_set.")
+        tokens = await self.storage.get_revoked_tokens()
+        self.revocation_set.load(
+            (token.access_token, token.issued_at + token.expires_in) for token in tokens
+        )
+
     def is_secure_transport(self, request: Request) -> bool:
         """
         Verifies the request was sent via a protected SSL tunnel.
@@ -171,7 +222,12 @@ class AuthorizationServer:
 
         return True
 
-    def validate_request(self, request: Request, allowed_methods: List[RequestMethod]):
+    def validate_request(
+        self,
+        request: Request,
+        allowed_methods: List[RequestMethod],
+        allow_repeated: Collection[str] = (),
+    ):
         if not request.settings.AVAILABLE:
             raise TemporarilyUnavailableError(request=request)
 
@@ -184,6 +240,13 @@ class AuthorizationServer:
             )
             raise MethodNotAllowedError(request=request, headers=headers)
 
+        repeated = request.repeated_parameter(allow_repeated)
+        if repeated is not None:
+            # RFC6749 section 3.1: parameters must not be repeated.
+            raise InvalidRequestError(
+                request=request, description=f"Repeated parameter {repeated}."
+            )
+
     @catch_errors_and_unavailability()
     async def create_token_introspection_response(self, request: Request) -> Response:
         """
@@ -218,57 +281,242 @@ class AuthorizationServer:
             response: An `aioauth.responses.Response` object.
         """
         self.validate_request(request, ["POST"])
-        client_id, client_secret = self.get_client_credentials(
-            request, secret_required=True
+        client_id = await self._authenticate_client(
+            request, "create_token_introspection_response", secret_required=True
         )
 
-        client = await self.storage.get_client(
-            request=request, client_id=client_id, client_secret=client_secret
+        token_response: Union[
+            TokenActiveIntrospectionResponse, TokenInactiveIntrospectionResponse
+        ]
+
+        claims = (
+            self.token_generator.decode_access_token(request.post.token)
+            if request.post.token
+            else None
         )
 
-        if not client:
-            raise InvalidClientError(request)
+        if request.post.token and not self.token_generator.is_well_formed(
+            request.post.token
+        ):
+            # Not issued by this server, no need to look it up.
+            token_response = TokenInactiveIntrospectionResponse()
+        elif claims is not None:
+            # Self-contained access token, the storage is only needed
+            # to find out whether it was revoked.
+            assert request.post.token is not None
+            token_response = await self._get_claims_introspection_response(
+                request, client_id, request.post.token, claims
+            )
+        else:
+            token_type = self._get_introspection_token_type(request, request.post.token)
 
-        token_types: Tuple[TokenType, ...] = get_args(TokenType)
-        token_type: TokenType = "refresh_token"
+            access_token = None
+            refresh_token = request.post.token
 
-        access_token = None
-        refresh_token = request.post.token
+            if token_type == "access_token":  # nosec
+                access_token = request.post.token
+                refresh_token = None
 
-        if request.post.token_type_hint in token_types:
-            token_type = request.post.token_type_hint
+            token = await self.storage.get_token(
+                request=request,
+                client_id=client_id,
+                access_token=access_token,
+                refresh_token=refresh_token,
+                token_type=token_type,
+            )
+            token_response = self._get_introspection_response(token)
 
-        if token_type == "access_token":  # nosec
-            access_token = request.post.token
-            refresh_token = None
+        content = token_response.to_dict()
 
-        token = await self.storage.get_token(
-            request=request,
-            client_id=client_id,
-            access_token=access_token,
-            refresh_token=refresh_token,
-            token_type=token_type,
+        return Response(
+            content=content, status_code=HTTPStatus.OK, headers=default_headers
         )
 
-        token_response: Union[
-            TokenInactiveIntrospectionResponse, TokenActiveIntrospectionResponse
+    @catch_errors_and_unavailability()
+    async def create_batch_token_introspection_response(
+        self, request: Request
+    ) -> Response:
+        """
+        Returns a response object with introspection of several tokens
+        at once.
+
+        The client is authenticated once for the whole batch and the
+        tokens passed in `request.post.tokens` are resolved with a
+        single `aioauth.storage.TokenStorage.get_tokens` call per token
+        type. The `token_type_hint` applies to every token; without it
+        the type of each token is told by
+        `aioauth.tokens.TokenGenerator.get_token_type`. The response contains
+        an [RFC7662 section 2.2](https://tools.ietf.org/html/rfc7662#section-2.2)
+        introspection result per token, in the order the tokens were
+        sent:
+
+        ```json
+        {"tokens": [{"active": true, ...}, {"active": false}]}
+        ```
+
+        Note:
+            Batch introspection is not part of RFC7662, it is meant for
+            trusted callers such as API gateways. The number of tokens
+            per request is limited by
+            `aioauth.config.Settings.INTROSPECTION_BATCH_MAX_SIZE`.
+
+        Args:
+            request: An `aioauth.requests.Request` object.
+
+        Returns:
+            response: An `aioauth.responses.Response` object.
+        """
+        # Each token of the batch is sent as a `token` parameter.
+        self.validate_request(request, ["POST"], allow_repeated={"token"})
+        client_id = await self._authenticate_client(
+            request, "create_batch_token_introspection_response", secret_required=True
+        )
+
+        if not request.post.tokens:
+            raise InvalidRequestError(
+                request=request, description="Request is missing tokens."
+            )
+
+        if len(request.post.tokens) > request.settings.INTROSPECTION_BATCH_MAX_SIZE:
+            raise InvalidRequestError(
+                request=request, description="Request contains too many tokens."
+            )
+
+        claims = [
+            self.token_generator.decode_access_token(token)
+            for token in request.post.tokens
+        ]
+        opaque_tokens = [
+            token
+            for token, token_claims in zip(request.post.tokens, claims)
+            if token_claims is None
         ]
+        well_formed = [
+            index
+            for index, token in enumerate(opaque_tokens)
+            if self.token_generator.is_well_formed(token)
+        ]
+
+        # One lookup per token type, a single one when a hint is given.
+        groups: Dict[TokenType, List[int]] = {}
+        for index in well_formed:
+            token = opaque_tokens[index]
+            token_type = self._get_introspection_token_type(request, token)
+            groups.setdefault(token_type, []).append(index)
+        found: List[Optional[Token]] = [None] * len(opaque_tokens)
+        for (token_type, indexes), group in zip(
+            groups.items(),
+            await asyncio.gather(
+                *(
+                    self.storage.get_tokens(
+                        request=request,
+                        client_id=client_id,
+                        tokens=[opaque_tokens[index] for index in indexes],
+                        token_type=token_type,
+                    )
+                    for token_type, indexes in groups.items()
+                )
+            ),
+        ):
+            for index, stored_token in zip(indexes, group):
+                found[index] = stored_token
+        stored_tokens = iter(found)
+        claims_responses = iter(
+            await asyncio.gather(
+                *(
+                    self._get_claims_introspection_response(
+                        request, client_id, token, token_claims
+                    )
+                    for token, token_claims in zip(request.post.tokens, claims)
+                    if token_claims is not None
+                )
+            )
+        )
+
+        content = TokenBatchIntrospectionResponse(
+            tokens=[
+                (
+                    self._get_introspection_response(next(stored_tokens))
+                    if token_claims is None
+                    else next(claims_responses)
+                )
+                for token_claims in claims
+            ]
+        ).to_dict()
+
+        return Response(
+            content=content, status_code=HTTPStatus.OK, headers=default_headers
+        )
+
+    def _get_introspection_token_type(
+        self, request: Request, token: Optional[str]
+    ) -> TokenType:
+        token_types: Tuple[TokenType, ...] = get_args(TokenType)
+
+        if request.post.token_type_hint in token_types:
+            return request.post.token_type_hint
+
+        # Without a hint, the token may tell its own type, see
+        # `aioauth.tokens.StructuredTokenGenerator`.
+        token_type = self.token_generator.get_token_type(token) if token else None
+        return token_type or "refresh_token"
+
+    async def _get_claims_introspection_response(
+        self,
+        request: Request,
+        client_id: str,
+        access_token: str,
+        claims: Dict[str, Any],
+    ) -> Union[TokenActiveIntrospectionResponse, TokenInactiveIntrospectionResponse]:
+        if claims.get("client_id") != client_id:
+            return TokenInactiveIntrospectionResponse()
+
+        # Tokens a complete revocation set does not know cannot have
+        # been revoked.
+        if (
+            self.revocation_set is None
+            or not self.revocation_set.is_complete()
+            or self.revocation_set.might_contain(access_token)
+        ) and await self.storage.is_token_revoked(
+            request=request, client_id=client_id, access_token=access_token
+        ):
+            return TokenInactiveIntrospectionResponse()
+
+        return TokenActiveIntrospectionResponse(
+            scope=claims["scope"],
+            client_id=claims["client_id"],
+            expires_in=claims["exp"] - claims["iat"],
+            token_type="Bearer",
+        )
 
+    def _get_introspection_response(
+        self, token: Optional[Token]
+    ) -> Union[TokenActiveIntrospectionResponse, TokenInactiveIntrospectionResponse]:
         if token and not token.is_expired and not token.revoked:
-            token_response = TokenActiveIntrospectionResponse(
+            return TokenActiveIntrospectionResponse(
                 scope=token.scope,
                 client_id=token.client_id,
                 expires_in=token.expires_in,
                 token_type=token.token_type,
             )
-        else:
-            token_response = TokenInactiveIntrospectionResponse()
+        return TokenInactiveIntrospectionResponse()
+
+    async def _authenticate_client(
+        self, request: Request, endpoint: str, secret_required: bool
+    ) -> str:
+        with self.instrumentation.phase(endpoint, "authenticate_client"):
+            client_id, client_secret = self.get_client_credentials(
+                request, secret_required=secret_required
+            )
 
-        content = asdict(token_response)
+            client = await self.storage.get_client(
+                request=request, client_id=client_id, client_secret=client_secret
+            )
 
-        return Response(
-            content=content, status_code=HTTPStatus.OK, headers=default_headers
-        )
+        if not client:
+            raise InvalidClientError(request)
+
+        return client_id
 
     def get_client_credentials(
         self, request: Request, secret_required: bool
@@ -373,13 +621,21 @@ class AuthorizationServer:
             raise UnsupportedGrantTypeError(request=request) from exc
 
         grant_type = GrantTypeClass(
-            storage=self.storage, client_id=client_id, client_secret=client_secret
+            storage=self.storage,
+            client_id=client_id,
+            client_secret=client_secret,
+            token_generator=self.token_generator,
+            revocation_set=self.revocation_set,
         )
 
-        client = await grant_type.validate_request(request)
+        self.instrumentation.count_grant_type(request.post.grant_type)
+
+        with self.instrumentation.phase("create_token_response", "validate_request"):
+            client = await grant_type.validate_request(request)
 
-        response = await grant_type.create_token_response(request, client)
-        content = asdict(response)
+        with self.instrumentation.phase("create_token_response", "create_token"):
+            response = await grant_type.create_token_response(request, client)
+        content = response.to_dict()
 
         return Response(
             content=content, status_code=HTTPStatus.OK, headers=default_headers
@@ -454,10 +710,19 @@ class AuthorizationServer:
 
         auth_state = AuthorizationState(request, response_type_list, grants=[])
 
-        for ResponseTypeClass in response_type_classes:
-            response_type = ResponseTypeClass(storage=self.storage)
-            client = await response_type.validate_request(request)
-            auth_state.grants.append((response_type, client))
+        with self.instrumentation.phase(
+            "create_authorization_response", "validate_request"
+        ):
+            # The client is fetched by the first response type only, the
+            # others find it in `request.extra`.
+            for ResponseTypeClass in response_type_classes:
+                response_type = ResponseTypeClass(
+                    storage=self.storage, token_generator=self.token_generator
+                )
+                client = await response_type.validate_request(request)
+                auth_state.grants.append((response_type, client))
+
+        self.instrumentation.count_response_type(" ".join(sorted(response_type_list)))
         return auth_state
 
     async def finalize_authorization_response(
@@ -494,11 +759,20 @@ class AuthorizationServer:
         if state:
             responses["state"] = state
 
-        for response_type, client in auth_state.grants:
-            response = await response_type.create_authorization_response(
-                request, client
+        # The code, the token and the ID token of hybrid response types
+        # are independent of each other and are issued concurrently.
+        with self.instrumentation.phase(
+            "create_authorization_response", "create_grant"
+        ):
+            grant_responses = await asyncio.gather(
+                *(
+                    response_type.create_authorization_response(request, client)
+                    for response_type, client in auth_state.grants
+                )
             )
-            response_asdict = asdict(response)
+
+        for (response_type, _), response in zip(auth_state.grants, grant_responses):
+            response_asdict = response.to_dict()
             if (
                 isinstance(response_type, ResponseTypeToken)
                 and not request.settings.ISSUE_REFRESH_TOKEN_IMPLICIT_GRANT
@@ -626,17 +900,10 @@ class AuthorizationServer:
             response: An `aioauth.responses.Response` object.
         """
         self.validate_request(request, ["POST"])
-        client_id, client_secret = self.get_client_credentials(
-            request, secret_required=False
-        )
-
-        client = await self.storage.get_client(
-            request=request, client_id=client_id, client_secret=client_secret
+        client_id = await self._authenticate_client(
+            request, "revoke_token", secret_required=False
         )
 
-        if not client:
-            raise InvalidClientError(request)
-
         if not request.post.token:
             raise InvalidRequestError(
                 request=request, description="Request is missing token."
@@ -648,15 +915,19 @@ class AuthorizationServer:
         }:
             raise UnsupportedTokenTypeError(request=request)
 
+        if not self.token_generator.is_well_formed(request.post.token):
+            # Invalid tokens do not cause an error, see RFC7009 section 2.2.
+            return Response(status_code=HTTPStatus.NO_CONTENT)
+
+        token_type = (
+            request.post.token_type_hint
+            or self.token_generator.get_token_type(request.post.token)
+        )
         access_token = (
-            request.post.token
-            if request.post.token_type_hint != "refresh_token"  # nosec
-            else None
+            request.post.token if token_type != "refresh_token" else None  # nosec
         )
         refresh_token = (
-            request.post.token
-            if request.post.token_type_hint != "access_token"  # nosec
-            else None
+            request.post.token if token_type != "access_token" else None  # nosec
         )
 
         token = await self.storage.get_token(
@@ -664,7 +935,7 @@ class AuthorizationServer:
             client_id=client_id,
             access_token=access_token,
             refresh_token=refresh_token,
-            token_type=request.post.token_type_hint,
+            token_type=token_type,
         )
 
         if token:
@@ -673,7 +944,17 @@ class AuthorizationServer:
                 client_id=client_id,
                 access_token=access_token,
                 refresh_token=refresh_token,
-                token_type=request.post.token_type_hint,
+                token_type=token_type,
             )
+            if self.revocation_set is not None:
+                # Prefer the token sent by the client to the stored one.
+                self.revocation_set.add(
+                    (
+                        request.post.token
+                        if token_type == "access_token"
+                        else token.access_token
+                    ),
+                    token.issued_at + token.expires_in,
+                )
 
         return Response(status_code=HTTPStatus.NO_CONTENT)
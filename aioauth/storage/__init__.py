@@ -0,0 +1,583 @@
+"""
+Storage helper class for storing and retrieving client and resource
+owner information. See the examples on the sidebar to view this in
+action.
+```python
+from aioauth import storage
+```
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
+
+from ..compat import add_slots
+from ..models import AuthorizationCode, Client, Token
+from ..types import CodeChallengeMethod, TokenType
+
+from ..requests import Request
+
+
+@add_slots
+@dataclass
+class CreateTokenCall:
+    """The arguments of one `TokenStorage.create_token` call."""
+
+    request: Request
+    client_id: str
+    scope: str
+    access_token: str
+    refresh_token: Optional[str] = None
+
+
+@add_slots
+@dataclass
+class CreateAuthorizationCodeCall:
+    """
+    The arguments of one
+    `AuthorizationCodeStorage.create_authorization_code` call.
+    """
+
+    request: Request
+    client_id: str
+    scope: str
+    response_type: str
+    redirect_uri: str
+    code: str
+    code_challenge_method: Optional[CodeChallengeMethod] = None
+    code_challenge: Optional[str] = None
+    nonce: Optional[str] = None
+
+
+class TokenStorage:
+    async def create_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        access_token: str,
+        refresh_token: Optional[str] = None,
+    ) -> Token:
+        """Generates a user token and stores it in the database.
+
+        Used by:
+
+        * `ResponseTypeToken`
+        * `AuthorizationCodeGrantType`
+        * `PasswordGrantType`
+        * `ClientCredentialsGrantType`
+        * `RefreshTokenGrantType`
+
+        Warning:
+            Generated token *must* be stored in the database.
+        Note:
+            Method is used by all core grant types, but only used for
+            `aioauth.response_type.ResponseTypeToken`.
+        Args:
+            request: An `aioauth.requests.Request`.
+            client_id: A user client ID.
+            scope: The scopes for the token.
+        Returns:
+            The new generated `aioauth.models.Token`.
+        """
+        raise NotImplementedError("Method create_token must be implemented")
+
+    async def create_tokens(self, *, calls: List[CreateTokenCall]) -> List[Token]:
+        """Stores several tokens at once.
+
+        Note:
+            Method is used by `aioauth.storage.batching.BatchingStorage`
+            to write the tokens of concurrent requests together. The
+            default implementation calls `create_token` for every call
+            in turn. Override it to insert all tokens with one statement
+            and one commit.
+        Args:
+            calls: The arguments of the `create_token` calls.
+        Returns:
+            The new `aioauth.models.Token` of every call, in order.
+        """
+        return [
+            await self.create_token(
+                request=call.request,
+                client_id=call.client_id,
+                scope=call.scope,
+                access_token=call.access_token,
+                refresh_token=call.refresh_token,
+            )
+            for call in calls
+        ]
+
+    async def get_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        token_type: Optional[TokenType] = None,
+        access_token: Optional[str] = None,
+        refresh_token: Optional[str] = None,
+    ) -> Optional[Token]:
+        """Gets existing token from the database.
+
+        Note:
+            Method is used by
+            `aioauth.server.AuthorizationServer`,  and by the
+            grant type `aioauth.grant_types.RefreshTokenGrantType`.
+        Args:
+            request: An `aioauth.requests.Request`.
+            client_id: A user client ID.
+            access_token: The user access token.
+            refresh_token: The user refresh token.
+        Returns:
+            An optional `aioauth.models.Token` object.
+        """
+        raise NotImplementedError("Method get_token must be implemented")
+
+    async def get_tokens(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        tokens: List[str],
+        token_type: Optional[TokenType] = None,
+    ) -> List[Optional[Token]]:
+        """Gets several existing tokens from the database at once.
+
+        Note:
+            Method is used by
+            `aioauth.server.AuthorizationServer.create_batch_token_introspection_response`.
+            The default implementation calls `get_token` concurrently for
+            every token. Override it to resolve all tokens with a single
+            query.
+        Args:
+            request: An `aioauth.requests.Request`.
+            client_id: A user client ID.
+            tokens: The access or refresh tokens to look up.
+            token_type: Whether `tokens` are access or refresh tokens.
+        Returns:
+            A list with an optional `aioauth.models.Token` per element
+            of `tokens`, in the same order.
+        """
+        is_access_token = token_type == "access_token"  # nosec
+        return list(
+            await asyncio.gather(
+                *(
+                    self.get_token(
+                        request=request,
+                        client_id=client_id,
+                        token_type=token_type,
+                        access_token=token if is_access_token else None,
+                        refresh_token=None if is_access_token else token,
+                    )
+                    for token in tokens
+                )
+            )
+        )
+
+    async def is_token_revoked(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        access_token: str,
+    ) -> bool:
+        """Checks whether a self-contained access token has been revoked.
+
+        Note:
+            Method is used by `aioauth.server.AuthorizationServer` to
+            introspect access tokens that are validated by signature,
+            see `aioauth.tokens.SignedTokenGenerator`. The default
+            implementation looks the token up with `get_token`, override
+            it with a cheaper revocation lookup where possible.
+        Args:
+            request: An `aioauth.requests.Request`.
+            client_id: A user client ID.
+            access_token: The user access token.
+        Returns:
+            `True` if the token was revoked or is unknown.
+        """
+        token = await self.get_token(
+            request=request,
+            client_id=client_id,
+            token_type="access_token",
+            access_token=access_token,
+        )
+        return token is None or token.revoked
+
+    async def revoke_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        refresh_token: Optional[str] = None,
+        token_type: Optional[TokenType] = None,
+        access_token: Optional[str] = None,
+    ) -> None:
+        """Revokes a token from the database."""
+        raise NotImplementedError
+
+    async def rotate_refresh_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        refresh_token: str,
+        issue: Callable[[Token], Tuple[str, str, Optional[str]]],
+    ) -> Optional[Token]:
+        """Exchanges a refresh token for a new token in one operation.
+
+        The token with `refresh_token` is looked up, revoked if it is
+        still usable, and replaced with a new token whose scope, access
+        token and refresh token are returned by `issue(old_token)`.
+
+        Note:
+            Method is used by the grant type
+            `aioauth.grant_type.RefreshTokenGrantType`. The default
+            implementation calls `get_token`, `revoke_token` and
+            `create_token` in turn, so two concurrent refreshes with
+            the same token can both succeed. Override it to revoke the
+            old token with a conditional update, such that only one
+            refresh wins, and to save round trips to the database.
+        Args:
+            request: An `aioauth.requests.Request`.
+            client_id: A user client ID.
+            refresh_token: The refresh token to exchange.
+            issue: Returns the scope, access token and refresh token of
+                the new token, given the old token.
+        Returns:
+            The new `aioauth.models.Token`, or `None` if the refresh
+            token is unknown, revoked or expired.
+        """
+        old_token = await self.get_token(
+            request=request,
+            client_id=client_id,
+            refresh_token=refresh_token,
+            access_token=None,
+            token_type="refresh_token",
+        )
+        if not old_token or old_token.revoked or old_token.refresh_token_expired:
+            return None
+
+        await self.revoke_token(
+            request=request,
+            client_id=client_id,
+            refresh_token=old_token.refresh_token,
+            token_type="refresh_token",
+            access_token=None,
+        )
+
+        scope, access_token, new_refresh_token = issue(old_token)
+        return await self.create_token(
+            request=request,
+            client_id=client_id,
+            scope=scope,
+            access_token=access_token,
+            refresh_token=new_refresh_token,
+        )
+
+
+class AuthorizationCodeStorage:
+    async def create_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        response_type: str,
+        redirect_uri: str,
+        code: str,
+        code_challenge_method: Optional[CodeChallengeMethod] = None,
+        code_challenge: Optional[str] = None,
+        nonce: Optional[str] = None,
+    ) -> AuthorizationCode:
+        """Generates an authorization token and stores it in the database.
+
+        Warning:
+            Generated authorization token *must* be stored in the database.
+
+        Note:
+            This must is used by the response type
+            `aioauth.respose_type.ResponseTypeAuthorizationCode`.
+
+        Args:
+            request: An `aioauth.requests.Request`.
+            client_id: A user client ID.
+            scope: The scopes for the token.
+            response_type: An `aioauth.types.ResponseType`.
+            redirect_uri: The redirect URI.
+            code_challenge_method: An `aioauth.types.CodeChallengeMethod`.
+            code_challenge: Code challenge string.
+
+        Returns:
+            An `aioauth.models.AuthorizationCode` object.
+        """
+        raise NotImplementedError(
+            "Method create_authorization_code must be implemented"
+        )
+
+    async def create_authorization_codes(
+        self, *, calls: List[CreateAuthorizationCodeCall]
+    ) -> List[AuthorizationCode]:
+        """Stores several authorization codes at once.
+
+        Note:
+            Method is used by `aioauth.storage.batching.BatchingStorage`
+            to write the codes of concurrent requests together. The
+            default implementation calls `create_authorization_code` for
+            every call in turn. Override it to insert all codes with one
+            statement and one commit.
+        Args:
+            calls: The arguments of the `create_authorization_code` calls.
+        Returns:
+            The new `aioauth.models.AuthorizationCode` of every call, in
+            order.
+        """
+        return [
+            await self.create_authorization_code(
+                request=call.request,
+                client_id=call.client_id,
+                scope=call.scope,
+                response_type=call.response_type,
+                redirect_uri=call.redirect_uri,
+                code=call.code,
+                code_challenge_method=call.code_challenge_method,
+                code_challenge=call.code_challenge,
+                nonce=call.nonce,
+            )
+            for call in calls
+        ]
+
+    async def get_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+    ) -> Optional[AuthorizationCode]:
+        """Gets existing authorization code from the database if it exists.
+
+        Warning:
+            If authorization code does not exists this function *must*
+            return ``None`` to indicate to the validator that the
+            requested authorization code does not exist or is invalid.
+
+        Note:
+            This method is used by the grant type
+            `aioauth.grant_type.AuthorizationCodeGrantType`.
+
+        Args:
+            request: An `aioauth.requests.Request`.
+            client_id: A user client ID.
+            code: An authorization code.
+
+        Returns:
+            An optional `aioauth.models.AuthorizationCode`.
+        """
+        raise NotImplementedError(
+            "Method get_authorization_code must be implemented for AuthorizationCodeGrantType"
+        )
+
+    async def delete_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+    ) -> None:
+        """Deletes authorization code from database.
+
+        Note:
+            This method is used by the default implementation of
+            `consume_authorization_code`.
+
+        Args:
+            request: An `aioauth.requests.Request`.
+            client_id: A user client ID.
+            code: An authorization code.
+        """
+        raise NotImplementedError(
+            "Method delete_authorization_code must be implemented for AuthorizationCodeGrantType"
+        )
+
+    async def consume_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+        check: Optional[Callable[[AuthorizationCode], None]] = None,
+    ) -> Optional[AuthorizationCode]:
+        """Gets an authorization code and deletes it from the database,
+        unless `check` raises.
+
+        Note:
+            Method is used by the grant type
+            `aioauth.grant_type.AuthorizationCodeGrantType`, whose
+            `check` raises when the PKCE verifier is wrong or the code
+            expired, so that a rejected token request does not use up
+            the code. The default implementation calls
+            `get_authorization_code`, `check` and then
+            `delete_authorization_code`, so the same code can be
+            redeemed by two concurrent requests. Override it to fetch
+            and delete the code in a single statement, such that each
+            code is returned at most once. The deletion may also be
+            undone when `check` raises, by rolling back the transaction
+            the exception propagates through.
+        Args:
+            request: An `aioauth.requests.Request`.
+            client_id: A user client ID.
+            code: An authorization code.
+            check: Called with the code before it is deleted. The code
+                is kept when it raises, and the exception propagates.
+        Returns:
+            The deleted `aioauth.models.AuthorizationCode`, or `None` if
+            there was no such code.
+        """
+        authorization_code = await self.get_authorization_code(
+            request=request, client_id=client_id, code=code
+        )
+        if authorization_code is not None:
+            if check is not None:
+                check(authorization_code)
+            await self.delete_authorization_code(
+                request=request, client_id=client_id, code=code
+            )
+        return authorization_code
+
+
+class ClientStorage:
+    async def get_client(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        client_secret: Optional[str] = None,
+    ) -> Optional[Client]:
+        """Gets existing client from the database if it exists.
+
+        Warning:
+            If client does not exists in database this method *must*
+            return `None` to indicate to the validator that the
+            requested `client_id` does not exist or is invalid.
+
+        Note:
+            This method is used by all core grant types, as well as
+            all core response types.
+
+        Args:
+            request: An `aioauth.requests.Request`.
+            client_id: A user client ID.
+            client_secret: An optional user client secret.
+
+        Returns:
+            An optional `aioauth.models.Client` object.
+        """
+        raise NotImplementedError("Method get_client must be implemented")
+
+
+class UserStorage:
+    async def get_user(self, request: Request) -> Optional[Any]:
+        """Returns a user.
+
+        Note:
+            This method is used by the grant type
+            `aioauth.grant_type.PasswordGrantType`.
+
+        Args:
+            request: An `aioauth.requests.Request`.
+
+        Returns:
+            Boolean indicating whether or not the user was authenticated
+            successfully.
+        """
+        raise NotImplementedError("Method get_user must be implemented")
+
+
+class IDTokenStorage:
+    async def get_id_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        redirect_uri: str,
+        response_type: Optional[str] = None,
+        nonce: Optional[str] = None,
+    ) -> str:
+        """Returns an id_token.
+        For more information see [OpenID Connect Core 1.0 incorporating errata set 1 section 2](https://openid.net/specs/openid-connect-core-1_0.html#IDToken).
+
+        Note:
+            Method is used by response type `aioauth.response_type.ResponseTypeIdToken`
+            and `aioauth.oidc.core.grant_type.AuthorizationCodeGrantType`.
+        """
+        raise NotImplementedError("get_id_token must be implemented.")
+
+
+class BaseStorage(
+    TokenStorage,
+    AuthorizationCodeStorage,
+    ClientStorage,
+    UserStorage,
+    IDTokenStorage,
+):
+    @asynccontextmanager
+    async def transaction(self, request: Request) -> AsyncIterator[Any]:
+        """Runs the storage calls made for `request` in one transaction.
+
+        Note:
+            The endpoints of `aioauth.server.AuthorizationServer` run
+            inside it, and roll it back when their response is an
+            error. The default implementation does nothing, so that
+            every call runs on its own. Storages wrapping others
+            forward it to the storage they wrap.
+
+        Args:
+            request: An `aioauth.requests.Request`.
+        """
+        yield None
+
+    async def purge_expired(
+        self,
+        *,
+        before: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> int:
+        """Deletes expired tokens and authorization codes from the database.
+
+        A token can be deleted once both its access token and its refresh
+        token expired before `before`, an authorization code once it
+        expired before `before`.
+
+        Note:
+            This method is optional. It is used by
+            `aioauth.sweeper.ExpirySweeper` to keep the database from
+            growing without bound.
+
+        Args:
+            before: Unix timestamp. Defaults to the current time.
+            limit: Maximum number of rows to delete in this call.
+
+        Returns:
+            The number of deleted rows.
+        """
+        raise NotImplementedError("Method purge_expired must be implemented")
+
+    async def get_revoked_tokens(self, *, at: Optional[int] = None) -> List[Token]:
+        """Gets the revoked tokens whose access token is not expired.
+
+        Note:
+            This method is optional. It is used by
+            `aioauth.server.AuthorizationServer.load_revocation_set` to
+            seed an `aioauth.revocation.RevocationSet` with the tokens
+            revoked before the process started, or by other processes.
+
+        Args:
+            at: Unix timestamp. Defaults to the current time.
+
+        Returns:
+            The revoked `aioauth.models.Token` objects whose access
+            token expires after `at`.
+        """
+        raise NotImplementedError("Method get_revoked_tokens must be implemented")
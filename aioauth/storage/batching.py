@@ -0,0 +1,202 @@
+"""
+Group commit of token and authorization code writes.
+```python
+from aioauth.storage import batching
+```
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Generic, List, Optional, Tuple, TypeVar
+
+from ..models import AuthorizationCode, Token
+from ..requests import Request
+from ..types import CodeChallengeMethod
+from . import BaseStorage, CreateAuthorizationCodeCall, CreateTokenCall
+from .proxy import ProxyStorage
+
+C = TypeVar("C")
+R = TypeVar("R")
+
+
+class _Batch(Generic[C, R]):
+    """Calls waiting to be written together by `write`."""
+
+    def __init__(
+        self,
+        write: Callable[[List[C]], Awaitable[List[R]]],
+        max_size: int,
+        max_delay: float,
+    ):
+        self.write = write
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.pending: List[Tuple[C, "asyncio.Future[R]"]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.flushes: "set[asyncio.Task[None]]" = set()
+
+    async def submit(self, call: C) -> R:
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[R]" = loop.create_future()
+        self.pending.append((call, future))
+
+        if len(self.pending) >= self.max_size:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.max_delay, self.flush)
+
+        # The write goes ahead even if the caller is cancelled.
+        return await asyncio.shield(future)
+
+    def flush(self) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+        task = asyncio.ensure_future(self._write(pending))
+        self.flushes.add(task)
+        task.add_done_callback(self.flushes.discard)
+
+    async def _write(self, pending: List[Tuple[C, "asyncio.Future[R]"]]) -> None:
+        try:
+            results = await self.write([call for call, _ in pending])
+            if len(results) != len(pending):
+                # Callers left without a row would wait forever.
+                raise RuntimeError(
+                    f"Bulk write returned {len(results)} rows "
+                    f"for {len(pending)} calls"
+                )
+        except BaseException as exc:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(exc)
+            if not isinstance(exc, Exception):
+                raise
+            return
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def wait(self) -> None:
+        self.flush()
+        if self.flushes:
+            await asyncio.wait(list(self.flushes))
+
+
+class BatchingStorage(ProxyStorage):
+    """
+    Storage wrapper that writes the tokens and authorization codes of
+    concurrent requests together.
+
+    `create_token` and `create_authorization_code` calls are queued
+    for up to `max_delay` seconds, or until `max_size` calls are
+    queued, and then written with a single
+    `aioauth.storage.TokenStorage.create_tokens` or
+    `aioauth.storage.AuthorizationCodeStorage.create_authorization_codes`
+    call. Each caller gets its row once that bulk write has returned,
+    that is after the wrapped storage committed it.
+    Under write-heavy load this replaces one commit per request with
+    one commit per batch, at the cost of up to `max_delay` seconds of
+    latency per write. The wrapped storage must implement the bulk
+    methods with a single write for batching to pay off, see
+    `aioauth.storage.sql.SQLStorage`.
+
+    Example:
+        ```python
+        from aioauth.storage.batching import BatchingStorage
+
+        storage = BatchingStorage(Storage(), max_delay=0.002, max_size=128)
+        server = AuthorizationServer(storage=storage)
+
+        # On shutdown:
+        await storage.flush()
+        ```
+
+    Warning:
+        Batched rows are written outside the transaction of the request
+        that created them, for instance
+        `aioauth.storage.sql.SQLStorage.transaction`: they are committed
+        even if the request is rolled back. Do not batch the writes of
+        databases locked as a whole by a writing transaction, such as
+        SQLite, where the bulk write waits for a request that waits for
+        it. If a bulk write
+        fails, or returns fewer rows than calls, every caller of the
+        batch receives the exception.
+
+    Args:
+        storage: The `aioauth.storage.BaseStorage` to write to.
+        max_delay: Maximum time in seconds a write waits for others.
+        max_size: Number of queued writes that triggers a bulk write
+            right away.
+    """
+
+    def __init__(
+        self,
+        storage: BaseStorage,
+        max_delay: float = 0.002,
+        max_size: int = 64,
+    ):
+        super().__init__(storage)
+        self._tokens: _Batch[CreateTokenCall, Token] = _Batch(
+            lambda calls: self.storage.create_tokens(calls=calls),
+            max_size,
+            max_delay,
+        )
+        self._authorization_codes: _Batch[
+            CreateAuthorizationCodeCall, AuthorizationCode
+        ] = _Batch(
+            lambda calls: self.storage.create_authorization_codes(calls=calls),
+            max_size,
+            max_delay,
+        )
+
+    async def flush(self) -> None:
+        """Writes the queued calls now and waits for all bulk writes."""
+        await asyncio.gather(self._tokens.wait(), self._authorization_codes.wait())
+
+    async def create_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        access_token: str,
+        refresh_token: Optional[str] = None,
+    ) -> Token:
+        return await self._tokens.submit(
+            CreateTokenCall(
+                request=request,
+                client_id=client_id,
+                scope=scope,
+                access_token=access_token,
+                refresh_token=refresh_token,
+            )
+        )
+
+    async def create_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        response_type: str,
+        redirect_uri: str,
+        code: str,
+        code_challenge_method: Optional[CodeChallengeMethod] = None,
+        code_challenge: Optional[str] = None,
+        nonce: Optional[str] = None,
+    ) -> AuthorizationCode:
+        return await self._authorization_codes.submit(
+            CreateAuthorizationCodeCall(
+                request=request,
+                client_id=client_id,
+                scope=scope,
+                response_type=response_type,
+                redirect_uri=redirect_uri,
+                code=code,
+                code_challenge_method=code_challenge_method,
+                code_challenge=code_challenge,
+                nonce=nonce,
+            )
+        )
@@ -0,0 +1,121 @@
+"""
+Read-through cache for client lookups.
+```python
+from aioauth.storage import cache
+```
+"""
+
+from collections import OrderedDict
+import secrets
+import time
+from typing import Callable, Optional, Tuple
+
+from ..models import Client
+from ..requests import Request
+from . import BaseStorage
+from .proxy import ProxyStorage
+
+
+class ClientCacheStorage(ProxyStorage):
+    """
+    Storage wrapper that caches `get_client` results in memory.
+
+    Clients are looked up in the wrapped storage by `client_id` only
+    and kept for `ttl` seconds. Unknown client IDs are cached as well
+    for `negative_ttl` seconds, so that requests with bogus client IDs
+    do not hit the database either. When more than `maxsize` client IDs
+    are cached, the least recently used one is evicted. Plain
+    `aioauth.models.Client` objects are cached compiled, see
+    `aioauth.models.CompiledClient`.
+
+    Since the wrapped storage is never asked to verify the client
+    secret, the cache does it with a constant-time comparison in
+    `check_client_secret`. Override that method if secrets are stored
+    hashed.
+
+    Example:
+        ```python
+        from aioauth.server import AuthorizationServer
+        from aioauth.storage.cache import ClientCacheStorage
+
+        storage = ClientCacheStorage(Storage(), ttl=600)
+        server = AuthorizationServer(storage=storage)
+
+        # After a client registration has been changed:
+        storage.invalidate(client_id)
+        ```
+
+    Args:
+        storage: The `aioauth.storage.BaseStorage` to cache.
+        ttl: Lifetime of a cached client in seconds.
+        negative_ttl: Lifetime of a cached unknown client ID in seconds.
+        maxsize: Maximum number of cached client IDs.
+        clock: Monotonic time source, in seconds.
+    """
+
+    def __init__(
+        self,
+        storage: BaseStorage,
+        ttl: float = 300.0,
+        negative_ttl: float = 30.0,
+        maxsize: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(storage)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self._clients: "OrderedDict[str, Tuple[float, Optional[Client]]]" = (
+            OrderedDict()
+        )
+
+    def check_client_secret(self, client: Client, client_secret: str) -> bool:
+        """
+        Verifies passed `client_secret` against the cached client's
+        secret in constant time.
+        """
+        return secrets.compare_digest(
+            client.client_secret.encode(), client_secret.encode()
+        )
+
+    def invalidate(self, client_id: str) -> None:
+        """Drops the cached entry for `client_id`, if any."""
+        self._clients.pop(client_id, None)
+
+    def clear(self) -> None:
+        """Drops all cached entries."""
+        self._clients.clear()
+
+    async def get_client(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        client_secret: Optional[str] = None,
+    ) -> Optional[Client]:
+        now = self.clock()
+        entry = self._clients.get(client_id)
+
+        if entry is not None and entry[0] > now:
+            self._clients.move_to_end(client_id)
+            client = entry[1]
+        else:
+            client = await self.storage.get_client(request=request, client_id=client_id)
+            if type(client) is Client:
+                client = client.compile()
+            ttl = self.ttl if client is not None else self.negative_ttl
+            self._clients[client_id] = (now + ttl, client)
+            self._clients.move_to_end(client_id)
+            while len(self._clients) > self.maxsize:
+                self._clients.popitem(last=False)
+
+        if client is None:
+            return None
+
+        if client_secret is not None and not self.check_client_secret(
+            client, client_secret
+        ):
+            return None
+
+        return client
@@ -0,0 +1,158 @@
+"""
+Coalescing of concurrent identical storage reads.
+```python
+from aioauth.storage import coalescing
+```
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, TypeVar
+
+from ..models import AuthorizationCode, Client, Token
+from ..requests import Request
+from ..types import TokenType
+from . import BaseStorage
+from .proxy import ProxyStorage
+
+T = TypeVar("T")
+
+
+class _Call:
+    """A storage read in flight, shared by all of its waiters."""
+
+    def __init__(self, task: "asyncio.Future[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class CoalescingStorage(ProxyStorage):
+    """
+    Storage wrapper that lets concurrent identical reads share one call.
+
+    While a `get_client`, `get_token`, `get_tokens`,
+    `get_authorization_code` or `is_token_revoked` call is in flight,
+    other calls with the same arguments wait for its result instead of
+    querying the wrapped storage again. Once the call completes, the
+    next call queries the storage again: results are not cached.
+
+    If the shared call raises, every waiter receives the exception. A
+    waiter being cancelled does not affect the other waiters; the shared
+    call is only cancelled when all of its waiters have been.
+
+    Warning:
+        The `request` argument is not part of the key that identifies
+        identical calls, and all waiters receive the same result object.
+        Do not wrap storages whose reads depend on the request, and do
+        not mutate returned objects.
+
+    Args:
+        storage: The `aioauth.storage.BaseStorage` to wrap.
+    """
+
+    def __init__(self, storage: BaseStorage):
+        super().__init__(storage)
+        self._calls: Dict[Hashable, _Call] = {}
+
+    async def _coalesce(self, key: Hashable, read: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+
+        if call is None:
+            call = _Call(asyncio.ensure_future(read()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # Calls made before the task is done must not join it.
+                self._forget(key, call)
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def get_client(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        client_secret: Optional[str] = None,
+    ) -> Optional[Client]:
+        return await self._coalesce(
+            ("get_client", client_id, client_secret),
+            lambda: self.storage.get_client(
+                request=request, client_id=client_id, client_secret=client_secret
+            ),
+        )
+
+    async def get_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        token_type: Optional[TokenType] = None,
+        access_token: Optional[str] = None,
+        refresh_token: Optional[str] = None,
+    ) -> Optional[Token]:
+        return await self._coalesce(
+            ("get_token", client_id, token_type, access_token, refresh_token),
+            lambda: self.storage.get_token(
+                request=request,
+                client_id=client_id,
+                token_type=token_type,
+                access_token=access_token,
+                refresh_token=refresh_token,
+            ),
+        )
+
+    async def get_tokens(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        tokens: List[str],
+        token_type: Optional[TokenType] = None,
+    ) -> List[Optional[Token]]:
+        return await self._coalesce(
+            ("get_tokens", client_id, tuple(tokens), token_type),
+            lambda: self.storage.get_tokens(
+                request=request,
+                client_id=client_id,
+                tokens=tokens,
+                token_type=token_type,
+            ),
+        )
+
+    async def is_token_revoked(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        access_token: str,
+    ) -> bool:
+        return await self._coalesce(
+            ("is_token_revoked", client_id, access_token),
+            lambda: self.storage.is_token_revoked(
+                request=request, client_id=client_id, access_token=access_token
+            ),
+        )
+
+    async def get_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+    ) -> Optional[AuthorizationCode]:
+        return await self._coalesce(
+            ("get_authorization_code", client_id, code),
+            lambda: self.storage.get_authorization_code(
+                request=request, client_id=client_id, code=code
+            ),
+        )
@@ -0,0 +1,293 @@
+"""
+Storage of token and authorization code digests instead of plaintext.
+```python
+from aioauth.storage import hashing
+```
+"""
+
+import base64
+from dataclasses import replace
+import hashlib
+import hmac
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..models import AuthorizationCode, Token
+from ..requests import Request
+from ..types import CodeChallengeMethod, TokenType
+from . import BaseStorage, CreateAuthorizationCodeCall, CreateTokenCall
+from .proxy import ProxyStorage
+
+_DIGESTS = "aioauth.storage.hashing.digests"
+
+
+class HashingStorage(ProxyStorage):
+    """
+    Storage wrapper that hands the wrapped storage digests of access
+    tokens, refresh tokens and authorization codes.
+
+    Every token and code is replaced by its SHA-256 digest, or its
+    HMAC-SHA256 digest when a `key` is given, encoded as 43 characters
+    of unpadded base64url. The wrapped storage persists and looks up
+    only digests, so a leak of its data does not expose usable
+    credentials, and all its keys have the same length. The plaintext
+    is only handed back to the server in the rows returned by
+    `create_token`, `rotate_refresh_token` and
+    `create_authorization_code`, to be sent to the client. Rows
+    returned by token lookups carry the digests.
+
+    Each value is hashed once per request: the digests are kept in
+    `request.extra` and reused, for instance, by the `get_token` and
+    `revoke_token` calls of a revocation.
+
+    Example:
+        ```python
+        from aioauth.storage.hashing import HashingStorage
+
+        storage = HashingStorage(Storage(), key=secret_key)
+        server = AuthorizationServer(storage=storage)
+        ```
+
+    Warning:
+        Tokens stored before the wrapper was added cannot be found
+        anymore. Digests are not routing keys either: wrap the shards
+        of an `aioauth.storage.sharding.ShardedStorage`, not the
+        sharded storage itself, to keep routing on the plaintext.
+
+    Args:
+        storage: The `aioauth.storage.BaseStorage` to write digests to.
+        key: Secret key of the HMAC. Without it digests are plain
+            SHA-256, which is enough for random tokens but lets anyone
+            with the data check a guessed token offline.
+    """
+
+    def __init__(self, storage: BaseStorage, key: Optional[bytes] = None):
+        super().__init__(storage)
+        self.key = key
+
+    def digest(self, value: str) -> str:
+        """Returns the digest stored in place of `value`."""
+        if self.key is None:
+            data = hashlib.sha256(value.encode()).digest()
+        else:
+            data = hmac.new(self.key, value.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+    def _digest(self, request: Request, value: str) -> str:
+        digests: Dict[str, str] = request.extra.setdefault(_DIGESTS, {})
+        if value not in digests:
+            digests[value] = self.digest(value)
+        return digests[value]
+
+    def _optional_digest(self, request: Request, value: Optional[str]) -> Optional[str]:
+        return None if value is None else self._digest(request, value)
+
+    def _hash_token_call(self, call: CreateTokenCall) -> CreateTokenCall:
+        return replace(
+            call,
+            access_token=self._digest(call.request, call.access_token),
+            refresh_token=self._optional_digest(call.request, call.refresh_token),
+        )
+
+    def _hash_authorization_code_call(
+        self, call: CreateAuthorizationCodeCall
+    ) -> CreateAuthorizationCodeCall:
+        return replace(call, code=self._digest(call.request, call.code))
+
+    async def create_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        access_token: str,
+        refresh_token: Optional[str] = None,
+    ) -> Token:
+        token = await self.storage.create_token(
+            request=request,
+            client_id=client_id,
+            scope=scope,
+            access_token=self._digest(request, access_token),
+            refresh_token=self._optional_digest(request, refresh_token),
+        )
+        return replace(token, access_token=access_token, refresh_token=refresh_token)
+
+    async def create_tokens(self, *, calls: List[CreateTokenCall]) -> List[Token]:
+        tokens = await self.storage.create_tokens(
+            calls=[self._hash_token_call(call) for call in calls]
+        )
+        return [
+            replace(
+                token, access_token=call.access_token, refresh_token=call.refresh_token
+            )
+            for call, token in zip(calls, tokens)
+        ]
+
+    async def get_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        token_type: Optional[TokenType] = None,
+        access_token: Optional[str] = None,
+        refresh_token: Optional[str] = None,
+    ) -> Optional[Token]:
+        return await self.storage.get_token(
+            request=request,
+            client_id=client_id,
+            token_type=token_type,
+            access_token=self._optional_digest(request, access_token),
+            refresh_token=self._optional_digest(request, refresh_token),
+        )
+
+    async def get_tokens(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        tokens: List[str],
+        token_type: Optional[TokenType] = None,
+    ) -> List[Optional[Token]]:
+        return await self.storage.get_tokens(
+            request=request,
+            client_id=client_id,
+            tokens=[self._digest(request, token) for token in tokens],
+            token_type=token_type,
+        )
+
+    async def is_token_revoked(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        access_token: str,
+    ) -> bool:
+        return await self.storage.is_token_revoked(
+            request=request,
+            client_id=client_id,
+            access_token=self._digest(request, access_token),
+        )
+
+    async def revoke_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        refresh_token: Optional[str] = None,
+        token_type: Optional[TokenType] = None,
+        access_token: Optional[str] = None,
+    ) -> None:
+        await self.storage.revoke_token(
+            request=request,
+            client_id=client_id,
+            refresh_token=self._optional_digest(request, refresh_token),
+            token_type=token_type,
+            access_token=self._optional_digest(request, access_token),
+        )
+
+    async def rotate_refresh_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        refresh_token: str,
+        issue: Callable[[Token], Tuple[str, str, Optional[str]]],
+    ) -> Optional[Token]:
+        issued: List[Tuple[str, Optional[str]]] = []
+
+        def issue_digests(old_token: Token) -> Tuple[str, str, Optional[str]]:
+            scope, access_token, new_refresh_token = issue(old_token)
+            issued.append((access_token, new_refresh_token))
+            return (
+                scope,
+                self._digest(request, access_token),
+                self._optional_digest(request, new_refresh_token),
+            )
+
+        token = await self.storage.rotate_refresh_token(
+            request=request,
+            client_id=client_id,
+            refresh_token=self._digest(request, refresh_token),
+            issue=issue_digests,
+        )
+        if token is None:
+            return None
+        access_token, new_refresh_token = issued[-1]
+        return replace(
+            token, access_token=access_token, refresh_token=new_refresh_token
+        )
+
+    async def create_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        response_type: str,
+        redirect_uri: str,
+        code: str,
+        code_challenge_method: Optional[CodeChallengeMethod] = None,
+        code_challenge: Optional[str] = None,
+        nonce: Optional[str] = None,
+    ) -> AuthorizationCode:
+        authorization_code = await self.storage.create_authorization_code(
+            request=request,
+            client_id=client_id,
+            scope=scope,
+            response_type=response_type,
+            redirect_uri=redirect_uri,
+            code=self._digest(request, code),
+            code_challenge_method=code_challenge_method,
+            code_challenge=code_challenge,
+            nonce=nonce,
+        )
+        return replace(authorization_code, code=code)
+
+    async def create_authorization_codes(
+        self, *, calls: List[CreateAuthorizationCodeCall]
+    ) -> List[AuthorizationCode]:
+        authorization_codes = await self.storage.create_authorization_codes(
+            calls=[self._hash_authorization_code_call(call) for call in calls]
+        )
+        return [
+            replace(authorization_code, code=call.code)
+            for call, authorization_code in zip(calls, authorization_codes)
+        ]
+
+    async def get_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+    ) -> Optional[AuthorizationCode]:
+        authorization_code = await self.storage.get_authorization_code(
+            request=request, client_id=client_id, code=self._digest(request, code)
+        )
+        return authorization_code and replace(authorization_code, code=code)
+
+    async def delete_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+    ) -> None:
+        await self.storage.delete_authorization_code(
+            request=request, client_id=client_id, code=self._digest(request, code)
+        )
+
+    async def consume_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+        check: Optional[Callable[[AuthorizationCode], None]] = None,
+    ) -> Optional[AuthorizationCode]:
+        authorization_code = await self.storage.consume_authorization_code(
+            request=request,
+            client_id=client_id,
+            code=self._digest(request, code),
+            check=check and (lambda row: check(replace(row, code=code))),
+        )
+        return authorization_code and replace(authorization_code, code=code)
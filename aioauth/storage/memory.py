@@ -0,0 +1,336 @@
+"""
+In-memory storage backend.
+```python
+from aioauth.storage import memory
+```
+"""
+
+from dataclasses import replace
+import heapq
+import itertools
+import secrets
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..models import AuthorizationCode, Client, Token
+from ..requests import Request
+from ..types import CodeChallengeMethod, TokenType
+from . import BaseStorage
+
+
+class MemoryStorage(BaseStorage):
+    """
+    Storage that keeps clients, tokens and authorization codes in
+    process memory.
+
+    Every lookup is a single dictionary access: tokens are indexed by
+    `access_token` and `refresh_token`, authorization codes by
+    `(client_id, code)`. Expiry times are kept in a min-heap, so rows
+    that can no longer be used are dropped on write and by
+    `purge_expired` without scanning.
+    A token is dropped once both its access token and its refresh
+    token have expired, an authorization code once it has expired.
+
+    Note:
+        `get_user` and `get_id_token` depend on how the application
+        authenticates users and are left to subclasses.
+
+    Args:
+        clients: Initial clients.
+        clock: Wall clock time source, in seconds.
+    """
+
+    def __init__(
+        self,
+        clients: Iterable[Client] = (),
+        clock: Callable[[], float] = time.time,
+    ):
+        self.clock = clock
+        self._clients: Dict[str, Client] = {}
+        self._tokens: Dict[str, Token] = {}
+        self._refresh_tokens: Dict[str, str] = {}
+        self._authorization_codes: Dict[Tuple[str, str], AuthorizationCode] = {}
+        self._expiry: List[Tuple[float, int, str, Any]] = []
+        self._counter = itertools.count()
+
+        for client in clients:
+            self.add_client(client)
+
+    def add_client(self, client: Client) -> None:
+        """
+        Registers or replaces `client`. Plain `aioauth.models.Client`
+        objects are stored compiled, see `aioauth.models.CompiledClient`.
+        """
+        if type(client) is Client:
+            client = client.compile()
+        self._clients[client.client_id] = client
+
+    def remove_client(self, client_id: str) -> None:
+        """Removes the client with `client_id`, if any."""
+        self._clients.pop(client_id, None)
+
+    def __len__(self) -> int:
+        return len(self._tokens) + len(self._authorization_codes)
+
+    @staticmethod
+    def _token_expires_at(token: Token) -> float:
+        lifetime = token.expires_in
+        if token.refresh_token:
+            lifetime = max(lifetime, token.refresh_token_expires_in)
+        return token.issued_at + lifetime
+
+    @staticmethod
+    def _authorization_code_expires_at(authorization_code: AuthorizationCode) -> float:
+        return authorization_code.auth_time + authorization_code.expires_in
+
+    def _schedule(self, expires_at: float, kind: str, key: Any) -> None:
+        heapq.heappush(self._expiry, (expires_at, next(self._counter), kind, key))
+
+    def _drop_token(self, access_token: str) -> None:
+        token = self._tokens.pop(access_token, None)
+        if token is not None and token.refresh_token:
+            self._refresh_tokens.pop(token.refresh_token, None)
+
+    def _prune(self, now: float, limit: Optional[int] = None) -> int:
+        """Drops up to `limit` rows whose expiry time is before `now`."""
+        dropped = 0
+        while (
+            self._expiry
+            and self._expiry[0][0] < now
+            and (limit is None or dropped < limit)
+        ):
+            _, _, kind, key = heapq.heappop(self._expiry)
+            if kind == "token":
+                token = self._tokens.get(key)
+                # The row may have been replaced since it was scheduled.
+                if token is not None and self._token_expires_at(token) < now:
+                    self._drop_token(key)
+                    dropped += 1
+            else:
+                authorization_code = self._authorization_codes.get(key)
+                if (
+                    authorization_code is not None
+                    and self._authorization_code_expires_at(authorization_code) < now
+                ):
+                    del self._authorization_codes[key]
+                    dropped += 1
+        return dropped
+
+    def _find_token(
+        self, access_token: Optional[str], refresh_token: Optional[str]
+    ) -> Optional[Token]:
+        if refresh_token is not None and refresh_token in self._refresh_tokens:
+            return self._tokens.get(self._refresh_tokens[refresh_token])
+        if access_token is not None:
+            return self._tokens.get(access_token)
+        return None
+
+    async def create_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        access_token: str,
+        refresh_token: Optional[str] = None,
+    ) -> Token:
+        now = self.clock()
+        self._prune(now)
+
+        token = Token(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            scope=scope,
+            issued_at=int(now),
+            expires_in=request.settings.TOKEN_EXPIRES_IN,
+            refresh_token_expires_in=request.settings.REFRESH_TOKEN_EXPIRES_IN,
+            client_id=client_id,
+        )
+        self._tokens[access_token] = token
+        if refresh_token:
+            self._refresh_tokens[refresh_token] = access_token
+        self._schedule(self._token_expires_at(token), "token", access_token)
+        return token
+
+    async def get_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        token_type: Optional[TokenType] = None,
+        access_token: Optional[str] = None,
+        refresh_token: Optional[str] = None,
+    ) -> Optional[Token]:
+        token = self._find_token(access_token, refresh_token)
+        if token is None or token.client_id != client_id:
+            return None
+        return token
+
+    async def get_tokens(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        tokens: List[str],
+        token_type: Optional[TokenType] = None,
+    ) -> List[Optional[Token]]:
+        is_access_token = token_type == "access_token"  # nosec
+        found: List[Optional[Token]] = []
+        for value in tokens:
+            token = (
+                self._find_token(value, None)
+                if is_access_token
+                else self._find_token(None, value)
+            )
+            found.append(token if token and token.client_id == client_id else None)
+        return found
+
+    async def revoke_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        refresh_token: Optional[str] = None,
+        token_type: Optional[TokenType] = None,
+        access_token: Optional[str] = None,
+    ) -> None:
+        token = await self.get_token(
+            request=request,
+            client_id=client_id,
+            access_token=access_token,
+            refresh_token=refresh_token,
+        )
+        if token is not None:
+            self._tokens[token.access_token] = replace(token, revoked=True)
+
+    async def rotate_refresh_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        refresh_token: str,
+        issue: Callable[[Token], Tuple[str, str, Optional[str]]],
+    ) -> Optional[Token]:
+        # Nothing below yields to the event loop, so a concurrent
+        # refresh with the same token sees it revoked.
+        old_token = self._find_token(None, refresh_token)
+        if (
+            old_token is None
+            or old_token.client_id != client_id
+            or old_token.revoked
+            or old_token.issued_at + old_token.refresh_token_expires_in < self.clock()
+        ):
+            return None
+        self._tokens[old_token.access_token] = replace(old_token, revoked=True)
+
+        scope, access_token, new_refresh_token = issue(old_token)
+        return await self.create_token(
+            request=request,
+            client_id=client_id,
+            scope=scope,
+            access_token=access_token,
+            refresh_token=new_refresh_token,
+        )
+
+    async def create_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        response_type: str,
+        redirect_uri: str,
+        code: str,
+        code_challenge_method: Optional[CodeChallengeMethod] = None,
+        code_challenge: Optional[str] = None,
+        nonce: Optional[str] = None,
+    ) -> AuthorizationCode:
+        now = self.clock()
+        self._prune(now)
+
+        authorization_code = AuthorizationCode(
+            code=code,
+            client_id=client_id,
+            redirect_uri=redirect_uri,
+            response_type=response_type,
+            scope=scope,
+            auth_time=int(now),
+            expires_in=request.settings.AUTHORIZATION_CODE_EXPIRES_IN,
+            code_challenge=code_challenge,
+            code_challenge_method=code_challenge_method,
+            nonce=nonce,
+        )
+        key = (client_id, code)
+        self._authorization_codes[key] = authorization_code
+        self._schedule(
+            self._authorization_code_expires_at(authorization_code),
+            "authorization_code",
+            key,
+        )
+        return authorization_code
+
+    async def get_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+    ) -> Optional[AuthorizationCode]:
+        return self._authorization_codes.get((client_id, code))
+
+    async def delete_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+    ) -> None:
+        self._authorization_codes.pop((client_id, code), None)
+
+    async def consume_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+        check: Optional[Callable[[AuthorizationCode], None]] = None,
+    ) -> Optional[AuthorizationCode]:
+        authorization_code = self._authorization_codes.get((client_id, code))
+        if authorization_code is None:
+            return None
+        # Nothing yields to the event loop until the code is deleted.
+        if check is not None:
+            check(authorization_code)
+        return self._authorization_codes.pop((client_id, code))
+
+    async def get_client(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        client_secret: Optional[str] = None,
+    ) -> Optional[Client]:
+        client = self._clients.get(client_id)
+        if client is None:
+            return None
+        if client_secret is not None and not secrets.compare_digest(
+            client.client_secret.encode(), client_secret.encode()
+        ):
+            return None
+        return client
+
+    async def purge_expired(
+        self,
+        *,
+        before: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> int:
+        return self._prune(self.clock() if before is None else before, limit)
+
+    async def get_revoked_tokens(self, *, at: Optional[int] = None) -> List[Token]:
+        at = int(self.clock()) if at is None else at
+        return [
+            token
+            for token in self._tokens.values()
+            if token.revoked and token.issued_at + token.expires_in > at
+        ]
@@ -0,0 +1,249 @@
+"""
+Storage that forwards every call to another storage. Used as the base
+class for storage wrappers such as caches.
+```python
+from aioauth.storage import proxy
+```
+"""
+
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional, Tuple
+
+from ..models import AuthorizationCode, Client, Token
+from ..requests import Request
+from ..types import CodeChallengeMethod, TokenType
+from . import BaseStorage, CreateAuthorizationCodeCall, CreateTokenCall
+
+
+class ProxyStorage(BaseStorage):
+    """
+    Storage that delegates all methods to the wrapped `storage`.
+
+    Subclasses override only the methods they need to intercept.
+
+    Args:
+        storage: The `aioauth.storage.BaseStorage` to delegate to.
+    """
+
+    def __init__(self, storage: BaseStorage):
+        self.storage = storage
+
+    def wrapped(self) -> List[BaseStorage]:
+        """Returns the storages this one delegates to."""
+        return [self.storage]
+
+    @asynccontextmanager
+    async def transaction(self, request: Request) -> AsyncIterator[Any]:
+        async with self.storage.transaction(request) as transaction:
+            yield transaction
+
+    async def create_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        access_token: str,
+        refresh_token: Optional[str] = None,
+    ) -> Token:
+        return await self.storage.create_token(
+            request=request,
+            client_id=client_id,
+            scope=scope,
+            access_token=access_token,
+            refresh_token=refresh_token,
+        )
+
+    async def create_tokens(self, *, calls: List[CreateTokenCall]) -> List[Token]:
+        return await self.storage.create_tokens(calls=calls)
+
+    async def get_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        token_type: Optional[TokenType] = None,
+        access_token: Optional[str] = None,
+        refresh_token: Optional[str] = None,
+    ) -> Optional[Token]:
+        return await self.storage.get_token(
+            request=request,
+            client_id=client_id,
+            token_type=token_type,
+            access_token=access_token,
+            refresh_token=refresh_token,
+        )
+
+    async def get_tokens(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        tokens: List[str],
+        token_type: Optional[TokenType] = None,
+    ) -> List[Optional[Token]]:
+        return await self.storage.get_tokens(
+            request=request,
+            client_id=client_id,
+            tokens=tokens,
+            token_type=token_type,
+        )
+
+    async def is_token_revoked(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        access_token: str,
+    ) -> bool:
+        return await self.storage.is_token_revoked(
+            request=request, client_id=client_id, access_token=access_token
+        )
+
+    async def revoke_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        refresh_token: Optional[str] = None,
+        token_type: Optional[TokenType] = None,
+        access_token: Optional[str] = None,
+    ) -> None:
+        await self.storage.revoke_token(
+            request=request,
+            client_id=client_id,
+            refresh_token=refresh_token,
+            token_type=token_type,
+            access_token=access_token,
+        )
+
+    async def rotate_refresh_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        refresh_token: str,
+        issue: Callable[[Token], Tuple[str, str, Optional[str]]],
+    ) -> Optional[Token]:
+        return await self.storage.rotate_refresh_token(
+            request=request,
+            client_id=client_id,
+            refresh_token=refresh_token,
+            issue=issue,
+        )
+
+    async def create_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        response_type: str,
+        redirect_uri: str,
+        code: str,
+        code_challenge_method: Optional[CodeChallengeMethod] = None,
+        code_challenge: Optional[str] = None,
+        nonce: Optional[str] = None,
+    ) -> AuthorizationCode:
+        return await self.storage.create_authorization_code(
+            request=request,
+            client_id=client_id,
+            scope=scope,
+            response_type=response_type,
+            redirect_uri=redirect_uri,
+            code=code,
+            code_challenge_method=code_challenge_method,
+            code_challenge=code_challenge,
+            nonce=nonce,
+        )
+
+    async def create_authorization_codes(
+        self, *, calls: List[CreateAuthorizationCodeCall]
+    ) -> List[AuthorizationCode]:
+        return await self.storage.create_authorization_codes(calls=calls)
+
+    async def get_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+    ) -> Optional[AuthorizationCode]:
+        return await self.storage.get_authorization_code(
+            request=request, client_id=client_id, code=code
+        )
+
+    async def delete_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+    ) -> None:
+        await self.storage.delete_authorization_code(
+            request=request, client_id=client_id, code=code
+        )
+
+    async def consume_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+        check: Optional[Callable[[AuthorizationCode], None]] = None,
+    ) -> Optional[AuthorizationCode]:
+        return await self.storage.consume_authorization_code(
+            request=request, client_id=client_id, code=code, check=check
+        )
+
+    async def get_client(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        client_secret: Optional[str] = None,
+    ) -> Optional[Client]:
+        return await self.storage.get_client(
+            request=request, client_id=client_id, client_secret=client_secret
+        )
+
+    async def get_user(self, request: Request) -> Optional[Any]:
+        return await self.storage.get_user(request)
+
+    async def get_id_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        redirect_uri: str,
+        response_type: Optional[str] = None,
+        nonce: Optional[str] = None,
+    ) -> str:
+        return await self.storage.get_id_token(
+            request=request,
+            client_id=client_id,
+            scope=scope,
+            redirect_uri=redirect_uri,
+            response_type=response_type,
+            nonce=nonce,
+        )
+
+    async def purge_expired(
+        self,
+        *,
+        before: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> int:
+        return await self.storage.purge_expired(before=before, limit=limit)
+
+    async def get_revoked_tokens(self, *, at: Optional[int] = None) -> List[Token]:
+        return await self.storage.get_revoked_tokens(at=at)
+
+
+def unwrap(storage: BaseStorage) -> Iterator[BaseStorage]:
+    """Yields `storage` and, recursively, every storage it wraps."""
+    yield storage
+    if isinstance(storage, ProxyStorage):
+        for wrapped in storage.wrapped():
+            yield from unwrap(wrapped)
@@ -0,0 +1,536 @@
+"""
+Distribution of tokens and authorization codes across several storages.
+```python
+from aioauth.storage import sharding
+```
+"""
+
+import asyncio
+from bisect import bisect
+import hashlib
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from ..models import AuthorizationCode, Token
+from ..requests import Request
+from ..types import CodeChallengeMethod, TokenType
+from . import BaseStorage, CreateAuthorizationCodeCall, CreateTokenCall
+from .proxy import ProxyStorage
+
+T = TypeVar("T")
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(value.encode(), digest_size=8).digest(), "big"
+    )
+
+
+class HashRing:
+    """
+    Consistent hash ring mapping keys to node names.
+
+    Every node is placed on the ring `replicas` times. A key belongs to
+    the first node point following the hash of the key, so adding a
+    node to a ring of `n` nodes only moves about `1 / (n + 1)` of the
+    keys, all of them to the new node.
+
+    Args:
+        nodes: Initial node names.
+        replicas: Number of points per node on the ring. More points
+            spread the keys more evenly.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 128):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._nodes: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    def __contains__(self, node: str) -> bool:
+        return node in self._nodes
+
+    def add(self, node: str) -> None:
+        """Places `node` on the ring."""
+        if node in self._nodes:
+            raise ValueError(f"Node {node} is already on the ring")
+        for replica in range(self.replicas):
+            point = _hash(f"{node}#{replica}")
+            index = bisect(self._points, point)
+            self._points.insert(index, point)
+            self._nodes.insert(index, node)
+
+    def get(self, key: str) -> str:
+        """Returns the node that `key` belongs to."""
+        if not self._points:
+            raise LookupError("The ring has no nodes")
+        index = bisect(self._points, _hash(key)) % len(self._points)
+        return self._nodes[index]
+
+    def copy(self) -> "HashRing":
+        ring = HashRing(replicas=self.replicas)
+        ring._points = list(self._points)
+        ring._nodes = list(self._nodes)
+        return ring
+
+
+class ShardedStorage(ProxyStorage):
+    """
+    Storage that distributes tokens and authorization codes across
+    several storages, the shards, by consistent hashing.
+
+    Clients, users and ID tokens stay on the `registry` storage.
+    An authorization code is stored on the shard of its code value.
+    A token is stored on the shard of its access token and, when its
+    refresh token hashes to another shard, on that shard as well, so
+    that lookups by either token go to a single shard. Revocations
+    update both copies. Tokens are hashed by `key`, which can map both
+    tokens of a pair to the same value.
+
+    `add_shard` moves only the keys that the new shard takes over on
+    the ring. Rows written before are not copied: until
+    `finish_rebalance` is called, a lookup that misses on the owning
+    shard falls back to the shard that owned the key before. Call it
+    once the longest lived row written before has expired, see
+    `aioauth.config.Settings.REFRESH_TOKEN_EXPIRES_IN`.
+
+    Example:
+        ```python
+        from aioauth.storage.sharding import ShardedStorage
+
+        storage = ShardedStorage(
+            registry=ClientStorage(),
+            shards={"a": TokenStorage("db-a"), "b": TokenStorage("db-b")},
+        )
+        server = AuthorizationServer(storage=storage)
+
+        storage.add_shard("c", TokenStorage("db-c"))
+        ```
+
+    Warning:
+        Refresh token rotation is atomic on the shard of the refresh
+        token only. The copy of the new token on the other shards, and
+        the revocation of the old token's copy, are separate writes.
+
+    Args:
+        registry: The `aioauth.storage.BaseStorage` for clients, users
+            and ID tokens.
+        shards: The storages for tokens and authorization codes, by
+            name. Names place the shards on the ring and must not
+            change between restarts.
+        replicas: Number of points per shard on the ring.
+        key: Returns the value hashed to place a token or code, by
+            default the token or code itself. Pass
+            `aioauth.tokens.StructuredTokenGenerator.get_routing_key` to
+            store both tokens of a pair on one shard, without copies.
+    """
+
+    def __init__(
+        self,
+        registry: BaseStorage,
+        shards: Mapping[str, BaseStorage],
+        replicas: int = 128,
+        key: Callable[[str], str] = str,
+    ):
+        super().__init__(registry)
+        self.key = key
+        self.shards: Dict[str, BaseStorage] = dict(shards)
+        self.ring = HashRing(self.shards, replicas=replicas)
+        self.previous_ring: Optional[HashRing] = None
+
+    def wrapped(self) -> List[BaseStorage]:
+        return [self.storage, *self.shards.values()]
+
+    def add_shard(self, name: str, storage: BaseStorage) -> None:
+        """
+        Adds a shard. Lookups fall back to the shards that owned the
+        moved keys until `finish_rebalance` is called.
+        """
+        if self.previous_ring is None:
+            self.previous_ring = self.ring.copy()
+        self.ring.add(name)
+        self.shards[name] = storage
+
+    def finish_rebalance(self) -> None:
+        """Stops falling back to the shards used before `add_shard`."""
+        self.previous_ring = None
+
+    def shard(self, value: str) -> BaseStorage:
+        """Returns the shard that stores the token or code `value`."""
+        return self.shards[self.ring.get(self.key(value))]
+
+    def _candidates(self, value: str) -> List[BaseStorage]:
+        """The owning shard of `value`, then the one before rebalancing."""
+        key = self.key(value)
+        name = self.ring.get(key)
+        candidates = [self.shards[name]]
+        if self.previous_ring is not None:
+            previous = self.previous_ring.get(key)
+            if previous != name:
+                candidates.append(self.shards[previous])
+        return candidates
+
+    async def _first(
+        self,
+        value: str,
+        lookup: Callable[[BaseStorage], Awaitable[Optional[T]]],
+    ) -> Optional[T]:
+        for storage in self._candidates(value):
+            result = await lookup(storage)
+            if result is not None:
+                return result
+        return None
+
+    def _token_shards(
+        self, access_token: str, refresh_token: Optional[str]
+    ) -> List[BaseStorage]:
+        shards = [self.shard(access_token)]
+        if refresh_token:
+            shard = self.shard(refresh_token)
+            if shard is not shards[0]:
+                shards.append(shard)
+        return shards
+
+    async def create_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        access_token: str,
+        refresh_token: Optional[str] = None,
+    ) -> Token:
+        tokens = await asyncio.gather(
+            *(
+                shard.create_token(
+                    request=request,
+                    client_id=client_id,
+                    scope=scope,
+                    access_token=access_token,
+                    refresh_token=refresh_token,
+                )
+                for shard in self._token_shards(access_token, refresh_token)
+            )
+        )
+        return tokens[0]
+
+    async def create_tokens(self, *, calls: List[CreateTokenCall]) -> List[Token]:
+        groups: Dict[int, Tuple[BaseStorage, List[int]]] = {}
+        for index, call in enumerate(calls):
+            for shard in self._token_shards(call.access_token, call.refresh_token):
+                groups.setdefault(id(shard), (shard, []))[1].append(index)
+
+        results = await asyncio.gather(
+            *(
+                shard.create_tokens(calls=[calls[index] for index in indexes])
+                for shard, indexes in groups.values()
+            )
+        )
+        tokens: Dict[int, Token] = {}
+        for (_, indexes), created in zip(groups.values(), results):
+            for index, token in zip(indexes, created):
+                tokens.setdefault(index, token)
+        return [tokens[index] for index in range(len(calls))]
+
+    async def get_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        token_type: Optional[TokenType] = None,
+        access_token: Optional[str] = None,
+        refresh_token: Optional[str] = None,
+    ) -> Optional[Token]:
+        token = None
+        if refresh_token is not None:
+            token = await self._first(
+                refresh_token,
+                lambda shard: shard.get_token(
+                    request=request,
+                    client_id=client_id,
+                    token_type=token_type,
+                    access_token=None,
+                    refresh_token=refresh_token,
+                ),
+            )
+        if token is None and access_token is not None:
+            token = await self._first(
+                access_token,
+                lambda shard: shard.get_token(
+                    request=request,
+                    client_id=client_id,
+                    token_type=token_type,
+                    access_token=access_token,
+                    refresh_token=None,
+                ),
+            )
+        return token
+
+    async def get_tokens(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        tokens: List[str],
+        token_type: Optional[TokenType] = None,
+    ) -> List[Optional[Token]]:
+        groups: Dict[str, List[int]] = {}
+        for index, value in enumerate(tokens):
+            groups.setdefault(self.ring.get(self.key(value)), []).append(index)
+
+        results = await asyncio.gather(
+            *(
+                self.shards[name].get_tokens(
+                    request=request,
+                    client_id=client_id,
+                    tokens=[tokens[index] for index in indexes],
+                    token_type=token_type,
+                )
+                for name, indexes in groups.items()
+            )
+        )
+        found: List[Optional[Token]] = [None] * len(tokens)
+        for indexes, group in zip(groups.values(), results):
+            for index, token in zip(indexes, group):
+                found[index] = token
+
+        if self.previous_ring is not None:
+            is_access_token = token_type == "access_token"  # nosec
+            for index, value in enumerate(tokens):
+                if found[index] is None:
+                    found[index] = await self.get_token(
+                        request=request,
+                        client_id=client_id,
+                        token_type=token_type,
+                        access_token=value if is_access_token else None,
+                        refresh_token=None if is_access_token else value,
+                    )
+        return found
+
+    async def is_token_revoked(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        access_token: str,
+    ) -> bool:
+        candidates = self._candidates(access_token)
+        for shard in candidates:
+            if not await shard.is_token_revoked(
+                request=request, client_id=client_id, access_token=access_token
+            ):
+                return False
+        return True
+
+    async def revoke_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        refresh_token: Optional[str] = None,
+        token_type: Optional[TokenType] = None,
+        access_token: Optional[str] = None,
+    ) -> None:
+        token = await self.get_token(
+            request=request,
+            client_id=client_id,
+            token_type=token_type,
+            access_token=access_token,
+            refresh_token=refresh_token,
+        )
+        if token is not None:
+            await self._revoke_copies(request, token)
+
+    async def _revoke_copies(self, request: Request, token: Token) -> None:
+        shards = self._candidates(token.access_token)
+        if token.refresh_token:
+            shards.extend(self._candidates(token.refresh_token))
+        await asyncio.gather(
+            *(
+                shard.revoke_token(
+                    request=request,
+                    client_id=token.client_id,
+                    refresh_token=None,
+                    token_type="access_token",
+                    access_token=token.access_token,
+                )
+                for shard in {id(shard): shard for shard in shards}.values()
+            )
+        )
+
+    async def rotate_refresh_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        refresh_token: str,
+        issue: Callable[[Token], Tuple[str, str, Optional[str]]],
+    ) -> Optional[Token]:
+        old_tokens: List[Token] = []
+
+        def capture(old_token: Token) -> Tuple[str, str, Optional[str]]:
+            old_tokens.append(old_token)
+            return issue(old_token)
+
+        owner = None
+        token = None
+        for shard in self._candidates(refresh_token):
+            token = await shard.rotate_refresh_token(
+                request=request,
+                client_id=client_id,
+                refresh_token=refresh_token,
+                issue=capture,
+            )
+            if token is not None:
+                owner = shard
+                break
+        if token is None:
+            return None
+
+        # The owner revoked its copy of the old token and stored the
+        # new one, the other copies live on the shards of the tokens.
+        assert owner is not None
+        shards = self._token_shards(token.access_token, token.refresh_token)
+        writes: List[Awaitable[Any]] = [
+            shard.create_token(
+                request=request,
+                client_id=client_id,
+                scope=token.scope,
+                access_token=token.access_token,
+                refresh_token=token.refresh_token,
+            )
+            for shard in shards
+            if shard is not owner
+        ]
+        if owner not in shards:
+            # No lookup is routed to the owner's copy: it is revoked,
+            # and kept until purged.
+            writes.append(
+                owner.revoke_token(
+                    request=request,
+                    client_id=client_id,
+                    refresh_token=None,
+                    token_type="access_token",
+                    access_token=token.access_token,
+                )
+            )
+        await asyncio.gather(self._revoke_copies(request, old_tokens[0]), *writes)
+        return token
+
+    async def create_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        response_type: str,
+        redirect_uri: str,
+        code: str,
+        code_challenge_method: Optional[CodeChallengeMethod] = None,
+        code_challenge: Optional[str] = None,
+        nonce: Optional[str] = None,
+    ) -> AuthorizationCode:
+        return await self.shard(code).create_authorization_code(
+            request=request,
+            client_id=client_id,
+            scope=scope,
+            response_type=response_type,
+            redirect_uri=redirect_uri,
+            code=code,
+            code_challenge_method=code_challenge_method,
+            code_challenge=code_challenge,
+            nonce=nonce,
+        )
+
+    async def create_authorization_codes(
+        self, *, calls: List[CreateAuthorizationCodeCall]
+    ) -> List[AuthorizationCode]:
+        groups: Dict[str, List[int]] = {}
+        for index, call in enumerate(calls):
+            groups.setdefault(self.ring.get(self.key(call.code)), []).append(index)
+
+        results = await asyncio.gather(
+            *(
+                self.shards[name].create_authorization_codes(
+                    calls=[calls[index] for index in indexes]
+                )
+                for name, indexes in groups.items()
+            )
+        )
+        authorization_codes: Dict[int, AuthorizationCode] = {}
+        for indexes, created in zip(groups.values(), results):
+            authorization_codes.update(zip(indexes, created))
+        return [authorization_codes[index] for index in range(len(calls))]
+
+    async def get_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+    ) -> Optional[AuthorizationCode]:
+        return await self._first(
+            code,
+            lambda shard: shard.get_authorization_code(
+                request=request, client_id=client_id, code=code
+            ),
+        )
+
+    async def delete_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+    ) -> None:
+        for shard in self._candidates(code):
+            await shard.delete_authorization_code(
+                request=request, client_id=client_id, code=code
+            )
+
+    async def consume_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+        check: Optional[Callable[[AuthorizationCode], None]] = None,
+    ) -> Optional[AuthorizationCode]:
+        return await self._first(
+            code,
+            lambda shard: shard.consume_authorization_code(
+                request=request, client_id=client_id, code=code, check=check
+            ),
+        )
+
+    async def purge_expired(
+        self,
+        *,
+        before: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> int:
+        deleted = 0
+        for shard in self.shards.values():
+            if limit is not None and deleted >= limit:
+                break
+            deleted += await shard.purge_expired(
+                before=before, limit=None if limit is None else limit - deleted
+            )
+        return deleted
+
+    async def get_revoked_tokens(self, *, at: Optional[int] = None) -> List[Token]:
+        revoked = await asyncio.gather(
+            *(shard.get_revoked_tokens(at=at) for shard in self.shards.values())
+        )
+        return [token for tokens in revoked for token in tokens]
@@ -0,0 +1,764 @@
+"""
+SQL storage backend built on SQLAlchemy's asyncio extension.
+```python
+from aioauth.storage import sql
+```
+
+Requires the `sql` extra: `pip install aioauth[sql]`, plus an async
+database driver such as `asyncpg` or `aiosqlite`.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import hashlib
+import secrets
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    bindparam,
+    delete,
+    false,
+    insert,
+    select,
+    true,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlalchemy.sql import Executable
+
+from ..models import AuthorizationCode, Client, Token
+from ..requests import Request
+from ..types import CodeChallengeMethod, TokenType
+from . import BaseStorage, CreateAuthorizationCodeCall, CreateTokenCall
+
+metadata = MetaData()
+"""Tables used by `SQLStorage`, for `metadata.create_all` or migrations."""
+
+clients = Table(
+    "aioauth_clients",
+    metadata,
+    Column("client_id", String(255), primary_key=True),
+    Column("client_secret", String(255), nullable=False),
+    # Space separated, like `scope`.
+    Column("grant_types", Text, nullable=False, default=""),
+    Column("response_types", Text, nullable=False, default=""),
+    Column("redirect_uris", Text, nullable=False, default=""),
+    Column("scope", Text, nullable=False, default=""),
+)
+
+tokens = Table(
+    "aioauth_tokens",
+    metadata,
+    # Tokens are looked up by their SHA-256, so that self-contained
+    # tokens of any length are indexed by a short fixed-size key.
+    Column("access_token_hash", String(64), primary_key=True),
+    Column("refresh_token_hash", String(64), nullable=True),
+    Column("access_token", Text, nullable=False),
+    Column("refresh_token", Text, nullable=True),
+    Column("client_id", String(255), nullable=False),
+    Column("scope", Text, nullable=False),
+    Column("issued_at", Integer, nullable=False),
+    Column("expires_in", Integer, nullable=False),
+    Column("refresh_token_expires_in", Integer, nullable=False),
+    Column("token_type", String(32), nullable=False),
+    Column("revoked", Boolean, nullable=False, default=False),
+    # Time after which neither token can be used, for `purge_expired`.
+    Column("expires_at", Integer, nullable=False),
+    Index("ix_aioauth_tokens_refresh_token_hash", "refresh_token_hash", unique=True),
+    Index("ix_aioauth_tokens_expires_at", "expires_at"),
+)
+
+authorization_codes = Table(
+    "aioauth_authorization_codes",
+    metadata,
+    Column("client_id", String(255), primary_key=True),
+    Column("code", String(255), primary_key=True),
+    Column("redirect_uri", Text, nullable=False),
+    Column("response_type", String(255), nullable=False),
+    Column("scope", Text, nullable=False),
+    Column("auth_time", Integer, nullable=False),
+    Column("expires_in", Integer, nullable=False),
+    Column("code_challenge", String(255), nullable=True),
+    Column("code_challenge_method", String(16), nullable=True),
+    Column("nonce", String(255), nullable=True),
+    Column("expires_at", Integer, nullable=False),
+    Index("ix_aioauth_authorization_codes_expires_at", "expires_at"),
+)
+
+# Statements are built once: executing the same statement object only
+# looks up its compiled form in the engine's compiled cache.
+_TOKEN_COLUMNS = [
+    tokens.c.access_token,
+    tokens.c.refresh_token,
+    tokens.c.scope,
+    tokens.c.issued_at,
+    tokens.c.expires_in,
+    tokens.c.refresh_token_expires_in,
+    tokens.c.client_id,
+    tokens.c.token_type,
+    tokens.c.revoked,
+]
+_AUTHORIZATION_CODE_COLUMNS = [
+    c for c in authorization_codes.c if c.name != "expires_at"
+]
+_CLIENT_COLUMNS = list(clients.c)
+
+_insert_token = insert(tokens)
+_select_token_by_access_token = select(*_TOKEN_COLUMNS).where(
+    tokens.c.access_token_hash == bindparam("value"),
+    tokens.c.client_id == bindparam("client_id"),
+)
+_select_token_by_refresh_token = select(*_TOKEN_COLUMNS).where(
+    tokens.c.refresh_token_hash == bindparam("value"),
+    tokens.c.client_id == bindparam("client_id"),
+)
+_select_tokens_by_access_token = select(*_TOKEN_COLUMNS).where(
+    tokens.c.access_token_hash.in_(bindparam("values", expanding=True)),
+    tokens.c.client_id == bindparam("client_id"),
+)
+_select_tokens_by_refresh_token = select(*_TOKEN_COLUMNS).where(
+    tokens.c.refresh_token_hash.in_(bindparam("values", expanding=True)),
+    tokens.c.client_id == bindparam("client_id"),
+)
+_select_token_revoked = select(tokens.c.revoked).where(
+    tokens.c.access_token_hash == bindparam("value"),
+    tokens.c.client_id == bindparam("client_id"),
+)
+_revoke_token = (
+    update(tokens)
+    .where(tokens.c.access_token_hash == bindparam("value"))
+    .values(revoked=True)
+)
+_usable_refresh_token = (
+    tokens.c.refresh_token_hash == bindparam("value"),
+    # Column names are reserved for the SET clause of UPDATE statements.
+    tokens.c.client_id == bindparam("client"),
+    tokens.c.revoked == false(),
+    tokens.c.issued_at + tokens.c.refresh_token_expires_in >= bindparam("now"),
+)
+_revoke_refresh_token = (
+    update(tokens)
+    .where(*_usable_refresh_token)
+    .values(revoked=True)
+    .returning(*_TOKEN_COLUMNS)
+)
+# For databases without UPDATE ... RETURNING.
+_select_usable_refresh_token = select(*_TOKEN_COLUMNS).where(*_usable_refresh_token)
+_revoke_usable_token = (
+    update(tokens)
+    .where(
+        tokens.c.access_token_hash == bindparam("value"), tokens.c.revoked == false()
+    )
+    .values(revoked=True)
+)
+_insert_authorization_code = insert(authorization_codes)
+_select_authorization_code = select(*_AUTHORIZATION_CODE_COLUMNS).where(
+    authorization_codes.c.client_id == bindparam("client_id"),
+    authorization_codes.c.code == bindparam("code"),
+)
+_delete_authorization_code = delete(authorization_codes).where(
+    authorization_codes.c.client_id == bindparam("client_id"),
+    authorization_codes.c.code == bindparam("code"),
+)
+_consume_authorization_code = _delete_authorization_code.returning(
+    *_AUTHORIZATION_CODE_COLUMNS
+)
+_select_client = select(*_CLIENT_COLUMNS).where(
+    clients.c.client_id == bindparam("client_id")
+)
+_select_expired_tokens = (
+    select(tokens.c.access_token_hash)
+    .where(tokens.c.expires_at < bindparam("before"))
+    .order_by(tokens.c.expires_at)
+    .limit(bindparam("limit"))
+)
+_delete_tokens = delete(tokens).where(
+    tokens.c.access_token_hash.in_(bindparam("values", expanding=True))
+)
+_delete_expired_tokens = delete(tokens).where(tokens.c.expires_at < bindparam("before"))
+_select_expired_authorization_codes = (
+    select(authorization_codes.c.client_id, authorization_codes.c.code)
+    .where(authorization_codes.c.expires_at < bindparam("before"))
+    .order_by(authorization_codes.c.expires_at)
+    .limit(bindparam("limit"))
+)
+_delete_expired_authorization_codes = delete(authorization_codes).where(
+    authorization_codes.c.expires_at < bindparam("before")
+)
+_select_revoked_tokens = select(*_TOKEN_COLUMNS).where(
+    # Narrows the scan with the index, as a token never expires before
+    # its access token.
+    tokens.c.expires_at > bindparam("at"),
+    tokens.c.revoked == true(),
+    tokens.c.issued_at + tokens.c.expires_in > bindparam("at"),
+)
+
+_TRANSACTION_KEY = "aioauth.storage.sql.transaction"
+
+
+@dataclass
+class _Transaction:
+    connection: AsyncConnection
+    # A connection runs one statement at a time, while the server may
+    # call the storage concurrently within a request.
+    lock: asyncio.Lock
+
+
+def _split(value: str) -> List[Any]:
+    return value.split()
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _optional_hash(token: Optional[str]) -> Optional[str]:
+    return None if token is None else _hash(token)
+
+
+class SQLStorage(BaseStorage):
+    """
+    Storage that keeps clients, tokens and authorization codes in a SQL
+    database, through an SQLAlchemy `AsyncEngine`.
+
+    Connection pooling is done by the engine: create it once per
+    process with `create_async_engine` (or `SQLStorage.from_url`) and
+    size its pool with `pool_size` and `max_overflow`. Tokens are
+    indexed by the SHA-256 of `access_token` and `refresh_token`, so
+    that long self-contained tokens fit in the index, authorization codes
+    by `(client_id, code)`, and every statement is built once at import
+    time so that executing it only hits the engine's compiled cache.
+
+    Storage calls made while a request is inside `transaction` share
+    one connection and one transaction, committed when the block exits
+    without an exception. The endpoints of
+    `aioauth.server.AuthorizationServer` run inside it, so an OAuth
+    request is committed at once, or rolled back when its response is
+    an error. Other calls run in a transaction of their own.
+
+    Example:
+        ```python
+        from aioauth.storage.sql import SQLStorage
+
+        storage = SQLStorage.from_url(
+            "postgresql+asyncpg://localhost/oauth", pool_size=20
+        )
+        await storage.create_tables()
+        server = AuthorizationServer(storage=storage)
+        ```
+
+    Note:
+        `get_user` and `get_id_token` depend on how the application
+        authenticates users and are left to subclasses.
+
+    Args:
+        engine: The `AsyncEngine` to run statements on.
+        clock: Wall clock time source, in seconds.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.engine = engine
+        self.clock = clock
+
+    @classmethod
+    def from_url(cls, url: str, **engine_options: Any) -> "SQLStorage":
+        """
+        Creates the storage with a new engine for the database `url`.
+        `engine_options` are passed to `create_async_engine`.
+        """
+        return cls(create_async_engine(url, **engine_options))
+
+    async def create_tables(self) -> None:
+        """Creates the tables that do not exist yet."""
+        async with self.engine.begin() as connection:
+            await connection.run_sync(metadata.create_all)
+
+    async def add_client(self, client: Client) -> None:
+        """Registers or replaces `client`."""
+        row = {
+            "client_id": client.client_id,
+            "client_secret": client.client_secret,
+            "grant_types": " ".join(client.grant_types or ()),
+            "response_types": " ".join(client.response_types or ()),
+            "redirect_uris": " ".join(client.redirect_uris or ()),
+            "scope": client.scope,
+        }
+        async with self.engine.begin() as connection:
+            await connection.execute(
+                delete(clients).where(clients.c.client_id == client.client_id)
+            )
+            await connection.execute(insert(clients), row)
+
+    @asynccontextmanager
+    async def transaction(self, request: Request) -> AsyncIterator[AsyncConnection]:
+        """
+        Runs the storage calls made for `request` in a single
+        transaction. Nested blocks for the same request join the
+        outermost one.
+        """
+        current: Optional[_Transaction] = request.extra.get(_TRANSACTION_KEY)
+        if current is not None:
+            yield current.connection
+            return
+
+        async with self.engine.begin() as connection:
+            request.extra[_TRANSACTION_KEY] = _Transaction(connection, asyncio.Lock())
+            try:
+                yield connection
+            finally:
+                del request.extra[_TRANSACTION_KEY]
+
+    @asynccontextmanager
+    async def _connect(self, request: Request) -> AsyncIterator[AsyncConnection]:
+        current: Optional[_Transaction] = request.extra.get(_TRANSACTION_KEY)
+        if current is None:
+            async with self.engine.begin() as connection:
+                yield connection
+        else:
+            async with current.lock:
+                yield current.connection
+
+    async def _execute(
+        self,
+        request: Request,
+        statement: Executable,
+        parameters: Optional[Mapping[str, Any]] = None,
+    ) -> Sequence[Any]:
+        async with self._connect(request) as connection:
+            result = await connection.execute(statement, parameters)
+            return result.all() if result.returns_rows else ()
+
+    @staticmethod
+    def _token_expires_at(token: Token) -> int:
+        lifetime = token.expires_in
+        if token.refresh_token:
+            lifetime = max(lifetime, token.refresh_token_expires_in)
+        return token.issued_at + lifetime
+
+    def _token_row(self, token: Token) -> Dict[str, Any]:
+        return {
+            "access_token_hash": _hash(token.access_token),
+            "refresh_token_hash": _optional_hash(token.refresh_token),
+            "access_token": token.access_token,
+            "refresh_token": token.refresh_token,
+            "client_id": token.client_id,
+            "scope": token.scope,
+            "issued_at": token.issued_at,
+            "expires_in": token.expires_in,
+            "refresh_token_expires_in": token.refresh_token_expires_in,
+            "token_type": token.token_type,
+            "revoked": token.revoked,
+            "expires_at": self._token_expires_at(token),
+        }
+
+    @staticmethod
+    def _authorization_code_row(
+        authorization_code: AuthorizationCode,
+    ) -> Dict[str, Any]:
+        return {
+            "client_id": authorization_code.client_id,
+            "code": authorization_code.code,
+            "redirect_uri": authorization_code.redirect_uri,
+            "response_type": authorization_code.response_type,
+            "scope": authorization_code.scope,
+            "auth_time": authorization_code.auth_time,
+            "expires_in": authorization_code.expires_in,
+            "code_challenge": authorization_code.code_challenge,
+            "code_challenge_method": authorization_code.code_challenge_method,
+            "nonce": authorization_code.nonce,
+            "expires_at": authorization_code.auth_time + authorization_code.expires_in,
+        }
+
+    async def create_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        access_token: str,
+        refresh_token: Optional[str] = None,
+    ) -> Token:
+        token = Token(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            scope=scope,
+            issued_at=int(self.clock()),
+            expires_in=request.settings.TOKEN_EXPIRES_IN,
+            refresh_token_expires_in=request.settings.REFRESH_TOKEN_EXPIRES_IN,
+            client_id=client_id,
+        )
+        await self._execute(request, _insert_token, self._token_row(token))
+        return token
+
+    async def create_tokens(self, *, calls: List[CreateTokenCall]) -> List[Token]:
+        issued_at = int(self.clock())
+        tokens = [
+            Token(
+                access_token=call.access_token,
+                refresh_token=call.refresh_token,
+                scope=call.scope,
+                issued_at=issued_at,
+                expires_in=call.request.settings.TOKEN_EXPIRES_IN,
+                refresh_token_expires_in=call.request.settings.REFRESH_TOKEN_EXPIRES_IN,
+                client_id=call.client_id,
+            )
+            for call in calls
+        ]
+        # The tokens come from several requests: they are written in a
+        # transaction of their own, with a single executemany.
+        async with self.engine.begin() as connection:
+            await connection.execute(
+                _insert_token, [self._token_row(token) for token in tokens]
+            )
+        return tokens
+
+    async def get_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        token_type: Optional[TokenType] = None,
+        access_token: Optional[str] = None,
+        refresh_token: Optional[str] = None,
+    ) -> Optional[Token]:
+        rows: Sequence[Any] = ()
+        if refresh_token is not None:
+            rows = await self._execute(
+                request,
+                _select_token_by_refresh_token,
+                {"value": _hash(refresh_token), "client_id": client_id},
+            )
+        if not rows and access_token is not None:
+            rows = await self._execute(
+                request,
+                _select_token_by_access_token,
+                {"value": _hash(access_token), "client_id": client_id},
+            )
+        return Token(**rows[0]._mapping) if rows else None
+
+    async def get_tokens(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        tokens: List[str],
+        token_type: Optional[TokenType] = None,
+    ) -> List[Optional[Token]]:
+        is_access_token = token_type == "access_token"  # nosec
+        rows = await self._execute(
+            request,
+            (
+                _select_tokens_by_access_token
+                if is_access_token
+                else _select_tokens_by_refresh_token
+            ),
+            {
+                "values": list({_hash(token) for token in tokens}),
+                "client_id": client_id,
+            },
+        )
+        found: Dict[Optional[str], Token] = {}
+        for row in rows:
+            token = Token(**row._mapping)
+            found[token.access_token if is_access_token else token.refresh_token] = (
+                token
+            )
+        return [found.get(value) for value in tokens]
+
+    async def is_token_revoked(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        access_token: str,
+    ) -> bool:
+        rows = await self._execute(
+            request,
+            _select_token_revoked,
+            {"value": _hash(access_token), "client_id": client_id},
+        )
+        return not rows or bool(rows[0][0])
+
+    async def revoke_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        refresh_token: Optional[str] = None,
+        token_type: Optional[TokenType] = None,
+        access_token: Optional[str] = None,
+    ) -> None:
+        token = await self.get_token(
+            request=request,
+            client_id=client_id,
+            access_token=access_token,
+            refresh_token=refresh_token,
+        )
+        if token is not None:
+            await self._execute(
+                request, _revoke_token, {"value": _hash(token.access_token)}
+            )
+
+    async def rotate_refresh_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        refresh_token: str,
+        issue: Callable[[Token], Tuple[str, str, Optional[str]]],
+    ) -> Optional[Token]:
+        now = int(self.clock())
+        parameters = {"value": _hash(refresh_token), "client": client_id, "now": now}
+        async with self._connect(request) as connection:
+            # Only one of several concurrent refreshes with the same
+            # token matches the conditional update.
+            if self.engine.dialect.update_returning:
+                row = (
+                    await connection.execute(_revoke_refresh_token, parameters)
+                ).first()
+            else:
+                row = (
+                    await connection.execute(_select_usable_refresh_token, parameters)
+                ).first()
+                if row is not None:
+                    result = await connection.execute(
+                        _revoke_usable_token, {"value": _hash(row.access_token)}
+                    )
+                    if result.rowcount != 1:
+                        row = None
+            if row is None:
+                return None
+
+            scope, access_token, new_refresh_token = issue(Token(**row._mapping))
+            token = Token(
+                access_token=access_token,
+                refresh_token=new_refresh_token,
+                scope=scope,
+                issued_at=now,
+                expires_in=request.settings.TOKEN_EXPIRES_IN,
+                refresh_token_expires_in=request.settings.REFRESH_TOKEN_EXPIRES_IN,
+                client_id=client_id,
+            )
+            await connection.execute(_insert_token, self._token_row(token))
+        return token
+
+    async def create_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        response_type: str,
+        redirect_uri: str,
+        code: str,
+        code_challenge_method: Optional[CodeChallengeMethod] = None,
+        code_challenge: Optional[str] = None,
+        nonce: Optional[str] = None,
+    ) -> AuthorizationCode:
+        authorization_code = AuthorizationCode(
+            code=code,
+            client_id=client_id,
+            redirect_uri=redirect_uri,
+            response_type=response_type,
+            scope=scope,
+            auth_time=int(self.clock()),
+            expires_in=request.settings.AUTHORIZATION_CODE_EXPIRES_IN,
+            code_challenge=code_challenge,
+            code_challenge_method=code_challenge_method,
+            nonce=nonce,
+        )
+        await self._execute(
+            request,
+            _insert_authorization_code,
+            self._authorization_code_row(authorization_code),
+        )
+        return authorization_code
+
+    async def create_authorization_codes(
+        self, *, calls: List[CreateAuthorizationCodeCall]
+    ) -> List[AuthorizationCode]:
+        auth_time = int(self.clock())
+        authorization_codes = [
+            AuthorizationCode(
+                code=call.code,
+                client_id=call.client_id,
+                redirect_uri=call.redirect_uri,
+                response_type=call.response_type,
+                scope=call.scope,
+                auth_time=auth_time,
+                expires_in=call.request.settings.AUTHORIZATION_CODE_EXPIRES_IN,
+                code_challenge=call.code_challenge,
+                code_challenge_method=call.code_challenge_method,
+                nonce=call.nonce,
+            )
+            for call in calls
+        ]
+        # The codes come from several requests: they are written in a
+        # transaction of their own, with a single executemany.
+        async with self.engine.begin() as connection:
+            await connection.execute(
+                _insert_authorization_code,
+                [self._authorization_code_row(code) for code in authorization_codes],
+            )
+        return authorization_codes
+
+    async def get_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+    ) -> Optional[AuthorizationCode]:
+        rows = await self._execute(
+            request,
+            _select_authorization_code,
+            {"client_id": client_id, "code": code},
+        )
+        if not rows:
+            return None
+        return AuthorizationCode(**rows[0]._mapping)
+
+    async def delete_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+    ) -> None:
+        await self._execute(
+            request,
+            _delete_authorization_code,
+            {"client_id": client_id, "code": code},
+        )
+
+    async def consume_authorization_code(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        code: str,
+        check: Optional[Callable[[AuthorizationCode], None]] = None,
+    ) -> Optional[AuthorizationCode]:
+        parameters = {"client_id": client_id, "code": code}
+        async with self._connect(request) as connection:
+            if self.engine.dialect.delete_returning:
+                row = (
+                    await connection.execute(_consume_authorization_code, parameters)
+                ).first()
+                authorization_code = (
+                    AuthorizationCode(**row._mapping) if row is not None else None
+                )
+                # Raised within the transaction, which undoes the
+                # deletion when rolled back.
+                if authorization_code is not None and check is not None:
+                    check(authorization_code)
+                return authorization_code
+
+            row = (
+                await connection.execute(_select_authorization_code, parameters)
+            ).first()
+            if row is None:
+                return None
+            authorization_code = AuthorizationCode(**row._mapping)
+            if check is not None:
+                check(authorization_code)
+            result = await connection.execute(_delete_authorization_code, parameters)
+            # A concurrent request deleted the code first.
+            return authorization_code if result.rowcount == 1 else None
+
+    async def get_client(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        client_secret: Optional[str] = None,
+    ) -> Optional[Client]:
+        rows = await self._execute(request, _select_client, {"client_id": client_id})
+        if not rows:
+            return None
+        row = rows[0]
+        if client_secret is not None and not secrets.compare_digest(
+            row.client_secret.encode(), client_secret.encode()
+        ):
+            return None
+        return Client(
+            client_id=row.client_id,
+            client_secret=row.client_secret,
+            grant_types=_split(row.grant_types),
+            response_types=_split(row.response_types),
+            redirect_uris=_split(row.redirect_uris),
+            scope=row.scope,
+        ).compile()
+
+    async def purge_expired(
+        self,
+        *,
+        before: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> int:
+        before = int(self.clock()) if before is None else before
+        async with self.engine.begin() as connection:
+            if limit is None:
+                deleted = (
+                    await connection.execute(_delete_expired_tokens, {"before": before})
+                ).rowcount
+                deleted += (
+                    await connection.execute(
+                        _delete_expired_authorization_codes, {"before": before}
+                    )
+                ).rowcount
+                return deleted
+
+            hashes = (
+                await connection.scalars(
+                    _select_expired_tokens, {"before": before, "limit": limit}
+                )
+            ).all()
+            if hashes:
+                await connection.execute(_delete_tokens, {"values": hashes})
+            deleted = len(hashes)
+            if deleted >= limit:
+                return deleted
+
+            keys = (
+                await connection.execute(
+                    _select_expired_authorization_codes,
+                    {"before": before, "limit": limit - deleted},
+                )
+            ).all()
+            if keys:
+                await connection.execute(
+                    _delete_authorization_code,
+                    [{"client_id": key[0], "code": key[1]} for key in keys],
+                )
+            return deleted + len(keys)
+
+    async def get_revoked_tokens(self, *, at: Optional[int] = None) -> List[Token]:
+        at = int(self.clock()) if at is None else at
+        async with self.engine.connect() as connection:
+            result = await connection.execute(_select_revoked_tokens, {"at": at})
+            return [Token(**row._mapping) for row in result]
@@ -0,0 +1,120 @@
+"""
+Background task that deletes expired tokens and authorization codes.
+```python
+from aioauth import sweeper
+```
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from .storage import BaseStorage
+
+log = logging.getLogger(__name__)
+
+
+class ExpirySweeper:
+    """
+    Periodically purges expired rows with
+    `aioauth.storage.BaseStorage.purge_expired`.
+
+    Every `interval` seconds the sweeper purges expired rows in batches
+    of at most `batch_size` rows, sleeping `pause` seconds between
+    batches so that request handling is never starved, until a batch
+    comes back short. Errors are logged and the sweep is retried on the
+    next interval.
+
+    Example:
+        ```python
+        from aioauth.sweeper import ExpirySweeper
+
+        server = AuthorizationServer(storage=storage)
+
+        @asynccontextmanager
+        async def lifespan(app):
+            async with ExpirySweeper(server.storage, interval=300):
+                yield
+        ```
+
+    Args:
+        storage: An `aioauth.storage.BaseStorage` implementing `purge_expired`.
+        interval: Seconds between two sweeps.
+        batch_size: Maximum number of rows deleted per storage call.
+        pause: Seconds to sleep between two batches of a sweep.
+        grace: Seconds rows are kept after they expired.
+    """
+
+    def __init__(
+        self,
+        storage: BaseStorage,
+        interval: float = 60.0,
+        batch_size: int = 1000,
+        pause: float = 0.1,
+        grace: int = 0,
+    ):
+        self.storage = storage
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self.grace = grace
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def sweep(self) -> int:
+        """
+        Purges all rows that expired more than `grace` seconds ago.
+
+        Returns:
+            The number of deleted rows.
+        """
+        before = int(time.time()) - self.grace
+        total = 0
+
+        while True:
+            purged = await self.storage.purge_expired(
+                before=before, limit=self.batch_size
+            )
+            total += purged
+            if purged < self.batch_size:
+                return total
+            await asyncio.sleep(self.pause)
+
+    async def run(self) -> None:
+        """Sweeps every `interval` seconds until cancelled."""
+        while True:
+            try:
+                purged = await self.sweep()
+            except Exception:
+                log.exception("Exception caught while purging expired rows.")
+            else:
+                log.debug("Purged %d expired rows.", purged)
+            await asyncio.sleep(self.interval)
+
+    @property
+    def running(self) -> bool:
+        """Whether the background task is running."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Starts the background task on the running event loop."""
+        if not self.running:
+            self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self) -> None:
+        """Cancels the background task and waits for it to finish."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def __aenter__(self) -> "ExpirySweeper":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
@@ -0,0 +1,404 @@
+"""
+Generators for the tokens and authorization codes issued by the server.
+```python
+from aioauth import tokens
+```
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+import weakref
+import zlib
+
+from . import jwt
+from .requests import Request
+from .types import TokenType
+from .utils import UNICODE_ASCII_CHARACTER_SET
+
+
+class TokenPool:
+    """
+    Source of random tokens that draws entropy from `os.urandom` in
+    large chunks.
+
+    Each chunk is mapped to `chars` in a single `bytes.translate` pass:
+    bytes are reduced modulo `len(chars)` and the bytes that would bias
+    that reduction are dropped, so every character is equally likely.
+    The characters left over are kept for the next tokens.
+
+    The pool is safe to share between threads, and a forked child
+    process discards the characters prefetched by its parent so that
+    both processes never issue the same token.
+
+    Args:
+        chars: The ASCII characters tokens are made of.
+        prefetch: Number of random bytes read from the OS at once.
+    """
+
+    def __init__(self, chars: str = UNICODE_ASCII_CHARACTER_SET, prefetch: int = 4096):
+        if not 1 < len(chars) <= 256 or not chars.isascii():
+            raise ValueError("chars must contain between 2 and 256 ASCII characters.")
+
+        # Largest multiple of len(chars) that fits in a byte.
+        limit = 256 - 256 % len(chars)
+        alphabet = chars.encode("ascii") * (limit // len(chars))
+        self._table = bytes.maketrans(bytes(range(limit)), alphabet)
+        self._delete = bytes(range(limit, 256))
+        self.prefetch = prefetch
+        self._buffer = ""
+        self._position = 0
+        self._lock = threading.Lock()
+
+        if hasattr(os, "register_at_fork"):
+            pool = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: _reset_after_fork(pool))
+
+    def _reset(self) -> None:
+        self._lock = threading.Lock()
+        self._buffer = ""
+        self._position = 0
+
+    def generate(self, length: int) -> str:
+        """Returns a random string of `length` characters."""
+        with self._lock:
+            end = self._position + length
+            if end > len(self._buffer):
+                chunks = [self._buffer[self._position :]]
+                available = len(chunks[0])
+                while available < length:
+                    chunk = os.urandom(max(self.prefetch, length * 2))
+                    chunks.append(
+                        chunk.translate(self._table, self._delete).decode("ascii")
+                    )
+                    available += len(chunks[-1])
+                self._buffer = "".join(chunks)
+                self._position = 0
+                end = length
+
+            token = self._buffer[self._position : end]
+            self._position = end
+            return token
+
+
+def _reset_after_fork(pool: "weakref.ref[TokenPool]") -> None:
+    instance = pool()
+    if instance is not None:
+        instance._reset()
+
+
+class TokenGenerator:
+    """
+    Generates opaque random access tokens, refresh tokens and
+    authorization codes.
+
+    Pass a subclass to `aioauth.server.AuthorizationServer` to change
+    the format of issued tokens.
+
+    Random strings are taken from `pool`, an `aioauth.tokens.TokenPool`
+    shared by all generators unless it is replaced on a subclass or
+    instance.
+    """
+
+    pool: TokenPool = TokenPool()
+
+    def generate_access_token(
+        self, *, request: Request, client_id: str, scope: str
+    ) -> str:
+        """Returns a new access token for `client_id` and `scope`."""
+        return self.pool.generate(42)
+
+    def generate_refresh_token(
+        self, *, request: Request, client_id: str, scope: str, access_token: str
+    ) -> str:
+        """
+        Returns a new refresh token, issued alongside `access_token`.
+        """
+        return self.pool.generate(48)
+
+    def generate_authorization_code(
+        self, *, request: Request, client_id: str, scope: str
+    ) -> str:
+        """Returns a new authorization code for `client_id` and `scope`."""
+        return self.pool.generate(42)
+
+    def decode_access_token(self, access_token: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the claims of a self-contained access token.
+
+        Returns:
+            The claims of `access_token`, or `None` if the token is
+            opaque or invalid and must be looked up in storage.
+        """
+        return None
+
+    def get_token_type(self, token: str) -> Optional[TokenType]:
+        """
+        Returns whether `token` is an access token or a refresh token.
+
+        Returns:
+            `"access_token"`, `"refresh_token"`, or `None` if the type
+            cannot be told from the token itself.
+        """
+        return None
+
+    def get_routing_key(self, token: str) -> str:
+        """
+        Returns the key that places `token` in a storage partition, see
+        `aioauth.storage.sharding.ShardedStorage`. Tokens with the same
+        key are stored together.
+        """
+        return token
+
+    def is_well_formed(self, token: str) -> bool:
+        """
+        Returns whether `token` may have been issued by this generator.
+
+        The server rejects tokens and authorization codes for which this
+        returns `False` without looking them up in storage.
+        """
+        return True
+
+
+class StructuredTokenGenerator(TokenGenerator):
+    """
+    Generates opaque tokens that carry their type and a routing tag.
+
+    Tokens have the form `<prefix>_<tag>_<random>`, where the prefix
+    is `at` for access tokens, `rt` for refresh tokens and `ac` for
+    authorization codes. The tag is random, and a refresh token gets
+    the tag of the access token it is issued with.
+
+    The server uses `get_token_type` to introspect and revoke tokens
+    sent without a `token_type_hint` with a single lookup, and
+    `aioauth.storage.sharding.ShardedStorage` can use
+    `get_routing_key` to keep both tokens of a pair on one shard:
+
+    Example:
+        ```python
+        from aioauth.storage.sharding import ShardedStorage
+        from aioauth.tokens import StructuredTokenGenerator
+
+        token_generator = StructuredTokenGenerator()
+        storage = ShardedStorage(
+            registry, shards, key=token_generator.get_routing_key
+        )
+        server = AuthorizationServer(storage, token_generator=token_generator)
+        ```
+
+    Args:
+        tag_length: Number of characters of the routing tag.
+    """
+
+    prefixes: Dict[str, str] = {
+        "access_token": "at",
+        "refresh_token": "rt",
+        "authorization_code": "ac",
+    }
+    token_types: Dict[str, TokenType] = {
+        "at": "access_token",
+        "rt": "refresh_token",
+    }
+
+    def __init__(self, tag_length: int = 8):
+        self.tag_length = tag_length
+
+    def _generate(self, kind: str, tag: str, length: int) -> str:
+        return f"{self.prefixes[kind]}_{tag}_{self.pool.generate(length)}"
+
+    def parse(self, token: str) -> Optional[Tuple[str, str]]:
+        """
+        Returns the prefix and the tag of `token`, or `None` if it was
+        not generated by this class.
+        """
+        parts = token.split("_", 2)
+        if (
+            len(parts) != 3
+            or parts[0] not in self.prefixes.values()
+            or len(parts[1]) != self.tag_length
+        ):
+            return None
+        return parts[0], parts[1]
+
+    def generate_access_token(
+        self, *, request: Request, client_id: str, scope: str
+    ) -> str:
+        return self._generate("access_token", self.pool.generate(self.tag_length), 42)
+
+    def generate_refresh_token(
+        self, *, request: Request, client_id: str, scope: str, access_token: str
+    ) -> str:
+        parsed = self.parse(access_token)
+        tag = parsed[1] if parsed else self.pool.generate(self.tag_length)
+        return self._generate("refresh_token", tag, 48)
+
+    def generate_authorization_code(
+        self, *, request: Request, client_id: str, scope: str
+    ) -> str:
+        return self._generate(
+            "authorization_code", self.pool.generate(self.tag_length), 42
+        )
+
+    def get_token_type(self, token: str) -> Optional[TokenType]:
+        parsed = self.parse(token)
+        return self.token_types.get(parsed[0]) if parsed else None
+
+    def get_routing_key(self, token: str) -> str:
+        parsed = self.parse(token)
+        return parsed[1] if parsed else token
+
+
+class SignedTokenGenerator(TokenGenerator):
+    """
+    Generates self-contained access tokens signed with HMAC-SHA256.
+
+    Access tokens are [JWT](https://datatracker.ietf.org/doc/html/rfc9068)
+    carrying the `client_id`, `scope`, `iat`, `exp` and a unique `jti`
+    claim. They can be validated with `decode_access_token` by a
+    signature check alone, so the storage is only consulted to find out
+    whether the token has been revoked. Refresh tokens and authorization
+    codes remain opaque.
+
+    Example:
+        ```python
+        from aioauth.jwt import KeyRing
+        from aioauth.server import AuthorizationServer
+        from aioauth.tokens import SignedTokenGenerator
+
+        token_generator = SignedTokenGenerator(KeyRing({"1": secret_key}))
+        server = AuthorizationServer(storage, token_generator=token_generator)
+
+        # On a resource server sharing the same keys:
+        claims = token_generator.decode_access_token(access_token)
+        ```
+
+    Args:
+        key_ring: An `aioauth.jwt.KeyRing` used to sign and verify tokens.
+        leeway: Seconds of tolerated clock skew when checking expiry.
+    """
+
+    def __init__(self, key_ring: jwt.KeyRing, leeway: int = 0):
+        self.key_ring = key_ring
+        self.leeway = leeway
+
+    def generate_access_token(
+        self, *, request: Request, client_id: str, scope: str
+    ) -> str:
+        issued_at = int(time.time())
+        claims = {
+            "client_id": client_id,
+            "scope": scope,
+            "iat": issued_at,
+            "exp": issued_at + request.settings.TOKEN_EXPIRES_IN,
+            "jti": self.pool.generate(22),
+        }
+        return jwt.encode(claims, self.key_ring)
+
+    def decode_access_token(self, access_token: str) -> Optional[Dict[str, Any]]:
+        return jwt.decode(access_token, self.key_ring, leeway=self.leeway)
+
+
+class ChecksummedTokenGenerator(TokenGenerator):
+    """
+    Appends a checksum to the tokens and authorization codes of another
+    generator.
+
+    Tokens have the form `<token>~<checksum>`, where the checksum is the
+    CRC32 of the token in hexadecimal. `is_well_formed` recomputes it,
+    so the server turns away random strings sent to the token,
+    introspection and revocation endpoints without a storage lookup.
+    The checksum is not a signature: it filters out garbage, not forged
+    tokens.
+
+    Tokens issued before the checksum was introduced have no `~` and
+    are accepted as long as `accept_legacy` is set. Turn it off once
+    they have all expired.
+
+    Example:
+        ```python
+        from aioauth.tokens import ChecksummedTokenGenerator
+
+        token_generator = ChecksummedTokenGenerator(StructuredTokenGenerator())
+        server = AuthorizationServer(storage, token_generator=token_generator)
+        ```
+
+    Args:
+        token_generator: The `aioauth.tokens.TokenGenerator` that
+            generates the tokens. Defaults to opaque random tokens.
+        accept_legacy: Whether tokens without a checksum are well formed.
+    """
+
+    separator = "~"
+
+    def __init__(
+        self,
+        token_generator: Optional[TokenGenerator] = None,
+        accept_legacy: bool = True,
+    ):
+        self.token_generator = token_generator or TokenGenerator()
+        self.accept_legacy = accept_legacy
+
+    @staticmethod
+    def _checksum(token: str) -> str:
+        return f"{zlib.crc32(token.encode()):08x}"
+
+    def _sign(self, token: str) -> str:
+        return f"{token}{self.separator}{self._checksum(token)}"
+
+    def _verify(self, token: str) -> Optional[str]:
+        """
+        Returns `token` without its checksum, or `None` if the
+        checksum does not match.
+        """
+        value, separator, checksum = token.rpartition(self.separator)
+        if not separator:
+            return token if self.accept_legacy else None
+        return value if checksum == self._checksum(value) else None
+
+    def generate_access_token(
+        self, *, request: Request, client_id: str, scope: str
+    ) -> str:
+        return self._sign(
+            self.token_generator.generate_access_token(
+                request=request, client_id=client_id, scope=scope
+            )
+        )
+
+    def generate_refresh_token(
+        self, *, request: Request, client_id: str, scope: str, access_token: str
+    ) -> str:
+        return self._sign(
+            self.token_generator.generate_refresh_token(
+                request=request,
+                client_id=client_id,
+                scope=scope,
+                access_token=self._verify(access_token) or access_token,
+            )
+        )
+
+    def generate_authorization_code(
+        self, *, request: Request, client_id: str, scope: str
+    ) -> str:
+        return self._sign(
+            self.token_generator.generate_authorization_code(
+                request=request, client_id=client_id, scope=scope
+            )
+        )
+
+    def decode_access_token(self, access_token: str) -> Optional[Dict[str, Any]]:
+        value = self._verify(access_token)
+        return (
+            None if value is None else self.token_generator.decode_access_token(value)
+        )
+
+    def get_token_type(self, token: str) -> Optional[TokenType]:
+        value = self._verify(token)
+        return None if value is None else self.token_generator.get_token_type(value)
+
+    def get_routing_key(self, token: str) -> str:
+        return self.token_generator.get_routing_key(self._verify(token) or token)
+
+    def is_well_formed(self, token: str) -> bool:
+        value = self._verify(token)
+        return value is not None and self.token_generator.is_well_formed(value)
@@ -7,14 +7,13 @@ from aioauth import utils
 """
 
 import base64
-from dataclasses import asdict
-
 import binascii
 import functools
 import hashlib
 import logging
 import random
 import string
+import time
 from base64 import b64decode, b64encode
 from http import HTTPStatus
 from typing import (
@@ -259,7 +258,7 @@ def build_error_response(
         content = ErrorResponse(error=exc.error, description=exc.description)
         log.debug("%s %r", exc, request)
         return Response(
-            content=asdict(content),
+            content=content.to_dict(),
             status_code=exc.status_code,
             headers=exc.headers,
         )
@@ -281,18 +280,34 @@ def build_error_response(
     log.exception("Exception caught while processing request.", exc_info=exc)
     content = ErrorResponse(error=error.error, description=error.description)
     return Response(
-        content=asdict(content),
+        content=content.to_dict(),
         status_code=error.status_code,
         headers=error.headers,
     )
 
 
+class _Rollback(Exception):
+    """Rolls back the storage transaction of an error `response`."""
+
+    def __init__(self, response: Response):
+        self.response = response
+
+
 def catch_errors_and_unavailability(
     skip_redirect_on_exc: Tuple[Type[OAuth2Error], ...] = (OAuth2Error,)
 ) -> Callable[..., Callable[..., Coroutine[Any, Any, Response]]]:
     """
     Decorator that adds error catching to the function passed.
 
+    If the instance the function is bound to has a `storage`
+    attribute, the function runs inside its
+    `aioauth.storage.BaseStorage.transaction`, rolled back when an
+    exception is raised or an error response is returned.
+
+    If the instance the function is bound to has an enabled
+    `instrumentation` attribute, the duration and status code of every
+    response and the type of every error are reported to it.
+
     Args:
         f: A callable.
 
@@ -303,14 +318,51 @@ def catch_errors_and_unavailability(
     def decorator(
         f: Callable[..., Coroutine[Any, Any, Response]]
     ) -> Callable[..., Coroutine[Any, Any, Response]]:
+        endpoint = f.__name__
+
+        async def call(self, request: Request, *args, **kwargs) -> Response:
+            # See aioauth.storage.BaseStorage.transaction
+            storage = getattr(self, "storage", None)
+            if storage is None:
+                return await f(self, request, *args, **kwargs)
+            try:
+                async with storage.transaction(request):
+                    response = await f(self, request, *args, **kwargs)
+                    if response.status_code >= HTTPStatus.BAD_REQUEST:
+                        raise _Rollback(response)
+            except _Rollback as rollback:
+                response = rollback.response
+            return response
+
         @functools.wraps(f)
         async def wrapper(self, request: Request, *args, **kwargs) -> Response:
+            # See aioauth.metrics.Instrumentation
+            instrumentation = getattr(self, "instrumentation", None)
+            if instrumentation is None or not instrumentation.enabled:
+                try:
+                    response = await call(self, request, *args, **kwargs)
+                except Exception as exc:
+                    response = build_error_response(
+                        exc=exc,
+                        request=request,
+                        skip_redirect_on_exc=skip_redirect_on_exc,
+                    )
+                return response
+
+            start = time.perf_counter()
             try:
-                response = await f(self, request, *args, **kwargs)
+                response = await call(self, request, *args, **kwargs)
             except Exception as exc:
+                instrumentation.count_error(
+                    endpoint,
+                    exc.error if isinstance(exc, OAuth2Error) else "server_error",
+                )
                 response = build_error_response(
                     exc=exc, request=request, skip_redirect_on_exc=skip_redirect_on_exc
                 )
+            instrumentation.observe_endpoint(
+                endpoint, time.perf_counter() - start, response.status_code
+            )
             return response
 
         return wrapper
@@ -0,0 +1,137 @@
+"""
+Memory used per instance by the request, response and model objects,
+compared with the same dataclasses without `__slots__`.
+
+Usage:
+
+    python -m benchmarks.memory [--count N]
+"""
+
+import argparse
+from dataclasses import MISSING, field, fields, make_dataclass
+import gc
+import time
+import tracemalloc
+from typing import Any, Callable, List, Tuple
+
+from aioauth.models import AuthorizationCode, Client, Token
+from aioauth.oidc.core.responses import TokenResponse as OIDCTokenResponse
+from aioauth.requests import Post, Query, Request
+from aioauth.responses import Response, TokenResponse
+
+
+def without_slots(cls: type) -> type:
+    """Returns a copy of the dataclass `cls` that stores fields in `__dict__`."""
+    return make_dataclass(
+        f"{cls.__name__}WithoutSlots",
+        [
+            (
+                f.name,
+                f.type,
+                (
+                    field(default_factory=f.default_factory)
+                    if f.default_factory is not MISSING
+                    else field(default=f.default)
+                ),
+            )
+            for f in fields(cls)
+        ],
+    )
+
+
+def bytes_per_object(factory: Callable[[], Any], count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        objects = [factory() for _ in range(count)]
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # The list holding the objects is not part of their cost.
+    return (after - before - (len(objects) * 8 + 56)) / count
+
+
+def objects() -> List[Tuple[type, Callable[[type], Any]]]:
+    now = int(time.time())
+    # Field values are shared between instances, only the objects
+    # themselves are measured.
+    return [
+        (
+            Token,
+            lambda cls: cls(
+                access_token="access_token",
+                refresh_token="refresh_token",
+                scope="read write",
+                issued_at=now,
+                expires_in=3600,
+                refresh_token_expires_in=7200,
+                client_id="client_id",
+            ),
+        ),
+        (
+            AuthorizationCode,
+            lambda cls: cls(
+                code="code",
+                client_id="client_id",
+                redirect_uri="https://localhost/callback",
+                response_type="code",
+                scope="read",
+                auth_time=now,
+                expires_in=300,
+            ),
+        ),
+        (
+            Client,
+            lambda cls: cls(
+                client_id="client_id",
+                client_secret="client_secret",
+                grant_types=None,
+                response_types=None,
+                redirect_uris=None,
+            ),
+        ),
+        (Query, lambda cls: cls()),
+        (Post, lambda cls: cls()),
+        (Request, lambda cls: cls(method="POST")),
+        (
+            TokenResponse,
+            lambda cls: cls(
+                expires_in=3600,
+                refresh_token_expires_in=7200,
+                access_token="access_token",
+                refresh_token="refresh_token",
+                scope="read",
+            ),
+        ),
+        (
+            OIDCTokenResponse,
+            lambda cls: cls(
+                expires_in=3600,
+                refresh_token_expires_in=7200,
+                access_token="access_token",
+                refresh_token="refresh_token",
+                scope="read",
+            ),
+        ),
+        (Response, lambda cls: cls()),
+    ]
+
+
+def main(count: int) -> None:
+    print(f"{'object':<42}  {'slots B':>8}  {'dict B':>8}  {'saved':>6}")
+    for cls, factory in objects():
+        slotted = bytes_per_object(lambda: factory(cls), count)
+        plain_cls = without_slots(cls)
+        plain = bytes_per_object(lambda: factory(plain_cls), count)
+        print(
+            f"{cls.__module__ + '.' + cls.__name__:<42}"
+            f"  {slotted:>8.0f}  {plain:>8.0f}  {1 - slotted / plain:>6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+    main(args.count)
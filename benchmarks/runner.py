@@ -0,0 +1,110 @@
+"""
+Minimal benchmark harness for coroutines.
+"""
+
+from dataclasses import dataclass
+import gc
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, List, Sequence
+
+
+Prepare = Callable[[], Awaitable[Any]]
+Operation = Callable[[Any], Awaitable[Any]]
+
+
+@dataclass
+class Result:
+    name: str
+    iterations: int
+    ops_per_sec: float
+    p50_us: float
+    p90_us: float
+    p99_us: float
+    peak_bytes: float
+    blocks: float
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+async def measure(
+    name: str,
+    prepare: Prepare,
+    operation: Operation,
+    iterations: int,
+    warmup: int,
+) -> Result:
+    """
+    Runs `operation` on the result of `prepare` `iterations` times.
+
+    Only `operation` is timed. Latencies are measured first, then
+    memory is measured in a second pass with `tracemalloc` enabled, so
+    that tracing does not skew the timings. `peak_bytes` is the average
+    peak of memory allocated while running one operation, `blocks` is
+    the average number of memory blocks still allocated after it.
+    """
+    for _ in range(warmup):
+        await operation(await prepare())
+
+    gc.collect()
+    latencies: List[float] = []
+    for _ in range(iterations):
+        argument = await prepare()
+        start = time.perf_counter()
+        await operation(argument)
+        latencies.append(time.perf_counter() - start)
+
+    peak_bytes = 0
+    blocks = 0
+    memory_iterations = max(1, iterations // 10)
+    tracemalloc.start()
+    try:
+        for _ in range(memory_iterations):
+            argument = await prepare()
+            gc.collect()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            blocks_before = sys.getallocatedblocks()
+            await operation(argument)
+            _, peak = tracemalloc.get_traced_memory()
+            blocks += sys.getallocatedblocks() - blocks_before
+            peak_bytes += peak - before
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return Result(
+        name=name,
+        iterations=iterations,
+        ops_per_sec=iterations / sum(latencies),
+        p50_us=percentile(latencies, 0.50) * 1e6,
+        p90_us=percentile(latencies, 0.90) * 1e6,
+        p99_us=percentile(latencies, 0.99) * 1e6,
+        peak_bytes=peak_bytes / memory_iterations,
+        blocks=blocks / memory_iterations,
+    )
+
+
+def format_results(results: Sequence[Result]) -> str:
+    width = max(len(result.name) for result in results)
+    lines = [
+        f"{'benchmark':<{width}}  {'ops/sec':>10}  {'p50 us':>8}  {'p90 us':>8}"
+        f"  {'p99 us':>8}  {'peak B':>8}  {'blocks':>7}"
+    ]
+    for result in results:
+        lines.append(
+            f"{result.name:<{width}}  {result.ops_per_sec:>10.0f}"
+            f"  {result.p50_us:>8.1f}  {result.p90_us:>8.1f}  {result.p99_us:>8.1f}"
+            f"  {result.peak_bytes:>8.0f}  {result.blocks:>7.1f}"
+        )
+    return "\n".join(lines)
+
+
+def statistics_summary(results: Sequence[Result]) -> str:
+    mean = statistics.geometric_mean(result.ops_per_sec for result in results)
+    return f"geometric mean ops/sec: {mean:.0f}"
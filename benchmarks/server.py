@@ -0,0 +1,297 @@
+"""
+Endpoint level benchmarks of `aioauth.server.AuthorizationServer`.
+
+Usage:
+
+    python -m benchmarks.server [--iterations N] [--warmup N] [-k FILTER]
+                                [--database-url URL]
+"""
+
+import argparse
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from aioauth.config import Settings
+from aioauth.models import Client
+from aioauth.requests import Post, Query, Request
+from aioauth.server import AuthorizationServer
+from aioauth.storage import BaseStorage
+from aioauth.storage.memory import MemoryStorage
+from aioauth.utils import encode_auth_headers, generate_token
+
+from .runner import Result, format_results, measure, statistics_summary
+
+Scenario = Tuple[str, Callable[[], Awaitable[Request]], Callable[[Request], Any]]
+
+URL = "https://localhost"
+REDIRECT_URI = "https://localhost/callback"
+SCOPE = "read write"
+USERNAME = "user"
+PASSWORD = "password"
+
+RESPONSE_TYPES = [
+    "code",
+    "token",
+    "id_token",
+    "none",
+    "code token",
+    "code id_token",
+    "id_token token",
+    "code id_token token",
+]
+
+
+class BenchmarkUsers:
+    async def get_user(self, request: Request) -> Optional[Any]:
+        if request.post.username == USERNAME and request.post.password == PASSWORD:
+            return USERNAME
+        return None
+
+    async def get_id_token(
+        self,
+        *,
+        request: Request,
+        client_id: str,
+        scope: str,
+        redirect_uri: str,
+        response_type: Optional[str] = None,
+        nonce: Optional[str] = None,
+    ) -> str:
+        return "id_token"
+
+
+class BenchmarkStorage(BenchmarkUsers, MemoryStorage):
+    pass
+
+
+async def sql_storage(url: str) -> BaseStorage:
+    from aioauth.storage.sql import SQLStorage
+
+    class BenchmarkSQLStorage(BenchmarkUsers, SQLStorage):
+        pass
+
+    storage = BenchmarkSQLStorage.from_url(url)
+    await storage.create_tables()
+    return storage
+
+
+class Benchmarks:
+    def __init__(self, storage: Optional[BaseStorage] = None):
+        self.settings = Settings()
+        self.client = Client(
+            client_id=generate_token(48),
+            client_secret=generate_token(48),
+            grant_types=[
+                "authorization_code",
+                "client_credentials",
+                "password",
+                "refresh_token",
+            ],
+            response_types=["code", "token", "id_token", "none"],
+            redirect_uris=[REDIRECT_URI],
+            scope=SCOPE,
+        )
+        self.storage = storage or BenchmarkStorage(clients=[self.client])
+        self.server = AuthorizationServer(storage=self.storage)
+        self.headers = encode_auth_headers(
+            self.client.client_id, self.client.client_secret
+        )
+
+    def post(self, post: Post, headers=None) -> Request:
+        return Request(
+            method="POST",
+            url=URL,
+            post=post,
+            headers=self.headers if headers is None else headers,
+            settings=self.settings,
+        )
+
+    async def create_token(self) -> str:
+        token = await self.storage.create_token(
+            request=Request(method="POST", settings=self.settings),
+            client_id=self.client.client_id,
+            scope=SCOPE,
+            access_token=generate_token(42),
+            refresh_token=generate_token(48),
+        )
+        return token.refresh_token or ""
+
+    def scenarios(self) -> List[Scenario]:
+        server = self.server
+        scenarios: List[Scenario] = []
+
+        async def authorization_code() -> Request:
+            code = generate_token(42)
+            await self.storage.create_authorization_code(
+                request=Request(method="GET", settings=self.settings),
+                client_id=self.client.client_id,
+                scope=SCOPE,
+                response_type="code",
+                redirect_uri=REDIRECT_URI,
+                code=code,
+            )
+            return self.post(
+                Post(
+                    grant_type="authorization_code",
+                    code=code,
+                    redirect_uri=REDIRECT_URI,
+                )
+            )
+
+        async def client_credentials() -> Request:
+            return self.post(Post(grant_type="client_credentials", scope=SCOPE))
+
+        async def password() -> Request:
+            return self.post(
+                Post(
+                    grant_type="password",
+                    username=USERNAME,
+                    password=PASSWORD,
+                    scope=SCOPE,
+                )
+            )
+
+        async def refresh_token() -> Request:
+            return self.post(
+                Post(
+                    grant_type="refresh_token", refresh_token=await self.create_token()
+                )
+            )
+
+        token_requests = {
+            "authorization_code": authorization_code,
+            "client_credentials": client_credentials,
+            "password": password,
+            "refresh_token": refresh_token,
+        }
+        for grant_type in server.grant_types:
+            scenarios.append(
+                (
+                    f"token[{grant_type}]",
+                    token_requests[grant_type],
+                    server.create_token_response,
+                )
+            )
+
+        for response_type in RESPONSE_TYPES:
+
+            async def authorize(response_type: str = response_type) -> Request:
+                return Request(
+                    method="GET",
+                    url=URL,
+                    query=Query(
+                        client_id=self.client.client_id,
+                        redirect_uri=REDIRECT_URI,
+                        response_type=response_type,
+                        scope=SCOPE,
+                        state="state",
+                        nonce="nonce",
+                    ),
+                    settings=self.settings,
+                )
+
+            scenarios.append(
+                (
+                    f"authorize[{response_type}]",
+                    authorize,
+                    server.create_authorization_response,
+                )
+            )
+
+        async def introspect() -> Request:
+            return self.post(Post(token=await self.create_token()))
+
+        async def revoke() -> Request:
+            return self.post(
+                Post(token=await self.create_token(), token_type_hint="refresh_token")
+            )
+
+        scenarios.append(
+            ("introspect", introspect, server.create_token_introspection_response)
+        )
+        scenarios.append(("revoke", revoke, server.revoke_token))
+
+        async def invalid_client() -> Request:
+            return self.post(
+                Post(grant_type="client_credentials", scope=SCOPE),
+                headers=encode_auth_headers(self.client.client_id, "wrong"),
+            )
+
+        async def unsupported_grant_type() -> Request:
+            return self.post(Post(grant_type="unsupported"))  # type: ignore
+
+        async def invalid_scope() -> Request:
+            return self.post(Post(grant_type="client_credentials", scope="admin"))
+
+        async def invalid_redirect_uri() -> Request:
+            return Request(
+                method="GET",
+                url=URL,
+                query=Query(
+                    client_id=self.client.client_id,
+                    redirect_uri="https://attacker",
+                    response_type="code",
+                ),
+                settings=self.settings,
+            )
+
+        scenarios.append(
+            ("error[invalid_client]", invalid_client, server.create_token_response)
+        )
+        scenarios.append(
+            (
+                "error[unsupported_grant_type]",
+                unsupported_grant_type,
+                server.create_token_response,
+            )
+        )
+        scenarios.append(
+            ("error[invalid_scope]", invalid_scope, server.create_token_response)
+        )
+        scenarios.append(
+            (
+                "error[invalid_redirect_uri]",
+                invalid_redirect_uri,
+                server.create_authorization_response,
+            )
+        )
+        return scenarios
+
+
+async def main(
+    iterations: int,
+    warmup: int,
+    keyword: Optional[str],
+    database_url: Optional[str] = None,
+) -> List[Result]:
+    if database_url is None:
+        benchmarks = Benchmarks()
+    else:
+        storage = await sql_storage(database_url)
+        benchmarks = Benchmarks(storage)
+        await storage.add_client(benchmarks.client)  # type: ignore
+
+    results = []
+    for name, prepare, operation in benchmarks.scenarios():
+        if keyword and keyword not in name:
+            continue
+        results.append(await measure(name, prepare, operation, iterations, warmup))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("-k", dest="keyword", help="only run matching benchmarks")
+    parser.add_argument(
+        "--database-url",
+        help="run against aioauth.storage.sql, e.g. sqlite+aiosqlite:///bench.db",
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(
+        main(args.iterations, args.warmup, args.keyword, args.database_url)
+    )
+    print(format_results(results))
+    print(statistics_summary(results))
@@ -121,6 +121,14 @@ class Storage(BaseStorage):
             ):
                 return token_
 
+    async def get_revoked_tokens(self, *, at: Optional[int] = None) -> List[Token]:
+        at = int(time.time()) if at is None else at
+        return [
+            token
+            for token in self.tokens
+            if token.revoked and token.issued_at + token.expires_in > at
+        ]
+
     async def get_user(self, request: Request) -> Any:
         password = request.post.password
         username = request.post.username
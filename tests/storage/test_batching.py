@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from aioauth.requests import Request
+from aioauth.storage.batching import BatchingStorage
+from aioauth.storage.memory import MemoryStorage
+
+from tests import factories
+
+
+class BulkStorage(MemoryStorage):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+        self.error = None
+        self.dropped = 0
+
+    async def create_tokens(self, *, calls):
+        self.batches.append(len(calls))
+        if self.error is not None:
+            raise self.error
+        tokens = await super().create_tokens(calls=calls)
+        return tokens[self.dropped :]
+
+    async def create_authorization_codes(self, *, calls):
+        self.batches.append(len(calls))
+        return await super().create_authorization_codes(calls=calls)
+
+
+@pytest.fixture
+def request_():
+    return Request(method="POST", settings=factories.settings_factory())
+
+
+def create_token(storage, request, access_token):
+    return storage.create_token(
+        request=request, client_id="client", scope="read", access_token=access_token
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_are_batched(request_):
+    backend = BulkStorage()
+    storage = BatchingStorage(backend, max_delay=0.01, max_size=4)
+
+    tokens = await asyncio.gather(
+        *(create_token(storage, request_, f"token{i}") for i in range(6))
+    )
+    assert [token.access_token for token in tokens] == [f"token{i}" for i in range(6)]
+    # The first four are written as soon as the batch is full, the
+    # other two once max_delay has elapsed.
+    assert backend.batches == [4, 2]
+    assert await backend.get_token(
+        request=request_, client_id="client", access_token="token5"
+    )
+
+    authorization_codes = await asyncio.gather(
+        *(
+            storage.create_authorization_code(
+                request=request_,
+                client_id="client",
+                scope="read",
+                response_type="code",
+                redirect_uri="https://localhost",
+                code=code,
+            )
+            for code in ("first", "second")
+        )
+    )
+    assert [code.code for code in authorization_codes] == ["first", "second"]
+    assert backend.batches == [4, 2, 2]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch(request_):
+    backend = BulkStorage()
+    backend.error = RuntimeError("database is down")
+    storage = BatchingStorage(backend, max_delay=0.01)
+
+    results = await asyncio.gather(
+        create_token(storage, request_, "first"),
+        create_token(storage, request_, "second"),
+        return_exceptions=True,
+    )
+    assert results == [backend.error, backend.error]
+
+
+@pytest.mark.asyncio
+async def test_missing_rows(request_):
+    backend = BulkStorage()
+    backend.dropped = 1
+    storage = BatchingStorage(backend, max_delay=0.01)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(
+            create_token(storage, request_, "first"),
+            create_token(storage, request_, "second"),
+            return_exceptions=True,
+        ),
+        1,
+    )
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+
+
+@pytest.mark.asyncio
+async def test_flush(request_):
+    backend = BulkStorage()
+    storage = BatchingStorage(backend, max_delay=60)
+
+    task = asyncio.ensure_future(create_token(storage, request_, "token"))
+    await asyncio.sleep(0)
+    assert not task.done()
+
+    await storage.flush()
+    assert backend.batches == [1]
+    assert (await asyncio.wait_for(task, 1)).access_token == "token"
@@ -0,0 +1,139 @@
+import pytest
+
+from aioauth.requests import Request
+from aioauth.storage.cache import ClientCacheStorage
+
+from tests import factories
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingStorage:
+    def __init__(self, storage):
+        self.storage = storage
+        self.calls = 0
+
+    async def get_client(self, **kwargs):
+        self.calls += 1
+        return await self.storage.get_client(**kwargs)
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.mark.asyncio
+async def test_get_client_is_cached(context, clock):
+    client = context.clients[0]
+    backend = CountingStorage(context.storage)
+    storage = ClientCacheStorage(backend, ttl=10, clock=clock)  # type: ignore
+    request = Request(method="POST")
+
+    for _ in range(3):
+        assert (
+            await storage.get_client(request=request, client_id=client.client_id)
+            == client
+        )
+    assert backend.calls == 1
+
+    clock.now = 11
+    await storage.get_client(request=request, client_id=client.client_id)
+    assert backend.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_get_client_checks_secret(context, clock):
+    client = context.clients[0]
+    storage = ClientCacheStorage(context.storage, clock=clock)
+    request = Request(method="POST")
+
+    assert (
+        await storage.get_client(
+            request=request,
+            client_id=client.client_id,
+            client_secret=client.client_secret,
+        )
+        == client
+    )
+    assert (
+        await storage.get_client(
+            request=request, client_id=client.client_id, client_secret="wrong"
+        )
+        is None
+    )
+    assert (
+        await storage.get_client(
+            request=request, client_id=client.client_id, client_secret=""
+        )
+        is None
+    )
+
+
+@pytest.mark.asyncio
+async def test_unknown_client_is_cached(context, clock):
+    backend = CountingStorage(context.storage)
+    storage = ClientCacheStorage(
+        backend, ttl=10, negative_ttl=1, clock=clock  # type: ignore
+    )
+    request = Request(method="POST")
+
+    assert await storage.get_client(request=request, client_id="unknown") is None
+    assert await storage.get_client(request=request, client_id="unknown") is None
+    assert backend.calls == 1
+
+    clock.now = 2
+    assert await storage.get_client(request=request, client_id="unknown") is None
+    assert backend.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_invalidation(context_factory, clock):
+    clients = [factories.client_factory(client_id=str(i)) for i in range(3)]
+    context = context_factory(clients=clients)
+    backend = CountingStorage(context.storage)
+    storage = ClientCacheStorage(backend, maxsize=2, clock=clock)  # type: ignore
+    request = Request(method="POST")
+
+    await storage.get_client(request=request, client_id="0")
+    await storage.get_client(request=request, client_id="1")
+    await storage.get_client(request=request, client_id="0")
+    await storage.get_client(request=request, client_id="2")
+    assert backend.calls == 3
+
+    # "1" was the least recently used client and has been evicted.
+    await storage.get_client(request=request, client_id="0")
+    assert backend.calls == 3
+    await storage.get_client(request=request, client_id="1")
+    assert backend.calls == 4
+
+    storage.invalidate("1")
+    await storage.get_client(request=request, client_id="1")
+    assert backend.calls == 5
+
+    storage.clear()
+    await storage.get_client(request=request, client_id="0")
+    assert backend.calls == 6
+
+
+@pytest.mark.asyncio
+async def test_other_methods_are_forwarded(context):
+    client = context.clients[0]
+    storage = ClientCacheStorage(context.storage)
+    request = Request(method="POST")
+
+    token = context.initial_tokens[0]
+    assert (
+        await storage.get_token(
+            request=request,
+            client_id=client.client_id,
+            access_token=token.access_token,
+        )
+        == token
+    )
@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from aioauth.requests import Request
+from aioauth.storage.coalescing import CoalescingStorage
+from aioauth.storage.proxy import ProxyStorage
+
+
+class SlowStorage(ProxyStorage):
+    def __init__(self, storage):
+        super().__init__(storage)
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.error = None
+
+    async def get_client(self, **kwargs):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return await super().get_client(**kwargs)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reads_are_coalesced(context):
+    client = context.clients[0]
+    backend = SlowStorage(context.storage)
+    storage = CoalescingStorage(backend)
+    request = Request(method="POST")
+
+    tasks = [
+        asyncio.ensure_future(
+            storage.get_client(request=request, client_id=client.client_id)
+        )
+        for _ in range(10)
+    ]
+    other = asyncio.ensure_future(
+        storage.get_client(request=request, client_id="unknown")
+    )
+    await asyncio.sleep(0)
+    backend.release.set()
+
+    assert await asyncio.gather(*tasks) == [client] * 10
+    assert await other is None
+    assert backend.calls == 2
+
+    # Completed reads are not cached.
+    await storage.get_client(request=request, client_id=client.client_id)
+    assert backend.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_exceptions_are_propagated(context):
+    backend = SlowStorage(context.storage)
+    backend.error = RuntimeError("database is down")
+    storage = CoalescingStorage(backend)
+    request = Request(method="POST")
+
+    tasks = [
+        asyncio.ensure_future(storage.get_client(request=request, client_id="id"))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    backend.release.set()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(result is backend.error for result in results)
+    assert backend.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_cancellation(context):
+    client = context.clients[0]
+    backend = SlowStorage(context.storage)
+    storage = CoalescingStorage(backend)
+    request = Request(method="POST")
+
+    first = asyncio.ensure_future(
+        storage.get_client(request=request, client_id=client.client_id)
+    )
+    second = asyncio.ensure_future(
+        storage.get_client(request=request, client_id=client.client_id)
+    )
+    await asyncio.sleep(0)
+
+    # Cancelling one waiter leaves the shared call running.
+    first.cancel()
+    await asyncio.sleep(0)
+    backend.release.set()
+    assert await second == client
+    assert first.cancelled()
+    assert backend.calls == 1
+
+    # Cancelling the last waiter cancels the shared call.
+    backend.release.clear()
+    third = asyncio.ensure_future(
+        storage.get_client(request=request, client_id=client.client_id)
+    )
+    await asyncio.sleep(0)
+    (call,) = storage._calls.values()
+    third.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await third
+    await asyncio.sleep(0)
+    assert call.task.cancelled()
+    assert not storage._calls
+
+
+@pytest.mark.asyncio
+async def test_call_after_cancellation(context):
+    client = context.clients[0]
+    backend = SlowStorage(context.storage)
+    storage = CoalescingStorage(backend)
+    request = Request(method="POST")
+
+    first = asyncio.ensure_future(
+        storage.get_client(request=request, client_id=client.client_id)
+    )
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+
+    # Made before the cancelled shared call has finished.
+    second = asyncio.ensure_future(
+        storage.get_client(request=request, client_id=client.client_id)
+    )
+    await asyncio.sleep(0)
+    backend.release.set()
+    assert await second == client
+    assert first.cancelled()
+    assert backend.calls == 2
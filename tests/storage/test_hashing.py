@@ -0,0 +1,153 @@
+from http import HTTPStatus
+
+import pytest
+
+from aioauth.requests import Post, Request
+from aioauth.server import AuthorizationServer
+from aioauth.storage.hashing import HashingStorage
+from aioauth.storage.memory import MemoryStorage
+from aioauth.utils import encode_auth_headers
+
+from tests import factories
+
+
+class CountingHashingStorage(HashingStorage):
+    digests = 0
+
+    def digest(self, value):
+        self.digests += 1
+        return super().digest(value)
+
+
+@pytest.fixture
+def request_():
+    return Request(method="POST", settings=factories.settings_factory())
+
+
+@pytest.fixture
+def storage():
+    return CountingHashingStorage(
+        MemoryStorage(clients=[factories.client_factory()]), key=b"secret"
+    )
+
+
+@pytest.mark.asyncio
+async def test_tokens(storage, request_):
+    token = await storage.create_token(
+        request=request_,
+        client_id="client",
+        scope="read",
+        access_token="access",
+        refresh_token="refresh",
+    )
+    assert (token.access_token, token.refresh_token) == ("access", "refresh")
+
+    stored = await storage.storage.get_token(
+        request=request_,
+        client_id="client",
+        access_token=storage.digest("access"),
+    )
+    assert stored is not None
+    assert stored.access_token == storage.digest("access")
+    assert len(stored.refresh_token) == 43
+    assert not await storage.storage.get_token(
+        request=request_, client_id="client", access_token="access"
+    )
+
+    storage.digests = 0
+    assert await storage.get_token(
+        request=request_, client_id="client", refresh_token="refresh"
+    )
+    await storage.revoke_token(
+        request=request_, client_id="client", refresh_token="refresh"
+    )
+    assert await storage.is_token_revoked(
+        request=request_, client_id="client", access_token="access"
+    )
+    # Digests are reused within a request.
+    assert storage.digests == 0
+    assert await storage.get_tokens(
+        request=request_, client_id="client", tokens=["unknown"]
+    ) == [None]
+    assert storage.digests == 1
+
+
+@pytest.mark.asyncio
+async def test_rotate_refresh_token(storage, request_):
+    await storage.create_token(
+        request=request_,
+        client_id="client",
+        scope="read",
+        access_token="access",
+        refresh_token="refresh",
+    )
+
+    token = await storage.rotate_refresh_token(
+        request=request_,
+        client_id="client",
+        refresh_token="refresh",
+        issue=lambda old_token: (old_token.scope, "new_access", "new_refresh"),
+    )
+    assert token is not None
+    assert (token.access_token, token.refresh_token) == ("new_access", "new_refresh")
+    assert await storage.get_token(
+        request=request_, client_id="client", refresh_token="new_refresh"
+    )
+    assert not await storage.rotate_refresh_token(
+        request=request_,
+        client_id="client",
+        refresh_token="refresh",
+        issue=lambda old_token: (old_token.scope, "other", "other"),
+    )
+
+
+@pytest.mark.asyncio
+async def test_authorization_codes(storage, request_):
+    authorization_code = await storage.create_authorization_code(
+        request=request_,
+        client_id="client",
+        scope="read",
+        response_type="code",
+        redirect_uri="https://localhost",
+        code="code",
+    )
+    assert authorization_code.code == "code"
+    assert not await storage.storage.get_authorization_code(
+        request=request_, client_id="client", code="code"
+    )
+    checked = []
+    assert (
+        await storage.consume_authorization_code(
+            request=request_,
+            client_id="client",
+            code="code",
+            check=lambda row: checked.append(row.code),
+        )
+        == authorization_code
+    )
+    # The check is given the plaintext code.
+    assert checked == ["code"]
+    assert not await storage.get_authorization_code(
+        request=request_, client_id="client", code="code"
+    )
+
+
+@pytest.mark.asyncio
+async def test_server(storage):
+    client = factories.client_factory()
+    server = AuthorizationServer(storage=storage)
+    request = Request(
+        method="POST",
+        settings=factories.settings_factory(),
+        headers=encode_auth_headers(client.client_id, client.client_secret),
+        post=Post(grant_type="client_credentials", scope=client.scope),
+    )
+
+    response = await server.create_token_response(request)
+    assert response.status_code == HTTPStatus.OK
+    access_token = response.content["access_token"]
+    assert len(access_token) == 42
+
+    request.post = Post(token=access_token, token_type_hint="access_token")
+    response = await server.create_token_introspection_response(request)
+    assert response.content["active"]
@@ -0,0 +1,365 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+
+from aioauth.requests import Post, Request
+from aioauth.server import AuthorizationServer
+from aioauth.storage.memory import MemoryStorage
+from aioauth.utils import (
+    create_s256_code_challenge,
+    encode_auth_headers,
+    generate_token,
+)
+
+from tests import factories
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def request_():
+    return Request(method="POST", settings=factories.settings_factory())
+
+
+@pytest.mark.asyncio
+async def test_get_client(request_):
+    client = factories.client_factory()
+    storage = MemoryStorage(clients=[client])
+
+    assert await storage.get_client(request=request_, client_id=client.client_id)
+    assert await storage.get_client(
+        request=request_,
+        client_id=client.client_id,
+        client_secret=client.client_secret,
+    )
+    assert not await storage.get_client(
+        request=request_, client_id=client.client_id, client_secret="wrong"
+    )
+    assert not await storage.get_client(request=request_, client_id="unknown")
+
+    storage.remove_client(client.client_id)
+    assert not await storage.get_client(request=request_, client_id=client.client_id)
+
+
+@pytest.mark.asyncio
+async def test_tokens(request_, clock):
+    storage = MemoryStorage(clock=clock)
+    token = await storage.create_token(
+        request=request_,
+        client_id="client",
+        scope="read",
+        access_token="access",
+        refresh_token="refresh",
+    )
+
+    assert token.issued_at == 1000
+    assert (
+        await storage.get_token(
+            request=request_, client_id="client", access_token="access"
+        )
+        == token
+    )
+    assert (
+        await storage.get_token(
+            request=request_, client_id="client", refresh_token="refresh"
+        )
+        == token
+    )
+    # Hint-less lookups pass the same value as both tokens.
+    assert (
+        await storage.get_token(
+            request=request_,
+            client_id="client",
+            access_token="access",
+            refresh_token="access",
+        )
+        == token
+    )
+    assert not await storage.get_token(
+        request=request_, client_id="other", access_token="access"
+    )
+
+    assert await storage.get_tokens(
+        request=request_,
+        client_id="client",
+        tokens=["access", "unknown"],
+        token_type="access_token",
+    ) == [token, None]
+    assert await storage.get_tokens(
+        request=request_, client_id="client", tokens=["refresh"]
+    ) == [token]
+
+    await storage.revoke_token(
+        request=request_, client_id="client", refresh_token="refresh"
+    )
+    revoked = await storage.get_token(
+        request=request_, client_id="client", access_token="access"
+    )
+    assert revoked is not None and revoked.revoked
+
+
+@pytest.mark.asyncio
+async def test_get_revoked_tokens(request_, clock):
+    storage = MemoryStorage(clock=clock)
+    for access_token in ("first", "second"):
+        await storage.create_token(
+            request=request_,
+            client_id="client",
+            scope="read",
+            access_token=access_token,
+            refresh_token=f"{access_token}-refresh",
+        )
+    await storage.revoke_token(
+        request=request_, client_id="client", access_token="first"
+    )
+
+    revoked = await storage.get_revoked_tokens()
+    assert [token.access_token for token in revoked] == ["first"]
+    clock.now += request_.settings.TOKEN_EXPIRES_IN
+    # The refresh token is still valid, the access token is not.
+    assert await storage.get_revoked_tokens() == []
+
+
+@pytest.mark.asyncio
+async def test_rotate_refresh_token(request_, clock):
+    storage = MemoryStorage(clock=clock)
+    await storage.create_token(
+        request=request_,
+        client_id="client",
+        scope="read write",
+        access_token="access",
+        refresh_token="refresh",
+    )
+
+    def issue(old_token):
+        return "read", "new_access", "new_refresh"
+
+    results = await asyncio.gather(
+        *(
+            storage.rotate_refresh_token(
+                request=request_,
+                client_id="client",
+                refresh_token="refresh",
+                issue=issue,
+            )
+            for _ in range(2)
+        )
+    )
+    token = next(result for result in results if result is not None)
+    assert results.count(None) == 1
+    assert token.scope == "read"
+    assert token.refresh_token == "new_refresh"
+    old_token = await storage.get_token(
+        request=request_, client_id="client", access_token="access"
+    )
+    assert old_token is not None and old_token.revoked
+
+    clock.now += request_.settings.REFRESH_TOKEN_EXPIRES_IN + 1
+    assert not await storage.rotate_refresh_token(
+        request=request_,
+        client_id="client",
+        refresh_token="new_refresh",
+        issue=issue,
+    )
+
+
+@pytest.mark.asyncio
+async def test_authorization_codes(request_):
+    storage = MemoryStorage()
+    authorization_code = await storage.create_authorization_code(
+        request=request_,
+        client_id="client",
+        scope="read",
+        response_type="code",
+        redirect_uri="https://localhost",
+        code="code",
+    )
+
+    assert (
+        await storage.get_authorization_code(
+            request=request_, client_id="client", code="code"
+        )
+        == authorization_code
+    )
+    assert not await storage.get_authorization_code(
+        request=request_, client_id="other", code="code"
+    )
+
+    await storage.delete_authorization_code(
+        request=request_, client_id="client", code="code"
+    )
+    assert not await storage.get_authorization_code(
+        request=request_, client_id="client", code="code"
+    )
+
+    await storage.create_authorization_code(
+        request=request_,
+        client_id="client",
+        scope="read",
+        response_type="code",
+        redirect_uri="https://localhost",
+        code="code",
+    )
+
+    def reject(authorization_code):
+        raise RuntimeError("Rejected")
+
+    # The code is kept when the check fails.
+    with pytest.raises(RuntimeError):
+        await storage.consume_authorization_code(
+            request=request_, client_id="client", code="code", check=reject
+        )
+    assert await storage.get_authorization_code(
+        request=request_, client_id="client", code="code"
+    )
+    assert (
+        await storage.consume_authorization_code(
+            request=request_, client_id="client", code="code"
+        )
+        == authorization_code
+    )
+    assert not await storage.consume_authorization_code(
+        request=request_, client_id="client", code="code"
+    )
+
+
+@pytest.mark.asyncio
+async def test_expired_rows_are_dropped(request_, clock):
+    storage = MemoryStorage(clock=clock)
+    settings = request_.settings
+
+    await storage.create_token(
+        request=request_, client_id="client", scope="", access_token="a1"
+    )
+    await storage.create_token(
+        request=request_,
+        client_id="client",
+        scope="",
+        access_token="a2",
+        refresh_token="r2",
+    )
+    await storage.create_authorization_code(
+        request=request_,
+        client_id="client",
+        scope="",
+        response_type="code",
+        redirect_uri="",
+        code="c1",
+    )
+    assert len(storage) == 3
+
+    clock.now += settings.AUTHORIZATION_CODE_EXPIRES_IN + 1
+    await storage.create_token(
+        request=request_, client_id="client", scope="", access_token="a3"
+    )
+    assert len(storage) == 3
+
+    # The access token without refresh token expires first.
+    clock.now += settings.TOKEN_EXPIRES_IN
+    await storage.create_token(
+        request=request_, client_id="client", scope="", access_token="a4"
+    )
+    assert not await storage.get_token(
+        request=request_, client_id="client", access_token="a1"
+    )
+    assert await storage.get_token(
+        request=request_, client_id="client", refresh_token="r2"
+    )
+
+    clock.now += settings.REFRESH_TOKEN_EXPIRES_IN
+    await storage.create_token(
+        request=request_, client_id="client", scope="", access_token="a5"
+    )
+    assert len(storage) == 1
+    assert not await storage.get_token(
+        request=request_, client_id="client", refresh_token="r2"
+    )
+
+
+@pytest.mark.asyncio
+async def test_server_flow():
+    client = factories.client_factory()
+    server = AuthorizationServer(storage=MemoryStorage(clients=[client]))
+    request = Request(
+        method="POST",
+        url="https://localhost",
+        post=Post(grant_type="client_credentials", scope=client.scope),
+        headers=encode_auth_headers(client.client_id, client.client_secret),
+        settings=factories.settings_factory(),
+    )
+
+    response = await server.create_token_response(request)
+    assert response.status_code == HTTPStatus.OK
+
+    request = Request(
+        method="POST",
+        url="https://localhost",
+        post=Post(
+            token=response.content["access_token"], token_type_hint="access_token"
+        ),
+        headers=encode_auth_headers(client.client_id, client.client_secret),
+        settings=factories.settings_factory(),
+    )
+    response = await server.create_token_introspection_response(request)
+    assert response.content["active"]
+
+
+@pytest.mark.asyncio
+async def test_code_exchange():
+    class RecordingStorage(MemoryStorage):
+        calls: list = []
+
+        async def get_authorization_code(self, **kwargs):
+            self.calls.append("get_authorization_code")
+            return await super().get_authorization_code(**kwargs)
+
+        async def consume_authorization_code(self, **kwargs):
+            self.calls.append("consume_authorization_code")
+            return await super().consume_authorization_code(**kwargs)
+
+    client = factories.client_factory()
+    storage = RecordingStorage(clients=[client])
+    server = AuthorizationServer(storage=storage)
+    code_verifier = generate_token(64)
+    request = Request(
+        method="POST",
+        url="https://localhost",
+        post=Post(
+            grant_type="authorization_code",
+            code="code",
+            redirect_uri=client.redirect_uris[0],
+            code_verifier=generate_token(64),
+        ),
+        headers=encode_auth_headers(client.client_id, client.client_secret),
+        settings=factories.settings_factory(),
+    )
+    await storage.create_authorization_code(
+        request=request,
+        client_id=client.client_id,
+        scope=client.scope,
+        response_type="code",
+        redirect_uri=client.redirect_uris[0],
+        code="code",
+        code_challenge_method="S256",
+        code_challenge=create_s256_code_challenge(code_verifier),
+    )
+
+    response = await server.create_token_response(request)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    request.post.code_verifier = code_verifier
+    response = await server.create_token_response(request)
+    assert response.status_code == HTTPStatus.OK
+    # The code is checked and deleted in a single storage call.
+    assert storage.calls == ["consume_authorization_code"] * 2
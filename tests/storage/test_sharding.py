@@ -0,0 +1,248 @@
+from http import HTTPStatus
+
+import pytest
+
+from aioauth.requests import Post, Request
+from aioauth.server import AuthorizationServer
+from aioauth.storage.memory import MemoryStorage
+from aioauth.storage.sharding import HashRing, ShardedStorage
+from aioauth.tokens import StructuredTokenGenerator
+from aioauth.utils import encode_auth_headers, generate_token
+
+from tests import factories
+
+
+@pytest.fixture
+def request_():
+    return Request(method="POST", settings=factories.settings_factory())
+
+
+@pytest.fixture
+def storage():
+    return ShardedStorage(
+        registry=MemoryStorage(clients=[factories.client_factory()]),
+        shards={name: MemoryStorage() for name in ("a", "b", "c")},
+    )
+
+
+def test_hash_ring():
+    keys = [generate_token(42) for _ in range(3000)]
+    ring = HashRing(["a", "b", "c"])
+    before = {key: ring.get(key) for key in keys}
+    assert set(before.values()) == {"a", "b", "c"}
+
+    ring.add("d")
+    moved = [key for key in keys if ring.get(key) != before[key]]
+    # Only the keys taken over by the new node move.
+    assert {ring.get(key) for key in moved} == {"d"}
+    assert 0.15 < len(moved) / len(keys) < 0.35
+
+    with pytest.raises(ValueError):
+        ring.add("d")
+    with pytest.raises(LookupError):
+        HashRing().get("key")
+
+
+@pytest.mark.asyncio
+async def test_tokens(storage, request_):
+    tokens = [
+        await storage.create_token(
+            request=request_,
+            client_id="client",
+            scope="read",
+            access_token=generate_token(42),
+            refresh_token=generate_token(48),
+        )
+        for _ in range(30)
+    ]
+    assert all(len(shard) for shard in storage.shards.values())
+
+    for token in tokens:
+        assert (
+            await storage.get_token(
+                request=request_,
+                client_id="client",
+                access_token=token.access_token,
+            )
+            == token
+        )
+        assert (
+            await storage.get_token(
+                request=request_,
+                client_id="client",
+                refresh_token=token.refresh_token,
+            )
+            == token
+        )
+
+    values = [token.access_token for token in tokens] + ["unknown"]
+    assert await storage.get_tokens(
+        request=request_,
+        client_id="client",
+        tokens=values,
+        token_type="access_token",
+    ) == tokens + [None]
+
+    token = tokens[0]
+    await storage.revoke_token(
+        request=request_, client_id="client", refresh_token=token.refresh_token
+    )
+    assert await storage.is_token_revoked(
+        request=request_, client_id="client", access_token=token.access_token
+    )
+    revoked = await storage.get_token(
+        request=request_, client_id="client", refresh_token=token.refresh_token
+    )
+    assert revoked is not None and revoked.revoked
+
+
+@pytest.mark.asyncio
+async def test_routing_key(request_):
+    token_generator = StructuredTokenGenerator()
+    storage = ShardedStorage(
+        registry=MemoryStorage(),
+        shards={name: MemoryStorage() for name in ("a", "b", "c")},
+        key=token_generator.get_routing_key,
+    )
+    for _ in range(30):
+        access_token = token_generator.generate_access_token(
+            request=request_, client_id="client", scope="read"
+        )
+        await storage.create_token(
+            request=request_,
+            client_id="client",
+            scope="read",
+            access_token=access_token,
+            refresh_token=token_generator.generate_refresh_token(
+                request=request_,
+                client_id="client",
+                scope="read",
+                access_token=access_token,
+            ),
+        )
+    # Both tokens of a pair share a tag, so no pair is duplicated.
+    assert sum(len(shard) for shard in storage.shards.values()) == 30
+
+
+@pytest.mark.asyncio
+async def test_rotate_refresh_token(storage, request_):
+    old_token = await storage.create_token(
+        request=request_,
+        client_id="client",
+        scope="read",
+        access_token=generate_token(42),
+        refresh_token=generate_token(48),
+    )
+    access_token, refresh_token = generate_token(42), generate_token(48)
+
+    token = await storage.rotate_refresh_token(
+        request=request_,
+        client_id="client",
+        refresh_token=old_token.refresh_token,
+        issue=lambda old: (old.scope, access_token, refresh_token),
+    )
+    assert token is not None
+    assert await storage.get_token(
+        request=request_, client_id="client", access_token=access_token
+    )
+    assert await storage.get_token(
+        request=request_, client_id="client", refresh_token=refresh_token
+    )
+    assert await storage.is_token_revoked(
+        request=request_, client_id="client", access_token=old_token.access_token
+    )
+
+
+@pytest.mark.asyncio
+async def test_add_shard(storage, request_):
+    codes = [generate_token(42) for _ in range(60)]
+    for code in codes:
+        await storage.create_authorization_code(
+            request=request_,
+            client_id="client",
+            scope="read",
+            response_type="code",
+            redirect_uri="https://localhost",
+            code=code,
+        )
+
+    storage.add_shard("d", MemoryStorage())
+    moved = [code for code in codes if storage.ring.get(code) == "d"]
+    assert moved
+    # Codes written before the new shard was added are still found.
+    for code in codes:
+        assert await storage.get_authorization_code(
+            request=request_, client_id="client", code=code
+        )
+
+    assert await storage.consume_authorization_code(
+        request=request_, client_id="client", code=moved[0]
+    )
+    storage.finish_rebalance()
+    assert not await storage.get_authorization_code(
+        request=request_, client_id="client", code=moved[1]
+    )
+
+
+@pytest.mark.asyncio
+async def test_server(storage):
+    client = factories.client_factory()
+    server = AuthorizationServer(storage=storage)
+    request = Request(
+        method="POST",
+        settings=factories.settings_factory(),
+        headers=encode_auth_headers(client.client_id, client.client_secret),
+        post=Post(grant_type="client_credentials", scope=client.scope),
+    )
+
+    response = await server.create_token_response(request)
+    assert response.status_code == HTTPStatus.OK
+
+    request.post = Post(
+        token=response.content["access_token"], token_type_hint="access_token"
+    )
+    response = await server.create_token_introspection_response(request)
+    assert response.content["active"]
+
+
+def live_tokens(shard):
+    return {
+        access_token
+        for access_token, token in shard._tokens.items()
+        if not token.revoked
+    }
+
+
+@pytest.mark.asyncio
+async def test_rotation_to_other_shards(storage, request_):
+    def token_on(name):
+        while True:
+            token = generate_token(42)
+            if storage.ring.get(token) == name:
+                return token
+
+    old_token = await storage.create_token(
+        request=request_,
+        client_id="client",
+        scope="read",
+        access_token=token_on("a"),
+        refresh_token=token_on("a"),
+    )
+    access_token, refresh_token = token_on("b"), token_on("c")
+
+    token = await storage.rotate_refresh_token(
+        request=request_,
+        client_id="client",
+        refresh_token=old_token.refresh_token,
+        issue=lambda old: (old.scope, access_token, refresh_token),
+    )
+    assert token is not None
+    # The owner of the old token keeps no live row nobody can find.
+    assert {name: live_tokens(shard) for name, shard in storage.shards.items()} == {
+        "a": set(),
+        "b": {access_token},
+        "c": {access_token},
+    }
+    assert not await storage.is_token_revoked(
+        request=request_, client_id="client", access_token=access_token
+    )
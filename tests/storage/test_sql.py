@@ -0,0 +1,465 @@
+from http import HTTPStatus
+import time
+
+import pytest
+
+from aioauth.jwt import KeyRing
+from aioauth.models import CompiledClient
+from aioauth.requests import Post, Request
+from aioauth.server import AuthorizationServer
+from aioauth.storage import CreateAuthorizationCodeCall, CreateTokenCall
+from aioauth.tokens import SignedTokenGenerator
+from aioauth.utils import encode_auth_headers
+
+from tests import factories
+
+pytest.importorskip("aiosqlite")
+sql = pytest.importorskip("aioauth.storage.sql")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+async def storage(clock):
+    storage = sql.SQLStorage.from_url("sqlite+aiosqlite://")
+    storage.clock = clock
+    await storage.create_tables()
+    yield storage
+    await storage.engine.dispose()
+
+
+@pytest.fixture
+def request_():
+    return Request(method="POST", settings=factories.settings_factory())
+
+
+@pytest.mark.asyncio
+async def test_get_client(storage, request_):
+    client = factories.client_factory()
+    await storage.add_client(client)
+
+    found = await storage.get_client(
+        request=request_,
+        client_id=client.client_id,
+        client_secret=client.client_secret,
+    )
+    assert isinstance(found, CompiledClient)
+    assert found == client
+    assert not await storage.get_client(
+        request=request_, client_id=client.client_id, client_secret="wrong"
+    )
+    assert not await storage.get_client(request=request_, client_id="unknown")
+
+
+@pytest.mark.asyncio
+async def test_tokens(storage, request_):
+    token = await storage.create_token(
+        request=request_,
+        client_id="client",
+        scope="read",
+        access_token="access",
+        refresh_token="refresh",
+    )
+
+    assert token.issued_at == 1000
+    assert (
+        await storage.get_token(
+            request=request_, client_id="client", access_token="access"
+        )
+        == token
+    )
+    # Hint-less lookups pass the same value as both tokens.
+    assert (
+        await storage.get_token(
+            request=request_,
+            client_id="client",
+            access_token="access",
+            refresh_token="access",
+        )
+        == token
+    )
+    assert not await storage.get_token(
+        request=request_, client_id="other", access_token="access"
+    )
+
+    assert await storage.get_tokens(
+        request=request_,
+        client_id="client",
+        tokens=["access", "unknown", "access"],
+        token_type="access_token",
+    ) == [token, None, token]
+    assert await storage.get_tokens(
+        request=request_, client_id="client", tokens=["refresh"]
+    ) == [token]
+    assert not await storage.is_token_revoked(
+        request=request_, client_id="client", access_token="access"
+    )
+
+    await storage.revoke_token(
+        request=request_, client_id="client", refresh_token="refresh"
+    )
+    assert await storage.is_token_revoked(
+        request=request_, client_id="client", access_token="access"
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("update_returning", [True, False])
+async def test_rotate_refresh_token(storage, request_, clock, update_returning):
+    storage.engine.dialect.update_returning = update_returning
+    await storage.create_token(
+        request=request_,
+        client_id="client",
+        scope="read write",
+        access_token="access",
+        refresh_token="refresh",
+    )
+
+    def issue(old_token):
+        assert old_token.access_token == "access"
+        return "read", "new_access", "new_refresh"
+
+    token = await storage.rotate_refresh_token(
+        request=request_, client_id="client", refresh_token="refresh", issue=issue
+    )
+    assert token is not None and token.scope == "read"
+    assert token == await storage.get_token(
+        request=request_, client_id="client", refresh_token="new_refresh"
+    )
+    assert await storage.is_token_revoked(
+        request=request_, client_id="client", access_token="access"
+    )
+    # The old refresh token cannot be used twice.
+    assert not await storage.rotate_refresh_token(
+        request=request_, client_id="client", refresh_token="refresh", issue=issue
+    )
+
+    clock.now += request_.settings.REFRESH_TOKEN_EXPIRES_IN + 1
+    assert not await storage.rotate_refresh_token(
+        request=request_, client_id="client", refresh_token="new_refresh", issue=issue
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("delete_returning", [True, False])
+async def test_authorization_codes(storage, request_, delete_returning):
+    storage.engine.dialect.delete_returning = delete_returning
+    authorization_code = await storage.create_authorization_code(
+        request=request_,
+        client_id="client",
+        scope="read",
+        response_type="code",
+        redirect_uri="https://localhost",
+        code="code",
+        code_challenge_method="S256",
+        code_challenge="challenge",
+    )
+
+    assert (
+        await storage.get_authorization_code(
+            request=request_, client_id="client", code="code"
+        )
+        == authorization_code
+    )
+    assert not await storage.get_authorization_code(
+        request=request_, client_id="other", code="code"
+    )
+
+    await storage.delete_authorization_code(
+        request=request_, client_id="client", code="code"
+    )
+    assert not await storage.get_authorization_code(
+        request=request_, client_id="client", code="code"
+    )
+
+    await storage.create_authorization_code(
+        request=request_,
+        client_id="client",
+        scope="read",
+        response_type="code",
+        redirect_uri="https://localhost",
+        code="code",
+        code_challenge_method="S256",
+        code_challenge="challenge",
+    )
+
+    def reject(authorization_code):
+        raise RuntimeError("Rejected")
+
+    # The code is kept when the check fails.
+    with pytest.raises(RuntimeError):
+        await storage.consume_authorization_code(
+            request=request_, client_id="client", code="code", check=reject
+        )
+    assert await storage.get_authorization_code(
+        request=request_, client_id="client", code="code"
+    )
+    with pytest.raises(RuntimeError):
+        async with storage.transaction(request_):
+            await storage.consume_authorization_code(
+                request=request_, client_id="client", code="code", check=reject
+            )
+    assert await storage.get_authorization_code(
+        request=request_, client_id="client", code="code"
+    )
+    assert (
+        await storage.consume_authorization_code(
+            request=request_, client_id="client", code="code"
+        )
+        == authorization_code
+    )
+    assert not await storage.consume_authorization_code(
+        request=request_, client_id="client", code="code"
+    )
+
+
+@pytest.mark.asyncio
+async def test_bulk_writes(storage, request_):
+    tokens = await storage.create_tokens(
+        calls=[
+            CreateTokenCall(
+                request=request_,
+                client_id="client",
+                scope="read",
+                access_token=f"access{i}",
+                refresh_token=f"refresh{i}",
+            )
+            for i in range(3)
+        ]
+    )
+    assert (
+        await storage.get_tokens(
+            request=request_,
+            client_id="client",
+            tokens=["access0", "access1", "access2"],
+            token_type="access_token",
+        )
+        == tokens
+    )
+
+    authorization_codes = await storage.create_authorization_codes(
+        calls=[
+            CreateAuthorizationCodeCall(
+                request=request_,
+                client_id="client",
+                scope="read",
+                response_type="code",
+                redirect_uri="https://localhost",
+                code=code,
+                nonce="nonce",
+            )
+            for code in ("first", "second")
+        ]
+    )
+    assert [
+        await storage.get_authorization_code(
+            request=request_, client_id="client", code=code
+        )
+        for code in ("first", "second")
+    ] == authorization_codes
+
+
+@pytest.mark.asyncio
+async def test_transaction(storage, request_):
+    with pytest.raises(RuntimeError):
+        async with storage.transaction(request_):
+            await storage.create_token(
+                request=request_,
+                client_id="client",
+                scope="read",
+                access_token="access",
+            )
+            raise RuntimeError
+    assert not await storage.get_token(
+        request=request_, client_id="client", access_token="access"
+    )
+
+    async with storage.transaction(request_) as connection:
+        async with storage.transaction(request_) as nested:
+            assert nested is connection
+        await storage.create_token(
+            request=request_,
+            client_id="client",
+            scope="read",
+            access_token="access",
+        )
+    assert "aioauth.storage.sql.transaction" not in request_.extra
+    assert await storage.get_token(
+        request=request_, client_id="client", access_token="access"
+    )
+
+
+@pytest.mark.asyncio
+async def test_purge_expired(storage, request_, clock):
+    for access_token in ("first", "second"):
+        await storage.create_token(
+            request=request_,
+            client_id="client",
+            scope="read",
+            access_token=access_token,
+        )
+    await storage.create_authorization_code(
+        request=request_,
+        client_id="client",
+        scope="read",
+        response_type="code",
+        redirect_uri="https://localhost",
+        code="code",
+    )
+
+    assert await storage.purge_expired() == 0
+    clock.now += request_.settings.TOKEN_EXPIRES_IN + 1
+    assert await storage.purge_expired(limit=2) == 2
+    assert await storage.purge_expired() == 1
+    assert not await storage.get_authorization_code(
+        request=request_, client_id="client", code="code"
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_revoked_tokens(storage, request_, clock):
+    for access_token in ("first", "second"):
+        await storage.create_token(
+            request=request_,
+            client_id="client",
+            scope="read",
+            access_token=access_token,
+            refresh_token=f"{access_token}-refresh",
+        )
+    await storage.revoke_token(
+        request=request_, client_id="client", access_token="first"
+    )
+
+    revoked = await storage.get_revoked_tokens()
+    assert [token.access_token for token in revoked] == ["first"]
+    clock.now += request_.settings.TOKEN_EXPIRES_IN
+    # The refresh token is still valid, the access token is not.
+    assert await storage.get_revoked_tokens() == []
+
+
+@pytest.mark.asyncio
+async def test_server(storage, clock):
+    clock.now = time.time()
+    client = factories.client_factory()
+    await storage.add_client(client)
+    server = AuthorizationServer(storage=storage)
+    request = Request(
+        method="POST",
+        settings=factories.settings_factory(),
+        headers=encode_auth_headers(client.client_id, client.client_secret),
+        post=Post(grant_type="client_credentials", scope=client.scope),
+    )
+
+    response = await server.create_token_response(request)
+    assert response.status_code == HTTPStatus.OK
+    assert "aioauth.storage.sql.transaction" not in request.extra
+
+    request.post = Post(
+        token=response.content["access_token"], token_type_hint="access_token"
+    )
+    response = await server.create_token_introspection_response(request)
+    assert response.content["active"]
+
+
+@pytest.mark.asyncio
+async def test_failed_code_exchange(storage, clock, monkeypatch):
+    clock.now = time.time()
+    client = factories.client_factory()
+    await storage.add_client(client)
+    server = AuthorizationServer(storage=storage)
+    request = Request(
+        method="POST",
+        settings=factories.settings_factory(),
+        headers=encode_auth_headers(client.client_id, client.client_secret),
+        post=Post(
+            grant_type="authorization_code",
+            code="code",
+            redirect_uri=client.redirect_uris[0],
+        ),
+    )
+    await storage.create_authorization_code(
+        request=request,
+        client_id=client.client_id,
+        scope=client.scope,
+        response_type="code",
+        redirect_uri=client.redirect_uris[0],
+        code="code",
+    )
+    access_tokens = []
+
+    async def create_token(**kwargs):
+        access_tokens.append(kwargs["access_token"])
+        await sql.SQLStorage.create_token(storage, **kwargs)
+        raise RuntimeError("Lost connection")
+
+    monkeypatch.setattr(storage, "create_token", create_token)
+    response = await server.create_token_response(request)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    # The request is rolled back: the code is not consumed, and the
+    # token is not stored.
+    assert await storage.get_authorization_code(
+        request=request, client_id=client.client_id, code="code"
+    )
+    assert not await storage.get_token(
+        request=request, client_id=client.client_id, access_token=access_tokens[0]
+    )
+
+
+@pytest.mark.asyncio
+async def test_signed_tokens(storage, clock):
+    clock.now = time.time()
+    client = factories.client_factory()
+    await storage.add_client(client)
+    server = AuthorizationServer(
+        storage=storage,
+        token_generator=SignedTokenGenerator(KeyRing({"1": b"k" * 32})),
+    )
+    request = Request(
+        method="POST",
+        settings=factories.settings_factory(),
+        headers=encode_auth_headers(client.client_id, client.client_secret),
+        post=Post(grant_type="client_credentials", scope=client.scope),
+    )
+
+    response = await server.create_token_response(request)
+    access_token = response.content["access_token"]
+    # Longer than any VARCHAR(255) column would allow.
+    assert len(access_token) > 255
+    # Indexed by fixed-size digests, whatever the token length.
+    for column in ("access_token", "refresh_token"):
+        assert isinstance(sql.tokens.c[column].type, sql.Text)
+        assert sql.tokens.c[f"{column}_hash"].type.length == 64
+
+    request.post = Post(
+        grant_type="refresh_token", refresh_token=response.content["refresh_token"]
+    )
+    response = await server.create_token_response(request)
+    assert response.status_code == HTTPStatus.OK
+    assert await storage.is_token_revoked(
+        request=request, client_id=client.client_id, access_token=access_token
+    )
+    token = await storage.get_token(
+        request=request,
+        client_id=client.client_id,
+        access_token=response.content["access_token"],
+    )
+    assert token is not None
+    assert token.access_token == response.content["access_token"]
+
+    request.post = Post(token=token.access_token, token_type_hint="access_token")
+    response = await server.revoke_token(request)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    response = await server.create_token_introspection_response(request)
+    assert not response.content["active"]
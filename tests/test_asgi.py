@@ -0,0 +1,185 @@
+from http import HTTPStatus
+import json
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import pytest
+
+from aioauth.asgi import OAuth2App
+from aioauth.requests import LazyPost
+from aioauth.responses import Response
+from aioauth.utils import encode_auth_headers
+
+
+async def call(
+    app: OAuth2App,
+    method: str,
+    path: str,
+    query: Optional[Dict[str, str]] = None,
+    form: Optional[Dict[str, str]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    body: Optional[bytes] = None,
+) -> Dict[str, Any]:
+    headers = dict(headers or {})
+    if form is not None:
+        body = urlencode(form).encode()
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    scope = {
+        "type": "http",
+        "method": method,
+        "scheme": "https",
+        "path": path,
+        "query_string": urlencode(query or {}).encode(),
+        "headers": [
+            (key.lower().encode(), value.encode()) for key, value in headers.items()
+        ],
+        "server": ("localhost", 443),
+    }
+    messages: List[Dict[str, Any]] = [
+        {"type": "http.request", "body": body or b"", "more_body": False}
+    ]
+    sent: List[Dict[str, Any]] = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+
+    start, response_body = sent
+    return {
+        "status": start["status"],
+        "headers": {k.decode(): v.decode() for k, v in start["headers"]},
+        "content": json.loads(response_body["body"]) if response_body["body"] else {},
+    }
+
+
+@pytest.fixture
+def app(context):
+    return OAuth2App(context.server, settings=context.settings)
+
+
+@pytest.mark.asyncio
+async def test_token_introspect_and_revoke(app, context):
+    client = context.clients[0]
+    headers = {
+        "Authorization": encode_auth_headers(client.client_id, client.client_secret)[
+            "Authorization"
+        ]
+    }
+
+    response = await call(
+        app,
+        "POST",
+        "/token",
+        form={"grant_type": "client_credentials", "scope": client.scope},
+        headers=headers,
+    )
+    assert response["status"] == HTTPStatus.OK
+    assert response["headers"]["cache-control"] == "no-store"
+    access_token = response["content"]["access_token"]
+
+    response = await call(
+        app,
+        "POST",
+        "/introspect",
+        form={"token": access_token, "token_type_hint": "access_token"},
+        headers=headers,
+    )
+    assert response["status"] == HTTPStatus.OK
+    assert response["content"]["active"]
+
+    response = await call(
+        app,
+        "POST",
+        "/revoke",
+        form={"token": access_token, "token_type_hint": "access_token"},
+        headers=headers,
+    )
+    assert response["status"] == HTTPStatus.NO_CONTENT
+    assert response["headers"]["content-length"] == "0"
+
+
+@pytest.mark.asyncio
+async def test_authorize(app, context):
+    client = context.clients[0]
+    response = await call(
+        app,
+        "GET",
+        "/authorize",
+        query={
+            "client_id": client.client_id,
+            "redirect_uri": client.redirect_uris[0],
+            "response_type": "code",
+            "scope": client.scope,
+            "state": "state",
+        },
+    )
+    assert response["status"] == HTTPStatus.FOUND
+    location = urlparse(response["headers"]["location"])
+    assert parse_qs(location.query)["state"] == ["state"]
+    assert "code" in parse_qs(location.query)
+
+
+@pytest.mark.asyncio
+async def test_invalid_requests(app, context):
+    response = await call(app, "GET", "/unknown")
+    assert response["status"] == HTTPStatus.NOT_FOUND
+
+    response = await call(app, "GET", "/token")
+    assert response["status"] == HTTPStatus.METHOD_NOT_ALLOWED
+
+    response = await call(
+        app,
+        "POST",
+        "/token",
+        body=b"grant_type=password&grant_type=client_credentials",
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert response["content"]["error"] == "invalid_request"
+    assert response["content"]["description"] == "Repeated parameter grant_type."
+
+    app.max_body_size = 8
+    response = await call(app, "POST", "/token", form={"grant_type": "password"})
+    assert response["content"]["description"] == "Request body is too large."
+
+
+@pytest.mark.asyncio
+async def test_lifespan(app):
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent: List[Dict[str, Any]] = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app({"type": "lifespan"}, receive, send)
+    assert sent == [
+        {"type": "lifespan.startup.complete"},
+        {"type": "lifespan.shutdown.complete"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_requests_are_decoded_lazily(app):
+    requests = []
+
+    async def endpoint(request):
+        requests.append(request)
+        return Response(status_code=HTTPStatus.NO_CONTENT)
+
+    app.routes["/token"] = endpoint
+    response = await call(
+        app, "POST", "/token", query={"state": "x"}, form={"grant_type": "password"}
+    )
+    assert response["status"] == HTTPStatus.NO_CONTENT
+
+    (request,) = requests
+    assert isinstance(request.post, LazyPost)
+    assert request.post._params is None
+    assert request.post.grant_type == "password"
+    assert request.query.state == "x"
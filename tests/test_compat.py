@@ -0,0 +1,61 @@
+from dataclasses import dataclass, field
+from typing import List
+
+import pytest
+
+from aioauth.compat import add_slots
+from aioauth.models import AuthorizationCode, Client, Token
+from aioauth.oidc.core.requests import Request as OIDCRequest
+from aioauth.requests import Post, Query, Request
+from aioauth.responses import Response, TokenResponse
+
+
+@add_slots
+@dataclass
+class Base:
+    x: int
+    items: List[int] = field(default_factory=list)
+
+    def describe(self) -> str:
+        return f"x={self.x}"
+
+
+@add_slots
+@dataclass
+class Child(Base):
+    y: int = 0
+
+    def describe(self) -> str:
+        return f"{super().describe()} y={self.y}"
+
+
+def test_add_slots():
+    child = Child(1, y=2)
+    assert Base.__slots__ == ("x", "items")
+    assert Child.__slots__ == ("y",)
+    assert Child.__qualname__ == "Child"
+    assert not hasattr(child, "__dict__")
+    assert child.items == []
+    assert child.describe() == "x=1 y=2"
+    assert child == Child(1, [], 2)
+
+    with pytest.raises(AttributeError):
+        child.z = 3  # type: ignore[attr-defined]
+
+
+@pytest.mark.parametrize(
+    "cls",
+    [
+        AuthorizationCode,
+        Client,
+        OIDCRequest,
+        Post,
+        Query,
+        Request,
+        Response,
+        Token,
+        TokenResponse,
+    ],
+)
+def test_slotted_dataclasses(cls):
+    assert "__dict__" not in dir(cls)
@@ -78,3 +78,5 @@ async def test_storage_class() -> None:
             redirect_uri="",
             nonce="",
         )
+    with pytest.raises(NotImplementedError):
+        await db.purge_expired()
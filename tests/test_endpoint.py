@@ -1,11 +1,17 @@
+import asyncio
 import time
 from http import HTTPStatus
 from typing import Optional
+from urllib.parse import parse_qsl, urlparse
 
 import pytest
 
 from aioauth.config import Settings
-from aioauth.requests import Post, Request
+from aioauth.models import Client
+from aioauth.requests import Post, Query, Request
+from aioauth.response_type import ResponseTypeAuthorizationCode, ResponseTypeToken
+from aioauth.server import AuthorizationServer
+from aioauth.storage.proxy import ProxyStorage
 from aioauth.utils import (
     catch_errors_and_unavailability,
     encode_auth_headers,
@@ -317,3 +323,153 @@ async def test_revoke_access_token_with_wrong_client_secret(
     response = await server.revoke_token(request)
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.content["error"] == "invalid_client"
+
+
+@pytest.mark.asyncio
+async def test_batch_introspection(context: AuthorizationContext):
+    client = context.clients[0]
+    client_id = client.client_id
+    client_secret = client.client_secret
+
+    settings = context.settings
+    token = context.initial_tokens[0]
+    server = context.server
+
+    post = Post(
+        tokens=[token.access_token, "invalid token"],
+        token_type_hint="access_token",
+    )
+    request = Request(
+        post=post,
+        method="POST",
+        headers=encode_auth_headers(client_id, client_secret),
+        settings=settings,
+    )
+
+    response = await server.create_batch_token_introspection_response(request)
+    assert response.status_code == HTTPStatus.OK
+    assert [result["active"] for result in response.content["tokens"]] == [
+        True,
+        False,
+    ]
+    assert response.content["tokens"][0]["client_id"] == client_id
+
+
+@pytest.mark.asyncio
+async def test_batch_introspection_invalid_request(context_factory):
+    settings = Settings(INSECURE_TRANSPORT=True, INTROSPECTION_BATCH_MAX_SIZE=1)
+    context = context_factory(settings=settings)
+    client = context.clients[0]
+    server = context.server
+    headers = encode_auth_headers(client.client_id, client.client_secret)
+
+    request = Request(post=Post(), method="POST", headers=headers, settings=settings)
+    response = await server.create_batch_token_introspection_response(request)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.content["error"] == "invalid_request"
+
+    request = Request(
+        post=Post(tokens=["one", "two"]),
+        method="POST",
+        headers=headers,
+        settings=settings,
+    )
+    response = await server.create_batch_token_introspection_response(request)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.content["error"] == "invalid_request"
+
+    request = Request(
+        post=Post(tokens=["one"]),
+        method="POST",
+        headers=encode_auth_headers(client.client_id, "wrong"),
+        settings=settings,
+    )
+    response = await server.create_batch_token_introspection_response(request)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_hybrid_authorization(context: AuthorizationContext):
+    class TracingStorage(ProxyStorage):
+        def __init__(self, storage):
+            super().__init__(storage)
+            self.get_client_calls = 0
+            self.started = asyncio.Event()
+            self.writes = 0
+
+        async def get_client(self, **kwargs):
+            self.get_client_calls += 1
+            return await super().get_client(**kwargs)
+
+        async def _write(self):
+            # Both writes must be in flight for either to complete.
+            self.writes += 1
+            if self.writes == 2:
+                self.started.set()
+            await asyncio.wait_for(self.started.wait(), 1)
+
+        async def create_token(self, **kwargs):
+            await self._write()
+            return await super().create_token(**kwargs)
+
+        async def create_authorization_code(self, **kwargs):
+            await self._write()
+            return await super().create_authorization_code(**kwargs)
+
+    client = context.clients[0]
+    storage = TracingStorage(context.storage)
+    server = AuthorizationServer(storage=storage)
+    request = Request(
+        method="GET",
+        query=Query(
+            client_id=client.client_id,
+            response_type="code id_token token",
+            redirect_uri=client.redirect_uris[0],
+            scope=client.scope,
+            nonce="nonce",
+        ),
+        settings=context.settings,
+    )
+
+    response = await server.create_authorization_response(request)
+    assert response.status_code == HTTPStatus.FOUND
+    fragment = dict(parse_qsl(urlparse(response.headers["location"]).fragment))
+    assert {"code", "id_token", "access_token"} <= fragment.keys()
+    assert storage.get_client_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_legacy_response_type(context: AuthorizationContext):
+    class LegacyResponseType(ResponseTypeToken):
+        validated = 0
+
+        # Overrides written against the one-argument signature.
+        async def validate_request(self, request: Request) -> Client:
+            client = await super().validate_request(request)
+            type(self).validated += 1
+            return client
+
+    client = context.clients[0]
+    server = AuthorizationServer(
+        storage=context.storage,
+        response_types={
+            "code": ResponseTypeAuthorizationCode,
+            "token": LegacyResponseType,
+        },
+    )
+    request = Request(
+        method="GET",
+        query=Query(
+            client_id=client.client_id,
+            response_type="code token",
+            redirect_uri=client.redirect_uris[0],
+            scope=client.scope,
+        ),
+        settings=context.settings,
+    )
+
+    response = await server.create_authorization_response(request)
+    assert response.status_code == HTTPStatus.FOUND
+    fragment = dict(parse_qsl(urlparse(response.headers["location"]).fragment))
+    assert {"code", "access_token"} <= fragment.keys()
+    assert LegacyResponseType.validated == 1
@@ -1,3 +1,4 @@
+from dataclasses import replace
 from http import HTTPStatus
 from urllib.parse import parse_qsl, urlparse
 
@@ -18,6 +19,20 @@ from tests.classes import AuthorizationContext
 from tests.utils import check_request_validators
 
 
+def code_issuer(server, authorization_request):
+    """
+    Returns a function that gives a token request a new authorization
+    code, so that each request variation starts from an unused code.
+    """
+
+    async def issue_code(request):
+        response = await server.create_authorization_response(authorization_request)
+        code = dict(parse_qsl(urlparse(response.headers["location"]).query))["code"]
+        return replace(request, post=replace(request.post, code=code))
+
+    return issue_code
+
+
 @pytest.mark.asyncio
 async def test_authorization_code_flow_plain_code_challenge():
     client = factories.client_factory(client_secret="")
@@ -66,6 +81,7 @@ async def test_authorization_code_flow_plain_code_challenge():
     location = urlparse(location)
     query = dict(parse_qsl(location.query))
     code = query["code"]
+    authorization_request = request
 
     post = Post(
         client_id=client_id,
@@ -82,7 +98,11 @@ async def test_authorization_code_flow_plain_code_challenge():
         method="POST",
     )
 
-    await check_request_validators(request, server.create_token_response)
+    issue_code = code_issuer(server, authorization_request)
+    await check_request_validators(
+        request, server.create_token_response, prepare=issue_code
+    )
+    request = await issue_code(request)
 
     response = await server.create_token_response(request)
     assert response.status_code == HTTPStatus.OK
@@ -187,6 +207,7 @@ async def test_authorization_code_flow_pkce_code_challenge():
     assert query["scope"] == scope
     assert "code" in query
     code = query["code"]
+    authorization_request = request
 
     post = Post(
         client_id=client_id,
@@ -203,7 +224,12 @@ async def test_authorization_code_flow_pkce_code_challenge():
         method="POST",
     )
 
-    await check_request_validators(request, server.create_token_response)
+    issue_code = code_issuer(server, authorization_request)
+    await check_request_validators(
+        request, server.create_token_response, prepare=issue_code
+    )
+    request = await issue_code(request)
+    code = request.post.code
 
     code_record = await db.get_authorization_code(
         request=request, client_id=client_id, code=code
@@ -222,6 +248,58 @@ async def test_authorization_code_flow_pkce_code_challenge():
     assert not code_record
 
 
+@pytest.mark.asyncio
+async def test_failed_code_verifier_keeps_code():
+    client = factories.client_factory(client_secret="")
+    context = factories.context_factory(clients=[client])
+    server = context.server
+    code_verifier = generate_token(128)
+    redirect_uri = client.redirect_uris[0]
+
+    request = Request(
+        url="https://localhost",
+        query=Query(
+            client_id=client.client_id,
+            response_type="code",
+            redirect_uri=redirect_uri,
+            scope=client.scope,
+            code_challenge_method="S256",
+            code_challenge=create_s256_code_challenge(code_verifier),
+        ),
+        method="GET",
+    )
+    request = await code_issuer(server, request)(
+        Request(
+            url="https://localhost",
+            post=Post(
+                client_id=client.client_id,
+                grant_type="authorization_code",
+                redirect_uri=redirect_uri,
+            ),
+            method="POST",
+        )
+    )
+    code = request.post.code
+
+    # Someone holding only the intercepted code cannot use it up.
+    for wrong_verifier in (None, generate_token(128)):
+        response = await server.create_token_response(
+            replace(request, post=replace(request.post, code_verifier=wrong_verifier))
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert await context.storage.get_authorization_code(
+            request=request, client_id=client.client_id, code=code
+        )
+
+    response = await server.create_token_response(
+        replace(request, post=replace(request.post, code_verifier=code_verifier))
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert not await context.storage.get_authorization_code(
+        request=request, client_id=client.client_id, code=code
+    )
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
     ids=["default_settings", "no_issue_refresh_token_implicit"],
@@ -0,0 +1,59 @@
+import pytest
+
+from aioauth import jwt
+
+KEY_1 = b"1" * 32
+KEY_2 = b"2" * 32
+
+
+def test_encode_decode():
+    key_ring = jwt.KeyRing({"1": KEY_1})
+    token = jwt.encode({"exp": 100, "scope": "read"}, key_ring)
+
+    assert jwt.decode(token, key_ring, now=50) == {"exp": 100, "scope": "read"}
+    assert jwt.decode(token, key_ring, now=101) is None
+    assert jwt.decode(token, key_ring, now=101, leeway=5) is not None
+
+
+def test_decode_rejects_tampered_tokens():
+    key_ring = jwt.KeyRing({"1": KEY_1})
+    header, claims, signature = jwt.encode({"exp": 100}, key_ring).split(".")
+    forged_claims = jwt.encode({"exp": 200}, key_ring).split(".")[1]
+
+    assert jwt.decode(f"{header}.{forged_claims}.{signature}", key_ring, now=0) is None
+    assert jwt.decode(f"{header}.{claims}", key_ring, now=0) is None
+    assert jwt.decode("not a token", key_ring, now=0) is None
+    assert jwt.decode("ä.ö.ü", key_ring, now=0) is None
+    assert (
+        jwt.decode(f"{header}.{claims}.{signature}", jwt.KeyRing({"1": KEY_2})) is None
+    )
+
+
+def test_key_rotation():
+    key_ring = jwt.KeyRing({"1": KEY_1})
+    old_token = jwt.encode({"exp": 100}, key_ring)
+
+    key_ring.add("2", KEY_2)
+    assert key_ring.current == "2"
+    new_token = jwt.encode({"exp": 100}, key_ring)
+
+    assert jwt.decode(old_token, key_ring, now=0) is not None
+    assert jwt.decode(new_token, key_ring, now=0) is not None
+
+    key_ring.remove("1")
+    assert jwt.decode(old_token, key_ring, now=0) is None
+    assert jwt.decode(new_token, key_ring, now=0) is not None
+
+    with pytest.raises(ValueError):
+        key_ring.remove("2")
+
+
+def test_key_ring_validation():
+    with pytest.raises(ValueError):
+        jwt.KeyRing({"1": b"short"})
+
+    with pytest.raises(ValueError):
+        jwt.KeyRing({"1": KEY_1}, current="2")
+
+    with pytest.raises(ValueError):
+        jwt.KeyRing({}).current
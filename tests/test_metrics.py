@@ -0,0 +1,119 @@
+from http import HTTPStatus
+
+import pytest
+
+from aioauth.metrics import InstrumentedStorage, MetricsRegistry
+from aioauth.requests import Post, Request
+from aioauth.server import AuthorizationServer
+from aioauth.storage import BaseStorage
+from aioauth.utils import encode_auth_headers
+
+
+@pytest.mark.asyncio
+async def test_metrics_registry(context):
+    client = context.clients[0]
+    metrics = MetricsRegistry()
+    server = AuthorizationServer(
+        storage=context.storage,
+        grant_types=context.grant_types,
+        instrumentation=metrics,
+    )
+    assert isinstance(server.storage, InstrumentedStorage)
+
+    headers = encode_auth_headers(client.client_id, client.client_secret)
+    request = Request(
+        method="POST",
+        post=Post(grant_type="client_credentials", scope=client.scope),
+        headers=headers,
+        settings=context.settings,
+    )
+    response = await server.create_token_response(request)
+    assert response.status_code == HTTPStatus.OK
+
+    request = Request(
+        method="POST",
+        post=Post(grant_type="client_credentials", scope=client.scope),
+        headers=encode_auth_headers(client.client_id, "wrong"),
+        settings=context.settings,
+    )
+    response = await server.create_token_response(request)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    endpoint = ("endpoint", "create_token_response")
+    assert metrics.counters["aioauth_requests_total"] == {
+        (endpoint, ("status", "200")): 1,
+        (endpoint, ("status", "401")): 1,
+    }
+    assert metrics.counters["aioauth_errors_total"] == {
+        (endpoint, ("error", "invalid_client")): 1
+    }
+    assert metrics.counters["aioauth_grant_types_total"] == {
+        (("grant_type", "client_credentials"),): 2
+    }
+    phases = metrics.histograms["aioauth_phase_duration_seconds"]
+    assert phases[(endpoint, ("phase", "validate_request"))].count == 2
+    assert phases[(endpoint, ("phase", "create_token"))].count == 1
+    storage = metrics.histograms["aioauth_storage_duration_seconds"]
+    assert storage[(("method", "get_client"),)].count == 2
+    assert storage[(("method", "create_token"),)].count == 1
+
+    text = metrics.render()
+    assert "# TYPE aioauth_requests_total counter" in text
+    assert (
+        'aioauth_requests_total{endpoint="create_token_response",status="200"} 1'
+        in text
+    )
+    assert (
+        'aioauth_request_duration_seconds_bucket{endpoint="create_token_response",'
+        'le="+Inf"} 2' in text
+    )
+    assert (
+        'aioauth_request_duration_seconds_count{endpoint="create_token_response"} 2'
+        in text
+    )
+
+
+@pytest.mark.asyncio
+async def test_storage_errors_are_counted(context):
+    class FailingStorage(BaseStorage):
+        async def get_client(self, **kwargs):
+            raise RuntimeError
+
+    metrics = MetricsRegistry()
+    server = AuthorizationServer(storage=FailingStorage(), instrumentation=metrics)
+    request = Request(
+        method="POST",
+        post=Post(token="token"),
+        headers=encode_auth_headers("client_id", "client_secret"),
+        settings=context.settings,
+    )
+    response = await server.revoke_token(request)
+    assert response.content["error"] == "server_error"
+
+    assert metrics.counters["aioauth_storage_errors_total"] == {
+        (("method", "get_client"),): 1
+    }
+    assert metrics.counters["aioauth_errors_total"] == {
+        (("endpoint", "revoke_token"), ("error", "server_error")): 1
+    }
+
+
+def test_histogram_buckets():
+    metrics = MetricsRegistry(buckets=[0.1, 1.0])
+    for value in (0.05, 0.1, 0.5, 5.0):
+        metrics.observe("duration", (("name", 'a"b'),), value)
+
+    assert metrics.render() == (
+        "# TYPE duration histogram\n"
+        'duration_bucket{name="a\\"b",le="0.1"} 2\n'
+        'duration_bucket{name="a\\"b",le="1.0"} 3\n'
+        'duration_bucket{name="a\\"b",le="+Inf"} 4\n'
+        'duration_sum{name="a\\"b"} 5.65\n'
+        'duration_count{name="a\\"b"} 4\n'
+    )
+
+
+def test_default_instrumentation_is_disabled(context):
+    server = AuthorizationServer(storage=context.storage)
+    assert not server.instrumentation.enabled
+    assert server.storage is context.storage
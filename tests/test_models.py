@@ -0,0 +1,73 @@
+import pytest
+
+from aioauth.models import Client, CompiledClient
+
+
+def client_factory() -> Client:
+    return Client(
+        client_id="client_id",
+        client_secret="client_secret",
+        grant_types=["authorization_code", "refresh_token"],
+        response_types=["code", "token"],
+        redirect_uris=["https://localhost/callback"],
+        scope="read write",
+    )
+
+
+@pytest.mark.parametrize(
+    "scope",
+    [
+        "",
+        None,
+        "   ",
+        "read",
+        "write read",
+        "read read",
+        "admin",
+        "read admin",
+        "read  ",
+    ],
+)
+def test_compiled_client_scope(scope):
+    client = client_factory()
+    compiled = client.compile()
+    assert compiled.check_scope(scope) == client.check_scope(scope)
+    assert compiled.get_allowed_scope(scope) == client.get_allowed_scope(scope)
+
+
+@pytest.mark.parametrize(
+    "response_type",
+    ["", None, "code", "code token", "code id_token", ["code"], ["none"], "code  "],
+)
+def test_compiled_client_response_type(response_type):
+    client = client_factory()
+    assert client.compile().check_response_type(
+        response_type
+    ) == client.check_response_type(response_type)
+
+
+@pytest.mark.parametrize("grant_type", [None, "", "refresh_token", "password"])
+def test_compiled_client_grant_type(grant_type):
+    client = client_factory()
+    assert client.compile().check_grant_type(grant_type) == client.check_grant_type(
+        grant_type
+    )
+
+
+def test_compiled_client():
+    client = client_factory()
+    compiled = client.compile()
+    assert isinstance(compiled, CompiledClient)
+    assert compiled.compile() is compiled
+    assert compiled == client
+    assert client == compiled
+
+    assert compiled.check_redirect_uri("https://localhost/callback")
+    assert not compiled.check_redirect_uri("https://localhost")
+
+    compiled.redirect_uris = ["https://localhost"]
+    compiled.scope = "admin"
+    assert compiled.check_redirect_uri("https://localhost")
+    assert compiled.check_scope("admin")
+    assert not compiled.check_scope("read")
+    assert compiled != client
@@ -0,0 +1,121 @@
+from http import HTTPStatus
+from urllib.parse import urlencode
+
+import pytest
+
+from aioauth.collections import LazyHTTPHeaderDict
+from aioauth.requests import LazyPost, LazyQuery, Post, Query, Request
+from aioauth.utils import encode_auth_headers
+
+
+def test_lazy_query():
+    query = LazyQuery(
+        b"client_id=client+id&redirect_uri=https%3A%2F%2Flocalhost&state="
+    )
+    assert query._params is None
+    assert query.client_id == "client id"
+    assert query._params is not None
+    assert query.redirect_uri == "https://localhost"
+    assert query.state == ""
+    assert query.response_type is None
+    assert query.scope == Query().scope
+
+    query.scope = "read"
+    assert query.scope == "read"
+
+
+def test_lazy_post():
+    post = LazyPost("token=a&token=b%20c&grant_type=password&unknown=1&&scope")
+    assert post.token == "a"
+    assert post.tokens == ["a", "b c"]
+    assert post.grant_type == "password"
+    assert post.scope == ""
+    assert post.code is None
+
+    post = LazyPost()
+    assert post.tokens is None
+    assert post.scope == Post().scope
+
+
+def test_lazy_headers():
+    headers = LazyHTTPHeaderDict(
+        [
+            (b"Host", b"localhost"),
+            (b"X-Forwarded-For", b"a"),
+            (b"x-forwarded-for", b"b"),
+        ]
+    )
+    assert headers._data is None
+    assert headers["host"] == "localhost"
+    assert headers.get("X-FORWARDED-FOR") == "a, b"
+    assert "authorization" not in headers
+
+    headers["Authorization"] = "Basic"
+    assert dict(headers) == {
+        "host": "localhost",
+        "x-forwarded-for": "a, b",
+        "authorization": "Basic",
+    }
+
+
+@pytest.mark.asyncio
+async def test_request_from_raw(context):
+    client = context.clients[0]
+    authorization = encode_auth_headers(client.client_id, client.client_secret)[
+        "Authorization"
+    ]
+    request = Request.from_raw(
+        method="POST",
+        url="https://localhost/token",
+        body=urlencode({"grant_type": "client_credentials", "scope": client.scope}),
+        headers=[(b"authorization", authorization.encode())],
+        settings=context.settings,
+    )
+    response = await context.server.create_token_response(request)
+    assert response.status_code == HTTPStatus.OK
+    assert response.content["scope"] == client.scope
+
+    request = Request.from_raw(method="GET")
+    assert request.settings is Request.from_raw(method="GET").settings
+    assert request.query.client_id is None
+    assert request.headers.get("authorization") is None
+
+
+@pytest.mark.asyncio
+async def test_request_from_raw_repeated_parameters(context):
+    client = context.clients[0]
+    authorization = encode_auth_headers(client.client_id, client.client_secret)[
+        "Authorization"
+    ]
+
+    def request(body):
+        return Request.from_raw(
+            method="POST",
+            url="https://localhost/token",
+            body=body,
+            headers=[(b"authorization", authorization.encode())],
+            settings=context.settings,
+        )
+
+    # Rejected as by `aioauth.asgi.OAuth2App`.
+    response = await context.server.create_token_response(
+        request("grant_type=password&grant_type=client_credentials")
+    )
+    assert response.content["error"] == "invalid_request"
+    assert response.content["description"] == "Repeated parameter grant_type."
+
+    # Except for the tokens of a batch introspection.
+    response = await context.server.create_batch_token_introspection_response(
+        request("token=a&token=b")
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.content["tokens"]) == 2
+
+    # Single introspection and revocation would act on the first token.
+    for endpoint in (
+        context.server.create_token_introspection_response,
+        context.server.revoke_token,
+    ):
+        response = await endpoint(request("token=a&token=b"))
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.content["description"] == "Repeated parameter token."
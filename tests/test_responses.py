@@ -0,0 +1,88 @@
+from dataclasses import asdict
+import json
+
+import pytest
+
+from aioauth import encoders
+from aioauth.oidc.core.responses import TokenResponse as OIDCTokenResponse
+from aioauth.responses import (
+    AuthorizationCodeResponse,
+    ErrorResponse,
+    IdTokenResponse,
+    NoneResponse,
+    Response,
+    TokenActiveIntrospectionResponse,
+    TokenBatchIntrospectionResponse,
+    TokenInactiveIntrospectionResponse,
+    TokenResponse,
+)
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        ErrorResponse(error="invalid_request", description="Ünïcode."),
+        AuthorizationCodeResponse(code="code", scope="read"),
+        NoneResponse(),
+        TokenResponse(expires_in=1, access_token="a", scope="read"),
+        OIDCTokenResponse(
+            expires_in=1,
+            access_token="a",
+            scope="read",
+            refresh_token="r",
+            refresh_token_expires_in=2,
+            id_token="id",
+        ),
+        IdTokenResponse(id_token="id"),
+        TokenActiveIntrospectionResponse(
+            scope="read", client_id="client", token_type="Bearer", expires_in=1
+        ),
+        TokenInactiveIntrospectionResponse(),
+        TokenBatchIntrospectionResponse(
+            tokens=[
+                TokenInactiveIntrospectionResponse(),
+                TokenActiveIntrospectionResponse(
+                    scope="", client_id="client", token_type="Bearer", expires_in=1
+                ),
+            ]
+        ),
+    ],
+)
+def test_to_dict(response):
+    assert response.to_dict() == asdict(response)
+    assert list(response.to_dict()) == list(asdict(response))
+    assert json.loads(response.to_json()) == asdict(response)
+
+
+def test_response_render():
+    assert Response().render() == b""
+    assert json.loads(Response(content={"active": False}).render()) == {"active": False}
+    assert Response(content={"active": False}, body=b"{}").render() == b"{}"
+
+
+@pytest.fixture
+def json_backend():
+    backend = encoders.get_json_backend()
+    yield
+    encoders.set_json_backend(backend)
+
+
+def test_json_backends(json_backend):
+    encoders.set_json_backend("json")
+    assert encoders.get_json_backend() == "json"
+    assert (
+        encoders.dumps({"a": "é", "b": [1, None]}) == '{"a":"é","b":[1,null]}'.encode()
+    )
+
+    encoders.set_json_backend(lambda obj: b"custom")
+    assert encoders.dumps({}) == b"custom"
+
+    with pytest.raises(ValueError):
+        encoders.set_json_backend("unknown")
+
+
+def test_orjson_backend(json_backend):
+    pytest.importorskip("orjson")
+    encoders.set_json_backend("orjson")
+    assert encoders.get_json_backend() == "orjson"
+    assert encoders.dumps({"a": "é"}) == '{"a":"é"}'.encode()
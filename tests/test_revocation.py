@@ -0,0 +1,243 @@
+from http import HTTPStatus
+
+import pytest
+
+from aioauth.jwt import KeyRing
+from aioauth.requests import Post, Request
+from aioauth.revocation import BloomFilter, RevocationSet, SharedRevocationSet
+from aioauth.server import AuthorizationServer
+from aioauth.storage.cache import ClientCacheStorage
+from aioauth.storage.hashing import HashingStorage
+from aioauth.storage.proxy import ProxyStorage
+from aioauth.storage.sharding import ShardedStorage
+from aioauth.tokens import SignedTokenGenerator
+from aioauth.utils import encode_auth_headers
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bloom_filter():
+    bloom_filter = BloomFilter(1000, error_rate=0.01)
+    items = [str(i).encode() for i in range(1000)]
+    for item in items:
+        bloom_filter.add(item)
+
+    assert all(item in bloom_filter for item in items)
+    false_positives = sum(str(-i).encode() in bloom_filter for i in range(1, 10001))
+    assert false_positives < 300
+
+
+def test_revocation_set():
+    clock = Clock()
+    revocation_set = RevocationSet(capacity=2, prune_interval=10, clock=clock)
+
+    revocation_set.add("expired", 1000)
+    assert len(revocation_set) == 0
+    revocation_set.add("first", 1005)
+    revocation_set.add("second", 1100)
+    revocation_set.add("third", 1100)
+    # The filter grows beyond its capacity.
+    assert revocation_set.filter.capacity == 4
+    assert all(
+        revocation_set.might_contain(token) for token in ("first", "second", "third")
+    )
+    assert not revocation_set.might_contain("other")
+
+    clock.now = 1010
+    revocation_set.add("fourth", 1100)
+    assert len(revocation_set) == 3
+    assert not revocation_set.might_contain("first")
+    assert revocation_set.might_contain("fourth")
+
+
+def test_revocation_set_completion():
+    clock = Clock()
+    revocation_set = RevocationSet(clock=clock)
+    assert not revocation_set.is_complete()
+    revocation_set.load([("expired", 1000), ("revoked", 1100)])
+    assert revocation_set.is_complete()
+    assert len(revocation_set) == 1
+    assert revocation_set.might_contain("revoked")
+
+    # Tokens revoked before it was created have expired.
+    revocation_set = RevocationSet(clock=clock, max_token_lifetime=60)
+    assert not revocation_set.is_complete()
+    clock.now += 60
+    assert revocation_set.is_complete()
+
+
+@pytest.fixture
+def shared(tmp_path):
+    pytest.importorskip("fcntl")
+    clock = Clock()
+    sets = [
+        SharedRevocationSet(str(tmp_path / "revoked"), prune_interval=10, clock=clock)
+        for _ in range(2)
+    ]
+    yield clock, sets
+    for revocation_set in sets:
+        revocation_set.close()
+
+
+def test_shared_revocation_set(shared):
+    clock, (first, second) = shared
+
+    first.add("token", 1100)
+    # Seen by the other process on its next lookup.
+    assert second.might_contain("token")
+    second.add("other", 1100)
+    assert first.might_contain("other")
+    assert not first.might_contain("unknown")
+
+    first.load([("loaded", 1100)])
+    assert second.might_contain("loaded")
+    # Each process is only complete once it loaded the set itself.
+    assert first.is_complete() and not second.is_complete()
+
+
+def test_shared_revocation_set_compaction(shared, tmp_path):
+    clock, (first, second) = shared
+
+    for i in range(200):
+        first.add(f"expired{i}", 1005)
+    first.add("token", 1100)
+    size = (tmp_path / "revoked").stat().st_size
+    assert second.might_contain("expired0")
+
+    clock.now = 1010
+    assert first.prune() == 200
+    assert (tmp_path / "revoked").stat().st_size < size
+    # The other process reads the compacted file from the start.
+    assert second.might_contain("token")
+    assert not second.might_contain("expired0")
+    assert len(second) == 1
+
+    second.add("new", 1100)
+    assert first.might_contain("new")
+
+
+@pytest.mark.asyncio
+async def test_server(context):
+    class RecordingStorage(ProxyStorage):
+        lookups: list = []
+
+        async def is_token_revoked(self, **kwargs):
+            self.lookups.append(kwargs["access_token"])
+            return await super().is_token_revoked(**kwargs)
+
+    client = context.clients[0]
+    settings = context.settings
+    headers = encode_auth_headers(client.client_id, client.client_secret)
+    storage = RecordingStorage(context.storage)
+    token_generator = SignedTokenGenerator(KeyRing({"1": b"k" * 32}))
+    revocation_set = RevocationSet()
+    server = AuthorizationServer(
+        storage=storage,
+        token_generator=token_generator,
+        revocation_set=revocation_set,
+    )
+    await server.load_revocation_set()
+
+    async def issue(post):
+        request = Request(method="POST", post=post, headers=headers, settings=settings)
+        response = await server.create_token_response(request)
+        assert response.status_code == HTTPStatus.OK
+        return response.content
+
+    async def is_active(access_token):
+        request = Request(
+            method="POST",
+            post=Post(token=access_token),
+            headers=headers,
+            settings=settings,
+        )
+        response = await server.create_token_introspection_response(request)
+        return response.content["active"]
+
+    first = await issue(Post(grant_type="client_credentials", scope=client.scope))
+    second = await issue(
+        Post(grant_type="refresh_token", refresh_token=first["refresh_token"])
+    )
+    # The access token replaced by the refresh token grant.
+    assert revocation_set.might_contain(first["access_token"])
+    assert not await is_active(first["access_token"])
+
+    assert await is_active(second["access_token"])
+    request = Request(
+        method="POST",
+        post=Post(token=second["access_token"], token_type_hint="access_token"),
+        headers=headers,
+        settings=settings,
+    )
+    response = await server.revoke_token(request)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert not await is_active(second["access_token"])
+
+    # Only the revoked tokens were looked up.
+    assert storage.lookups == [first["access_token"], second["access_token"]]
+
+    # After a restart, every token is looked up until the set is loaded.
+    server = AuthorizationServer(
+        storage=storage,
+        token_generator=token_generator,
+        revocation_set=RevocationSet(),
+    )
+    storage.lookups.clear()
+    third = await issue(Post(grant_type="client_credentials", scope=client.scope))
+    assert not await is_active(second["access_token"])
+    assert await is_active(third["access_token"])
+    assert storage.lookups == [second["access_token"], third["access_token"]]
+
+    await server.load_revocation_set()
+    storage.lookups.clear()
+    assert not await is_active(first["access_token"])
+    assert not await is_active(second["access_token"])
+    assert await is_active(third["access_token"])
+    assert storage.lookups == [first["access_token"], second["access_token"]]
+
+
+@pytest.mark.asyncio
+async def test_hashing_storage(context):
+    client = context.clients[0]
+    settings = context.settings
+    headers = encode_auth_headers(client.client_id, client.client_secret)
+    storage = HashingStorage(context.storage)
+    token_generator = SignedTokenGenerator(KeyRing({"1": b"k" * 32}))
+
+    # The storage would feed the set digests of the revoked tokens.
+    for wrapped in (
+        storage,
+        ClientCacheStorage(storage),
+        ShardedStorage(registry=context.storage, shards={"a": storage}),
+    ):
+        with pytest.raises(ValueError):
+            AuthorizationServer(
+                storage=wrapped,
+                token_generator=token_generator,
+                revocation_set=RevocationSet(),
+            )
+
+    server = AuthorizationServer(storage=storage, token_generator=token_generator)
+    request = Request(
+        method="POST",
+        post=Post(grant_type="client_credentials", scope=client.scope),
+        headers=headers,
+        settings=settings,
+    )
+    response = await server.create_token_response(request)
+    request = Request(
+        method="POST",
+        post=Post(token=response.content["access_token"]),
+        headers=headers,
+        settings=settings,
+    )
+    response = await server.revoke_token(request)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    response = await server.create_token_introspection_response(request)
+    assert not response.content["active"]
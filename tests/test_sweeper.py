@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from aioauth.requests import Request
+from aioauth.storage.memory import MemoryStorage
+from aioauth.sweeper import ExpirySweeper
+
+from tests import factories
+
+
+async def create_expired_tokens(storage: MemoryStorage, count: int) -> None:
+    request = Request(method="POST", settings=factories.settings_factory())
+    for i in range(count):
+        await storage.create_token(
+            request=request, client_id="client", scope="", access_token=str(i)
+        )
+
+
+@pytest.mark.asyncio
+async def test_sweep_in_batches():
+    now = 1000.0
+    storage = MemoryStorage(clock=lambda: now)
+    await create_expired_tokens(storage, 25)
+
+    calls = []
+    purge_expired = storage.purge_expired
+
+    async def counting_purge_expired(**kwargs):
+        calls.append(kwargs["limit"])
+        return await purge_expired(**kwargs)
+
+    storage.purge_expired = counting_purge_expired  # type: ignore
+    sweeper = ExpirySweeper(storage, batch_size=10, pause=0)
+
+    assert await sweeper.sweep() == 25
+    assert calls == [10, 10, 10]
+    assert len(storage) == 0
+
+
+@pytest.mark.asyncio
+async def test_sweep_grace():
+    storage = MemoryStorage(clock=lambda: 1000.0)
+    await create_expired_tokens(storage, 1)
+
+    assert await ExpirySweeper(storage, grace=10**10).sweep() == 0
+    assert await ExpirySweeper(storage).sweep() == 1
+
+
+@pytest.mark.asyncio
+async def test_background_task():
+    storage = MemoryStorage(clock=lambda: 1000.0)
+    await create_expired_tokens(storage, 3)
+
+    async with ExpirySweeper(storage, interval=0) as sweeper:
+        assert sweeper.running
+        await asyncio.sleep(0.01)
+    assert not sweeper.running
+    assert len(storage) == 0
+
+
+@pytest.mark.asyncio
+async def test_background_task_survives_errors(caplog):
+    storage = MemoryStorage()
+    sweeps = 0
+
+    async def failing_purge_expired(**kwargs):
+        nonlocal sweeps
+        sweeps += 1
+        raise RuntimeError("database is down")
+
+    storage.purge_expired = failing_purge_expired  # type: ignore
+
+    async with ExpirySweeper(storage, interval=0):
+        await asyncio.sleep(0.01)
+
+    assert sweeps > 1
+    assert "Exception caught while purging expired rows." in caplog.text
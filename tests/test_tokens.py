@@ -0,0 +1,291 @@
+from http import HTTPStatus
+import os
+
+import pytest
+
+from aioauth.jwt import KeyRing
+from aioauth.requests import Post, Request
+from aioauth.server import AuthorizationServer
+from aioauth.storage.proxy import ProxyStorage
+from aioauth.tokens import (
+    ChecksummedTokenGenerator,
+    SignedTokenGenerator,
+    StructuredTokenGenerator,
+    TokenPool,
+)
+from aioauth.utils import UNICODE_ASCII_CHARACTER_SET, encode_auth_headers
+
+
+@pytest.mark.asyncio
+async def test_signed_access_token_introspection(context):
+    client = context.clients[0]
+    settings = context.settings
+    headers = encode_auth_headers(client.client_id, client.client_secret)
+    token_generator = SignedTokenGenerator(KeyRing({"1": b"k" * 32}))
+    server = AuthorizationServer(
+        storage=context.storage,
+        grant_types=context.grant_types,
+        token_generator=token_generator,
+    )
+
+    request = Request(
+        method="POST",
+        post=Post(grant_type="client_credentials", scope=client.scope),
+        headers=headers,
+        settings=settings,
+    )
+    response = await server.create_token_response(request)
+    assert response.status_code == HTTPStatus.OK
+    access_token = response.content["access_token"]
+
+    claims = token_generator.decode_access_token(access_token)
+    assert claims is not None
+    assert claims["client_id"] == client.client_id
+    assert claims["scope"] == client.scope
+    assert claims["exp"] - claims["iat"] == settings.TOKEN_EXPIRES_IN
+
+    request = Request(
+        method="POST",
+        post=Post(token=access_token),
+        headers=headers,
+        settings=settings,
+    )
+    response = await server.create_token_introspection_response(request)
+    assert response.content == {
+        "active": True,
+        "client_id": client.client_id,
+        "expires_in": settings.TOKEN_EXPIRES_IN,
+        "scope": client.scope,
+        "token_type": "Bearer",
+    }
+
+    request = Request(
+        method="POST",
+        post=Post(token=access_token, token_type_hint="access_token"),
+        headers=headers,
+        settings=settings,
+    )
+    response = await server.revoke_token(request)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+    request = Request(
+        method="POST",
+        post=Post(tokens=[access_token, "opaque"], token_type_hint="access_token"),
+        headers=headers,
+        settings=settings,
+    )
+    response = await server.create_batch_token_introspection_response(request)
+    assert [result["active"] for result in response.content["tokens"]] == [
+        False,
+        False,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_signed_access_token_of_other_client(context):
+    client = context.clients[0]
+    token_generator = SignedTokenGenerator(KeyRing({"1": b"k" * 32}))
+    server = AuthorizationServer(
+        storage=context.storage, token_generator=token_generator
+    )
+    request = Request(method="POST", settings=context.settings)
+    access_token = token_generator.generate_access_token(
+        request=request, client_id="other", scope=""
+    )
+
+    request = Request(
+        method="POST",
+        post=Post(token=access_token),
+        headers=encode_auth_headers(client.client_id, client.client_secret),
+        settings=context.settings,
+    )
+    response = await server.create_token_introspection_response(request)
+    assert response.content == {"active": False}
+
+
+def test_token_pool():
+    pool = TokenPool(prefetch=64)
+    tokens = [pool.generate(42) for _ in range(100)]
+    assert all(len(token) == 42 for token in tokens)
+    assert set("".join(tokens)) <= set(UNICODE_ASCII_CHARACTER_SET)
+    assert len(set(tokens)) == 100
+    assert len(pool.generate(1000)) == 1000
+
+    assert set(TokenPool(chars="ab").generate(100)) == {"a", "b"}
+
+    with pytest.raises(ValueError):
+        TokenPool(chars="a")
+    with pytest.raises(ValueError):
+        TokenPool(chars="aé")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_token_pool_is_reset_after_fork():
+    pool = TokenPool()
+    pool.generate(1)
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        os.write(write_fd, pool.generate(42).encode())
+        os._exit(0)
+
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    child_token = os.read(read_fd, 42).decode()
+    os.close(read_fd)
+    assert len(child_token) == 42
+    assert child_token != pool.generate(42)
+
+
+def test_structured_tokens():
+    generator = StructuredTokenGenerator()
+    request = Request(method="POST")
+    access_token = generator.generate_access_token(
+        request=request, client_id="client", scope="read"
+    )
+    refresh_token = generator.generate_refresh_token(
+        request=request, client_id="client", scope="read", access_token=access_token
+    )
+    code = generator.generate_authorization_code(
+        request=request, client_id="client", scope="read"
+    )
+
+    assert access_token.startswith("at_")
+    assert refresh_token.startswith("rt_")
+    assert code.startswith("ac_")
+    assert generator.get_token_type(access_token) == "access_token"
+    assert generator.get_token_type(refresh_token) == "refresh_token"
+    assert generator.get_token_type(code) is None
+    assert generator.get_token_type("opaque") is None
+
+    # Both tokens of a pair are routed together.
+    assert generator.get_routing_key(access_token) == generator.get_routing_key(
+        refresh_token
+    )
+    assert generator.get_routing_key(access_token) != generator.get_routing_key(code)
+    assert generator.get_routing_key("opaque") == "opaque"
+
+
+@pytest.mark.asyncio
+async def test_structured_token_lookups(context):
+    class RecordingStorage(ProxyStorage):
+        lookups: list = []
+
+        async def get_token(self, **kwargs):
+            self.lookups.append((kwargs["access_token"], kwargs["refresh_token"]))
+            return await super().get_token(**kwargs)
+
+    client = context.clients[0]
+    settings = context.settings
+    token_generator = StructuredTokenGenerator()
+    storage = RecordingStorage(context.storage)
+    server = AuthorizationServer(storage=storage, token_generator=token_generator)
+    request = Request(method="POST", settings=settings)
+    access_token = token_generator.generate_access_token(
+        request=request, client_id=client.client_id, scope=client.scope
+    )
+    await storage.create_token(
+        request=request,
+        client_id=client.client_id,
+        scope=client.scope,
+        access_token=access_token,
+        refresh_token=token_generator.generate_refresh_token(
+            request=request,
+            client_id=client.client_id,
+            scope=client.scope,
+            access_token=access_token,
+        ),
+    )
+    request = Request(
+        method="POST",
+        post=Post(token=access_token),
+        headers=encode_auth_headers(client.client_id, client.client_secret),
+        settings=settings,
+    )
+
+    response = await server.create_token_introspection_response(request)
+    assert response.content["active"]
+    response = await server.revoke_token(request)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    response = await server.create_token_introspection_response(request)
+    assert not response.content["active"]
+    # Every hint-less lookup is a single access token lookup.
+    assert storage.lookups == [(access_token, None)] * 3
+
+
+def test_checksummed_tokens():
+    request = Request(method="POST")
+    token_generator = ChecksummedTokenGenerator(StructuredTokenGenerator())
+    access_token = token_generator.generate_access_token(
+        request=request, client_id="client", scope="read"
+    )
+    refresh_token = token_generator.generate_refresh_token(
+        request=request, client_id="client", scope="read", access_token=access_token
+    )
+
+    assert token_generator.is_well_formed(access_token)
+    assert token_generator.is_well_formed(refresh_token)
+    assert not token_generator.is_well_formed(access_token[:-1] + "x")
+    assert not token_generator.is_well_formed("at_garbage~00000000")
+    # The wrapped generator still sees its own tokens.
+    assert token_generator.get_token_type(refresh_token) == "refresh_token"
+    assert token_generator.get_routing_key(
+        access_token
+    ) == token_generator.get_routing_key(refresh_token)
+
+    # Tokens issued before checksums were introduced.
+    assert token_generator.is_well_formed("legacy")
+    token_generator.accept_legacy = False
+    assert not token_generator.is_well_formed("legacy")
+
+
+@pytest.mark.asyncio
+async def test_malformed_tokens_are_not_looked_up(context):
+    class RecordingStorage(ProxyStorage):
+        lookups: list = []
+
+        def __getattribute__(self, name):
+            if name in {
+                "get_token",
+                "get_tokens",
+                "rotate_refresh_token",
+                "consume_authorization_code",
+            }:
+                self.lookups.append(name)
+            return super().__getattribute__(name)
+
+    client = context.clients[0]
+    settings = context.settings
+    headers = encode_auth_headers(client.client_id, client.client_secret)
+    storage = RecordingStorage(context.storage)
+    server = AuthorizationServer(
+        storage=storage, token_generator=ChecksummedTokenGenerator()
+    )
+    garbage = "garbage~00000000"
+
+    request = Request(
+        method="POST", post=Post(token=garbage), headers=headers, settings=settings
+    )
+    response = await server.create_token_introspection_response(request)
+    assert not response.content["active"]
+    response = await server.revoke_token(request)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+    request.post = Post(tokens=[garbage, garbage])
+    response = await server.create_batch_token_introspection_response(request)
+    assert response.content["tokens"] == [{"active": False}, {"active": False}]
+
+    request.post = Post(grant_type="refresh_token", refresh_token=garbage)
+    response = await server.create_token_response(request)
+    assert response.content["error"] == "invalid_grant"
+
+    request.post = Post(
+        grant_type="authorization_code",
+        code=garbage,
+        redirect_uri=client.redirect_uris[0],
+    )
+    response = await server.create_token_response(request)
+    assert response.content["error"] == "invalid_grant"
+
+    assert storage.lookups == []
@@ -1,6 +1,6 @@
 from dataclasses import asdict, replace
 from http import HTTPStatus
-from typing import Any, Callable, Dict, Union
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
 
 from aioauth.collections import HTTPHeaderDict
 from aioauth.constances import default_headers
@@ -298,12 +298,17 @@ def get_keys(query: Union[Query, Post]) -> Dict[str, Any]:
 
 
 async def check_query_values(
-    request: Request, responses, query_dict: Dict, endpoint_func, value
+    request: Request,
+    responses,
+    query_dict: Dict,
+    endpoint_func,
+    value,
+    prepare: Optional[Callable[[Request], Awaitable[Request]]] = None,
 ):
     keys = set(query_dict.keys()) & set(responses.keys())
 
     for key in keys:
-        request_ = request
+        request_ = request if prepare is None else await prepare(request)
 
         if request_.method == "POST":
             post = replace(request_.post, **{key: value})
@@ -335,7 +340,13 @@ async def check_query_values(
 async def check_request_validators(
     request: Request,
     endpoint_func: Callable,
+    prepare: Optional[Callable[[Request], Awaitable[Request]]] = None,
 ):
+    """
+    Checks the responses to `request` with each parameter empty or
+    invalid. `prepare` returns the request to alter for each check, for
+    instance with a new authorization code since codes are single-use.
+    """
     query_dict = {}
 
     if request.method == "POST":
@@ -345,7 +356,11 @@ async def check_request_validators(
         query_dict = get_keys(request.query)
 
     responses = EMPTY_KEYS[request.method]
-    await check_query_values(request, responses, query_dict, endpoint_func, None)
+    await check_query_values(
+        request, responses, query_dict, endpoint_func, None, prepare
+    )
 
     responses = INVALID_KEYS[request.method]
-    await check_query_values(request, responses, query_dict, endpoint_func, "invalid")
+    await check_query_values(
+        request, responses, query_dict, endpoint_func, "invalid", prepare
+    )